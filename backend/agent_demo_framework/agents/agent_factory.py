@@ -11,6 +11,19 @@ class AgentFactory:
     
     _agents: Dict[str, BaseAgent] = {}
     
+    # Map agent types to implementations
+    _agent_map = {
+        "default": "conversational",
+        "conversational": "conversational",
+        "multistep": "multistep",
+        "healthcare": "healthcare",
+    }
+    
+    @classmethod
+    def resolve(cls, agent_type: str = "default") -> str:
+        """Implementation key for an agent type; unknown types use the conversational agent."""
+        return cls._agent_map.get(agent_type, "conversational")
+    
     @classmethod
     def get_agent(cls, agent_type: str = "default") -> BaseAgent:
         """Get an agent instance by type.
@@ -21,15 +34,7 @@ class AgentFactory:
         Returns:
             Agent instance
         """
-        # Map agent types to implementations
-        agent_map = {
-            "default": "conversational",
-            "conversational": "conversational",
-            "multistep": "multistep",
-            "healthcare": "healthcare",
-        }
-        
-        agent_key = agent_map.get(agent_type, "conversational")
+        agent_key = cls.resolve(agent_type)
         
         # Create agent if it doesn't exist
         if agent_key not in cls._agents:
@@ -42,6 +47,12 @@ class AgentFactory:
         
         return cls._agents[agent_key]
     
+    @classmethod
+    async def aclose_all(cls) -> None:
+        """Release resources held by every created agent."""
+        for agent in cls._agents.values():
+            await agent.aclose()
+    
     @classmethod
     def list_agents(cls) -> Dict[str, Dict[str, str]]:
         """List all available agents.
@@ -1,12 +1,16 @@
 """Base agent class for LangGraph agents."""
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain_core.messages import BaseMessage
 
 
 class BaseAgent(ABC):
     """Base class for all LangGraph agents."""
     
+    # What a history summary of this agent's sessions must keep; None uses the generic
+    # instructions in core/history.py
+    summary_instructions: Optional[str] = None
+    
     def __init__(self, name: str):
         """Initialize the agent.
         
@@ -16,18 +20,37 @@ class BaseAgent(ABC):
         self.name = name
     
     @abstractmethod
-    async def process(self, message: str, history: List[BaseMessage]) -> Dict[str, Any]:
+    async def process(
+        self,
+        message: str,
+        history: List[BaseMessage],
+        session_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """Process a message and return a response.
         
         Args:
             message: User message
             history: Conversation history
+            session_id: Session the message belongs to, for agents that keep their own state
             
         Returns:
             Dictionary containing the response and metadata
         """
         pass
     
+    def session_independent(self, history: List[BaseMessage]) -> bool:
+        """Whether a turn depends only on the message and history, so identical turns from
+        different sessions can share one run (see core/single_flight.py).
+        
+        Args:
+            history: Conversation history the turn would run with
+        """
+        return True
+    
+    async def aclose(self) -> None:
+        """Release resources held by the agent (connections, checkpointers)."""
+        pass
+    
     @abstractmethod
     def get_agent_info(self) -> Dict[str, str]:
         """Get information about the agent.
@@ -1,12 +1,12 @@
 """Simple conversational agent using LangGraph."""
-from typing import Dict, Any, List, TypedDict, Annotated, Sequence
+from typing import Dict, Any, List, Optional, TypedDict, Annotated, Sequence
 import operator
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import BaseMessage
 from langchain.messages import HumanMessage, AIMessage, SystemMessage
 from langgraph.graph import StateGraph, END
 from agent_demo_framework.agents.base_agent import BaseAgent
 from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.llm import llm_registry
 from agent_demo_framework.schemas.stream import PlanEvent, StatusEvent, MessageEvent, StepInfo
 from typing import AsyncGenerator
 import json
@@ -24,12 +24,7 @@ class ConversationalAgent(BaseAgent):
     def __init__(self):
         """Initialize the conversational agent."""
         super().__init__("conversational")
-        self.llm = ChatOpenAI(
-            model=settings.OPENAI_MODEL_NAME,
-            temperature=0.7,
-            openai_api_key=settings.OPENAI_API_KEY,
-            base_url=settings.OPENAI_API_BASE
-        ) if settings.OPENAI_API_KEY and settings.OPENAI_API_KEY.strip() else None
+        self.llm = llm_registry.get_chat_model(temperature=0.7) if llm_registry.enabled else None
         self.graph = self._build_graph()
     
     def _build_graph(self) -> StateGraph:
@@ -70,12 +65,13 @@ class ConversationalAgent(BaseAgent):
         response = await self.llm.ainvoke(messages)
         return {"messages": [response]}
     
-    async def process(self, message: str, history: List[BaseMessage]) -> Dict[str, Any]:
+    async def process(self, message: str, history: List[BaseMessage], session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process a message and return a response.
         
         Args:
             message: User message
             history: Conversation history
+            session_id: Unused; history is supplied by the caller
             
         Returns:
             Dictionary containing the response and metadata
@@ -106,7 +102,7 @@ class ConversationalAgent(BaseAgent):
         }
     
     
-    async def astream_events(self, message: str, history: List[BaseMessage]) -> AsyncGenerator[Any, None]:
+    async def astream_events(self, message: str, history: List[BaseMessage], session_id: Optional[str] = None) -> AsyncGenerator[Any, None]:
         """Stream events for the conversational agent."""
         
         # 1. Emit Initial Plan
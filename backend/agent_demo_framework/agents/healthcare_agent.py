@@ -1,16 +1,39 @@
-from typing import List, AsyncGenerator, Any, TypedDict, Annotated, Literal
+from typing import List, AsyncGenerator, Any, Dict, TypedDict, Annotated, Literal
+import asyncio
 import json
+import os
+import random
 import re
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage, ToolMessage
+import uuid
+from collections import deque
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage, ToolMessage, RemoveMessage
 from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
+from langchain_core.runnables import RunnableConfig
 
 from .base_agent import BaseAgent
 from ..schemas.stream import PlanEvent, StatusEvent, MessageEvent
 from ..core.config import settings
+from ..core.history import fit_to_budget, is_summary
+from ..core.llm import llm_registry
+from ..core.intent_router import LocalIntentRouter
+from ..core.metrics import (
+    LLM_CALL_SECONDS,
+    PREFETCH_TOOL_CALLS,
+    ROUTING_DECISIONS,
+    ROUTING_LOCAL_CONFIDENCE,
+    ROUTING_SHADOW_CHECKS,
+    ROUTING_SPECULATIONS,
+    SUPERVISOR_ITERATIONS,
+    TOOL_CALLS_DEDUPLICATED,
+    TOOL_SECONDS,
+    MetricsCallbackHandler,
+)
+from ..core.tracing import SPAN_KIND_CLIENT, TracingCallbackHandler, tracer
+from ..core.events import event_context, get_event_logger
+from ..db.checkpoint import create_checkpointer, close_checkpointer
 
 # Import tools
 from ..tools.healthcare.patient import patient_record
@@ -18,12 +41,156 @@ from ..tools.healthcare.coverage import coverage_check
 from ..tools.healthcare.scheduling import appointment_slots
 from ..tools.healthcare.meds import medication_info
 from ..tools.healthcare.policy import policy_check
+from ..tools.healthcare import store
+from ..tools.healthcare.cache import normalize_args
+
+routing_events = get_event_logger("healthcare.routing")
+supervisor_events = get_event_logger("healthcare.supervisor")
+graph_events = get_event_logger("healthcare.graph")
+
+# Imaging requests always get a policy_check in the coordination workflow
+IMAGING_PATTERN = re.compile(r"\b(mri|ct|scan|imaging|x-ray|pet)\b", re.IGNORECASE)
+
+# Trained on first use from the labeled examples shipped in data/routing
+_local_router = LocalIntentRouter(os.path.join(settings.DATA_DIR, "routing", "healthcare_intents.jsonl"))
+
+
+class SpeculationGuard:
+    """Recent outcomes of LLM routing in concurrent mode, to pause speculation while it mostly misroutes."""
+
+    def __init__(self, window: int = 50, min_samples: int = 10):
+        self._outcomes: deque = deque(maxlen=window)
+        self._min_samples = min_samples
+
+    def record(self, discarded: bool) -> None:
+        self._outcomes.append(discarded)
+
+    @property
+    def discard_rate(self) -> float:
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def allow(self) -> bool:
+        if len(self._outcomes) < self._min_samples:
+            return True
+        return self.discard_rate <= settings.HEALTHCARE_ROUTING_SPECULATION_MAX_DISCARD_RATE
+
+
+_speculation_guard = SpeculationGuard()
+
+class ToolIndex(TypedDict, total=False):
+    """Facts about the tool traffic in `messages`, kept current as messages are added."""
+    results: int  # tool results in the thread
+    by_tool: Dict[str, int]
+    pending: List[str]  # call ids of the latest tool-call batch still waiting for a result
+    has_patient: bool
+    has_policy: bool
+    call_keys: Dict[str, str]  # call id -> tool_call_key for the latest tool-call batch
+    memo: Dict[str, str]  # tool_call_key -> content of a successful result in this run
+
+
+def tool_call_key(name: str, args: dict) -> str:
+    return f"{name}:{normalize_args(args or {})}"
+
+
+def _is_tool_message(msg: BaseMessage) -> bool:
+    return isinstance(msg, ToolMessage) or getattr(msg, "type", None) == "tool"
+
+
+def _tool_message_field(msg: BaseMessage, *keys: str) -> str | None:
+    for key in keys:
+        value = getattr(msg, key, None)
+        if value:
+            return str(value)
+    extra = getattr(msg, "additional_kwargs", None) or {}
+    for key in keys:
+        if extra.get(key):
+            return str(extra[key])
+    return None
+
+
+def _is_patient_fact(content: str) -> bool:
+    try:
+        payload = json.loads(content)
+        return isinstance(payload, dict) and bool(payload.get("patient_id") or payload.get("name"))
+    except Exception:
+        return "not found" not in content.lower() and "error" not in content.lower()
+
+
+def _is_policy_fact(content: str) -> bool:
+    try:
+        payload = json.loads(content)
+        return isinstance(payload, dict) and bool(payload.get("status"))
+    except Exception:
+        lower = content.lower()
+        return "requires_review" in lower or "blocked" in lower or "pass" in lower
+
+
+def _index_message(index: ToolIndex, msg: BaseMessage) -> None:
+    """Fold one message into `index` (which the caller owns)."""
+    if isinstance(msg, AIMessage) and getattr(msg, "tool_calls", None):
+        call_ids = []
+        call_keys = {}
+        for call in msg.tool_calls:
+            call_id = (call.get("id") or call.get("tool_call_id")) if isinstance(call, dict) else getattr(call, "id", None)
+            if call_id:
+                call_ids.append(str(call_id))
+                call_keys[str(call_id)] = tool_call_key(call.get("name", ""), call.get("args", {}))
+        index["pending"] = call_ids
+        index["call_keys"] = call_keys
+    elif _is_tool_message(msg):
+        name = _tool_message_field(msg, "name", "tool") or "unknown"
+        content = getattr(msg, "content", "") or ""
+        by_tool = dict(index.get("by_tool", {}))
+        by_tool[name] = by_tool.get(name, 0) + 1
+        index["by_tool"] = by_tool
+        index["results"] = index.get("results", 0) + 1
+        call_id = _tool_message_field(msg, "tool_call_id")
+        if call_id and call_id in index.get("pending", []):
+            index["pending"] = [pending for pending in index["pending"] if pending != call_id]
+        key = index.get("call_keys", {}).get(call_id) if call_id else None
+        if key and getattr(msg, "status", "success") != "error":
+            index["memo"] = {**index.get("memo", {}), key: str(content)}
+        if name == "patient_record" and not index.get("has_patient"):
+            index["has_patient"] = _is_patient_fact(str(content))
+        elif name == "policy_check" and not index.get("has_policy"):
+            index["has_policy"] = _is_policy_fact(str(content))
+
+
+def build_tool_index(messages: List[BaseMessage]) -> ToolIndex:
+    index: ToolIndex = {
+        "results": 0,
+        "by_tool": {},
+        "pending": [],
+        "has_patient": False,
+        "has_policy": False,
+        "call_keys": {},
+        "memo": {},
+    }
+    for msg in messages:
+        _index_message(index, msg)
+    return index
+
+
+def update_tool_index(index: ToolIndex | None, update: ToolIndex | List[BaseMessage]) -> ToolIndex:
+    """
+    Reducer for AgentState.tool_index. A list of newly added messages is folded into the
+    current index; a ToolIndex (built for a run's input) replaces it.
+    """
+    if isinstance(update, dict):
+        return update
+    index = dict(index or build_tool_index([]))
+    for msg in update:
+        _index_message(index, msg)
+    return index
+
 
 # Define state
 class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
     next: str  # supervisor routing token
     task_type: str  # Track conversation mode (general vs coordination)
+    # Nodes that add tool calls or results also send them here so the supervisor never rescans messages
+    tool_index: Annotated[ToolIndex, update_tool_index]
 
 class RoutingDecision(BaseModel):
     task_type: Literal["general", "coordination"] = Field(..., description="The type of task required.")
@@ -34,28 +201,34 @@ class HealthcareAgent(BaseAgent):
     Healthcare Care Coordinator Agent using a supervisor-worker pattern.
     """
     
+    summary_instructions = (
+        "It is for a healthcare care-coordination assistant: keep patient identifiers, conditions, "
+        "medications, allergies, decisions made, pending actions and appointment details."
+    )
+    
     def __init__(self):
         super().__init__("healthcare")
         self.tools = [patient_record, coverage_check, appointment_slots, medication_info, policy_check]
-        self.tool_node = ToolNode(self.tools)
+        self.tool_node = ToolNode(self.tools, name="execute_tools")
         
-        self.llm = ChatOpenAI(
-            model=settings.OPENAI_MODEL_NAME,
-            temperature=0,
-            openai_api_key=settings.OPENAI_API_KEY,
-            openai_api_base=settings.OPENAI_API_BASE,
-        )
+        self.llm = llm_registry.get_chat_model(temperature=0)
         
         self.graph = self._build_graph()
-
-    def _build_graph(self):
+        # Checkpointed variant of the graph, created on first use inside the event loop
+        self.checkpointer = None
+        self._checkpoint_graph = None
+        self._metrics_handler = MetricsCallbackHandler(self.name)
+        self._tracing_handler = TracingCallbackHandler(self.name)
+        self._shadow_checks: set[asyncio.Task] = set()
+
+    def _build_graph(self, checkpointer=None):
         builder = StateGraph(AgentState)
         
         builder.add_node("supervisor", self._supervisor_node)
         builder.add_node("triage_nurse", self._triage_nurse_node)
         builder.add_node("care_coordinator", self._care_coordinator_node)
         builder.add_node("data_agent", self._data_agent_node)
-        builder.add_node("tools", self.tool_node)
+        builder.add_node("tools", self._tools_node)
         
         builder.set_entry_point("supervisor")
         
@@ -97,7 +270,7 @@ class HealthcareAgent(BaseAgent):
         # After coordinator, end
         builder.add_edge("care_coordinator", END)
         
-        return builder.compile()
+        return builder.compile(checkpointer=checkpointer)
 
     def _extract_patient_id(self, text: str) -> str | None:
         match = re.search(r"\bPT-\d+\b", text, re.IGNORECASE)
@@ -125,9 +298,51 @@ class HealthcareAgent(BaseAgent):
                 return "next two weeks"
         return None
 
-    def _determine_task_type(self, message: str) -> str:
+    async def _determine_task_type(self, message: str) -> str:
+        """
+        Decide between 'general' (data lookup) and 'coordination' (complex planning).
+        The local classifier answers when it is confident enough; otherwise the LLM decides.
+        """
+        task_type = await self._local_task_type(message)
+        if task_type is not None:
+            return task_type
+        return await self._llm_task_type(message)
+
+    async def _local_task_type(self, message: str) -> str | None:
+        """The local classifier's decision, or None when it is disabled or not confident enough."""
+        if settings.HEALTHCARE_ROUTING_LOCAL_ENABLED:
+            if not _local_router.loaded:
+                # Training takes a few hundred ms, keep it off the event loop
+                await asyncio.to_thread(_local_router.load)
+            prediction = _local_router.predict(message)
+            if prediction is not None:
+                ROUTING_LOCAL_CONFIDENCE.observe(prediction.confidence)
+                if prediction.confidence >= settings.HEALTHCARE_ROUTING_LOCAL_THRESHOLD:
+                    ROUTING_DECISIONS.inc(source="local", task_type=prediction.label)
+                    routing_events.info("decision", task_type=prediction.label, source="local", confidence=round(prediction.confidence, 3))
+                    if random.random() < settings.HEALTHCARE_ROUTING_SHADOW_RATE:
+                        self._start_shadow_check(message, prediction.label)
+                    return prediction.label
+                routing_events.debug("local_low_confidence", task_type=prediction.label, confidence=round(prediction.confidence, 3))
+        return None
+
+    def _start_shadow_check(self, message: str, local_type: str) -> None:
+        """Ask the LLM in the background as well, to measure how often the local decision agrees."""
+        async def check() -> None:
+            llm_type = await self._llm_task_type(message, record=False)
+            agreed = llm_type == local_type
+            ROUTING_SHADOW_CHECKS.inc(agreed=str(agreed).lower())
+            if not agreed:
+                routing_events.info("shadow_disagreement", local=local_type, llm=llm_type, message=message[:200])
+
+        task = asyncio.create_task(check())
+        self._shadow_checks.add(task)
+        task.add_done_callback(self._shadow_checks.discard)
+
+    async def _llm_task_type(self, message: str, record: bool = True) -> str:
         """
         Use LLM to determine if the query is 'general' (data lookup) or 'coordination' (complex planning).
+        Falls back to HEALTHCARE_ROUTING_FALLBACK on timeout or error so a slow classifier never stalls the request.
         """
         sys = SystemMessage(content=(
             "Classify the user's request.\n"
@@ -137,15 +352,28 @@ class HealthcareAgent(BaseAgent):
             "Use this if the request involves planning, scheduling, or synthesizing multiple data points into a formal plan.\n\n"
             "If the request is unclear or mentions an unknown entity with typos (e.g. 'knwo about Noah'), classify as 'general' to let the Data Agent handle the clarification."
         ))
+        fallback = settings.HEALTHCARE_ROUTING_FALLBACK
         
         try:
             structured_llm = self.llm.with_structured_output(RoutingDecision)
-            decision = structured_llm.invoke([sys, HumanMessage(content=message)])
-            print(f"DEBUG: Routing Decision: {decision.task_type} (Reason: {decision.reasoning})")
+            with LLM_CALL_SECONDS.time(site="routing"), tracer.span("llm routing", kind=SPAN_KIND_CLIENT) as span:
+                decision = await asyncio.wait_for(
+                    structured_llm.ainvoke([sys, HumanMessage(content=message)]),
+                    timeout=settings.HEALTHCARE_ROUTING_TIMEOUT,
+                )
+                if span is not None:
+                    span.set_attribute("routing.task_type", decision.task_type)
+            if record:
+                ROUTING_DECISIONS.inc(source="llm", task_type=decision.task_type)
+                routing_events.info("decision", task_type=decision.task_type, source="llm", reason=decision.reasoning)
             return decision.task_type
+        except asyncio.TimeoutError:
+            routing_events.warning("timeout", timeout_s=settings.HEALTHCARE_ROUTING_TIMEOUT, fallback=fallback)
         except Exception as e:
-            print(f"DEBUG: Routing failed, defaulting to 'coordination': {e}")
-            return "coordination"
+            routing_events.warning("failed", fallback=fallback, error=str(e))
+        if record:
+            ROUTING_DECISIONS.inc(source="fallback", task_type=fallback)
+        return fallback
 
     def _infer_intents(self, text: str) -> dict:
         lower = text.lower()
@@ -158,86 +386,59 @@ class HealthcareAgent(BaseAgent):
             "needs_meds": any(k in lower for k in ["medication", "meds", "drug", "refill", "prescription", "albuterol", "amoxicillin", "oxycodone", "ibuprofen", "cetirizine"]),
         }
 
-    def _collect_tool_results(self, messages: List[BaseMessage]) -> list[tuple[str | None, str]]:
-        results: list[tuple[str | None, str]] = []
-        for msg in messages:
-            if isinstance(msg, ToolMessage) or getattr(msg, "type", None) == "tool":
-                name = getattr(msg, "name", None) or getattr(msg, "tool", None)
-                if not name and hasattr(msg, "additional_kwargs"):
-                    name = msg.additional_kwargs.get("name") or msg.additional_kwargs.get("tool")
-                content = getattr(msg, "content", "") or ""
-                results.append((name, content))
-        return results
-
-    def _collect_tool_calls(self, messages: List[BaseMessage]) -> list[dict]:
-        calls: list[dict] = []
-        for msg in messages:
-            tool_calls = getattr(msg, "tool_calls", None)
-            if tool_calls:
-                for call in tool_calls:
-                    if isinstance(call, dict):
-                        calls.append(call)
-                    elif hasattr(call, "dict"):
-                        calls.append(call.dict())
+    def _plan_prefetch(self, message: str) -> list[tuple[str, dict]]:
+        """Cheap local lookups the request certainly needs, found without an LLM call."""
+        if not settings.HEALTHCARE_PREFETCH_ENABLED:
+            return []
+        calls: list[tuple[str, dict]] = []
+        patient_id = self._extract_patient_id(message)
+        if patient_id:
+            calls.append(("patient_record", {"patient_id": patient_id}))
+        try:
+            known_drugs = store.medications.get()
+        except store.MockDataError:
+            known_drugs = {}
+        for word in dict.fromkeys(re.findall(r"[a-z][a-z-]+", message.lower())):
+            if word in known_drugs:
+                calls.append(("medication_info", {"drug": word}))
         return calls
 
-    def _pending_tool_calls(self, messages: List[BaseMessage]) -> list[str]:
-        last_ai_with_calls: AIMessage | None = None
-        for msg in reversed(messages):
-            if isinstance(msg, AIMessage) and getattr(msg, "tool_calls", None):
-                last_ai_with_calls = msg
-                break
-        if not last_ai_with_calls:
+    def _plan_policy_prefetch(self, message: str, task_type: str) -> list[tuple[str, dict]]:
+        """The policy check triage would make for an imaging request, once routing chose coordination."""
+        if not (settings.HEALTHCARE_PREFETCH_ENABLED and settings.HEALTHCARE_PREFETCH_POLICY):
             return []
-
-        pending_ids: list[str] = []
-        for call in getattr(last_ai_with_calls, "tool_calls", []) or []:
-            if isinstance(call, dict):
-                call_id = call.get("id") or call.get("tool_call_id")
-            else:
-                call_id = getattr(call, "id", None) or getattr(call, "tool_call_id", None)
-            if call_id:
-                pending_ids.append(str(call_id))
-
-        if not pending_ids:
+        if task_type != "coordination" or not IMAGING_PATTERN.search(message):
             return []
+        return [("policy_check", {"request_type": "imaging", "details": message})]
+
+    async def _run_prefetch(self, calls: list[tuple[str, dict]]) -> list[tuple[dict, ToolMessage]]:
+        """Run prefetch tool calls concurrently; failed calls are dropped and left to triage."""
+        tools = {t.name: t for t in self.tools}
+        tool_calls = [
+            {"name": name, "args": args, "id": f"prefetch_{uuid.uuid4().hex[:16]}", "type": "tool_call"}
+            for name, args in calls
+        ]
 
-        responded_ids: set[str] = set()
-        for msg in messages:
-            if isinstance(msg, ToolMessage) or getattr(msg, "type", None) == "tool":
-                tool_call_id = getattr(msg, "tool_call_id", None)
-                if not tool_call_id and hasattr(msg, "additional_kwargs"):
-                    tool_call_id = msg.additional_kwargs.get("tool_call_id")
-                if tool_call_id:
-                    responded_ids.add(str(tool_call_id))
-
-        return [call_id for call_id in pending_ids if call_id not in responded_ids]
-
-    def _has_patient_result(self, messages: List[BaseMessage]) -> bool:
-        for name, content in self._collect_tool_results(messages):
-            if name != "patient_record":
-                continue
+        async def run(call: dict) -> ToolMessage | None:
             try:
-                payload = json.loads(content)
-                if isinstance(payload, dict) and (payload.get("patient_id") or payload.get("name")):
-                    return True
-            except Exception:
-                if "not found" not in content.lower() and "error" not in content.lower():
-                    return True
-        return False
-
-    def _has_policy_result(self, messages: List[BaseMessage]) -> bool:
-        for name, content in self._collect_tool_results(messages):
-            if name != "policy_check":
-                continue
-            try:
-                payload = json.loads(content)
-                if isinstance(payload, dict) and payload.get("status"):
-                    return True
-            except Exception:
-                if "requires_review" in content.lower() or "blocked" in content.lower() or "pass" in content.lower():
-                    return True
-        return False
+                with TOOL_SECONDS.time(tool=call["name"]):
+                    result = await tools[call["name"]].ainvoke(call)
+            except Exception as e:
+                PREFETCH_TOOL_CALLS.inc(tool=call["name"], status="error")
+                graph_events.warning("prefetch_failed", tool=call["name"], error=str(e))
+                return None
+            PREFETCH_TOOL_CALLS.inc(tool=call["name"], status="ok")
+            return result
+
+        results = await asyncio.gather(*(run(call) for call in tool_calls))
+        return [(call, result) for call, result in zip(tool_calls, results) if result is not None]
+
+    def _prefetch_messages(self, fetched: list[tuple[dict, ToolMessage]]) -> list[BaseMessage]:
+        """Prefetched results as an assistant tool-call turn plus its tool results, as if triage made them."""
+        if not fetched:
+            return []
+        graph_events.debug("prefetched", tools=[call["name"] for call, _ in fetched])
+        return [AIMessage(content="", tool_calls=[call for call, _ in fetched])] + [result for _, result in fetched]
 
     def _build_plan_steps(self, user_text: str, task_type: str | None = None) -> list[dict]:
         if task_type == "general":
@@ -277,35 +478,84 @@ class HealthcareAgent(BaseAgent):
         return True
 
     async def _should_continue(self, state: AgentState):
-        messages = state["messages"]
         # If any tool calls are pending, continue to tools node for execution.
-        pending_calls = self._pending_tool_calls(messages)
-        if pending_calls:
+        if (state.get("tool_index") or {}).get("pending"):
             return "continue"
         return "end"
 
+    async def _tools_node(self, state: AgentState, config: RunnableConfig):
+        """
+        Run the requested tools and index their results. A call repeating the tool and
+        arguments of an earlier successful call in this run reuses that result instead.
+        """
+        index = state.get("tool_index") or {}
+        request = state["messages"][-1]
+        calls = list(getattr(request, "tool_calls", None) or [])
+        if not settings.HEALTHCARE_TOOL_DEDUP_ENABLED or not calls:
+            update = await self.tool_node.ainvoke(state, config)
+            return {**update, "tool_index": update.get("messages", [])}
+
+        memo = index.get("memo", {})
+        keys = [tool_call_key(call["name"], call.get("args", {})) for call in calls]
+        # One execution per distinct call not answered earlier in the run
+        fresh: dict[str, dict] = {}
+        for call, key in zip(calls, keys):
+            if key not in memo and key not in fresh:
+                fresh[key] = call
+        executed: dict[str, ToolMessage] = {}
+        if fresh:
+            batch = request.model_copy(update={"tool_calls": list(fresh.values())})
+            update = await self.tool_node.ainvoke({**state, "messages": [batch]}, config)
+            by_id = {msg.tool_call_id: msg for msg in update.get("messages", []) if isinstance(msg, ToolMessage)}
+            executed = {key: by_id[call["id"]] for key, call in fresh.items() if call["id"] in by_id}
+
+        results: list[BaseMessage] = []
+        for call, key in zip(calls, keys):
+            original = executed.get(key)
+            if original is not None and original.tool_call_id == call["id"]:
+                results.append(original)
+                continue
+            if key in memo:
+                content = memo[key]
+            elif original is not None:
+                content = original.content
+            else:
+                continue
+            TOOL_CALLS_DEDUPLICATED.inc(tool=call["name"])
+            graph_events.debug("tool_call_deduplicated", tool=call["name"], call_id=call["id"])
+            results.append(ToolMessage(content=content, name=call["name"], tool_call_id=call["id"]))
+        return {"messages": results, "tool_index": results}
+
     async def _supervisor_node(self, state: AgentState):
         msgs = state["messages"]
-        # Count tool outputs to prevent infinite loops (robust to ToolMessage vs tool_calls attr)
-        tool_call_count = len(self._collect_tool_results(msgs))
-        pending_tool_calls = len(self._pending_tool_calls(msgs))
+        index = state.get("tool_index") or {}
+        # Count tool outputs to prevent infinite loops
+        tool_call_count = index.get("results", 0)
+        pending_tool_calls = len(index.get("pending", []))
         
         # Determine Task Type if not set
         task_type = state.get("task_type")
         if not task_type:
-            task_type = self._determine_task_type(self._latest_user_text(msgs))
-            print(f"Supervisor LLM inferred intent: {task_type}")
+            task_type = await self._determine_task_type(self._latest_user_text(msgs))
+        SUPERVISOR_ITERATIONS.inc(task_type=task_type)
 
         # Check for key data points based on tool outputs
-        has_patient = self._has_patient_result(msgs)
-        has_policy = self._has_policy_result(msgs)
+        has_patient = index.get("has_patient", False)
+        has_policy = index.get("has_policy", False)
         
-        print(f"\n--- SUPERVISOR NODE ({len(msgs)} msgs, {tool_call_count} tool calls) ---")
-        print(f"Status: patient={has_patient}, policy={has_policy}")
+        supervisor_events.debug(
+            "state",
+            messages=len(msgs),
+            tool_calls=tool_call_count,
+            pending_tool_calls=pending_tool_calls,
+            task_type=task_type,
+            has_patient=has_patient,
+            has_policy=has_policy,
+        )
         
         # If there are pending tool calls, always return to triage/tools
         if pending_tool_calls:
-            print(f"Decision: {state.get('next') or 'triage_nurse'} (pending tool calls)")
+            supervisor_events.debug("decision", next=state.get("next") or "triage_nurse", reason="pending tool calls")
             # Preserve task_type if known
             return {"next": state.get("next") or "triage_nurse"}
         
@@ -314,33 +564,33 @@ class HealthcareAgent(BaseAgent):
             # If the last message is from Data Agent (AI) and has no tool calls, we are done.
             last_msg = msgs[-1] if msgs else None
             if isinstance(last_msg, AIMessage) and not getattr(last_msg, "tool_calls", None):
-                print("Decision: end (data agent finished)")
+                supervisor_events.debug("decision", next="end", reason="data agent finished")
                 return {"next": "end", "task_type": "general"}
             
-            print("Decision: data_agent")
+            supervisor_events.debug("decision", next="data_agent")
             return {"next": "data_agent", "task_type": "general"}
 
         # If the last message is an assistant response without tool calls, stop looping
         last_msg = msgs[-1] if msgs else None
         if isinstance(last_msg, AIMessage) and not getattr(last_msg, "tool_calls", None):
-            print("Decision: care_coordinator (triage asked for input)")
+            supervisor_events.debug("decision", next="care_coordinator", reason="triage asked for input")
             return {"next": "care_coordinator", "task_type": "coordination"}
 
         # If we have the basics or have tried too many times, go to coordinator
         if (has_patient and has_policy) or tool_call_count >= 6:
-            print("Decision: care_coordinator")
+            supervisor_events.debug("decision", next="care_coordinator", reason="facts gathered")
             return {"next": "care_coordinator", "task_type": "coordination"}
 
         # If triage didn't trigger any tool calls, avoid looping forever
         if tool_call_count == 0 and len(msgs) >= 2:
-            print("Decision: care_coordinator (no tool calls)")
+            supervisor_events.debug("decision", next="care_coordinator", reason="no tool calls")
             return {"next": "care_coordinator", "task_type": "coordination"}
         
-        print("Decision: triage_nurse")
+        supervisor_events.debug("decision", next="triage_nurse")
         return {"next": "triage_nurse", "task_type": "coordination"}
 
     async def _data_agent_node(self, state: AgentState):
-        print("--- DATA AGENT NODE ---")
+        graph_events.debug("node", node="data_agent", messages=len(state["messages"]))
         sys = SystemMessage(content=(
             "You are an Information Assistant. Your goal is to fetch and provide requested data directly.\n"
             "Do NOT create a care plan. Do NOT ask for follow-up details unless critical identifiers are missing.\n"
@@ -348,10 +598,10 @@ class HealthcareAgent(BaseAgent):
             "If the user asks for a patient summary, allergies, or policy list, just provide it."
         ))
         ai_msg = await self.llm.bind_tools(self.tools).ainvoke([sys] + state["messages"])
-        return {"messages": [ai_msg]}
+        return {"messages": [ai_msg], "tool_index": [ai_msg]}
 
     async def _triage_nurse_node(self, state: AgentState):
-        print("--- TRIAGE NURSE NODE ---")
+        graph_events.debug("node", node="triage_nurse", messages=len(state["messages"]))
         user_text = self._latest_user_text(state["messages"])
         patient_id = self._extract_patient_id(user_text)
         date_range = self._extract_date_range(state["messages"])
@@ -365,15 +615,16 @@ class HealthcareAgent(BaseAgent):
             "- If the request mentions imaging (MRI/CT/scan), call policy_check(request_type='imaging', details='<request>').\n"
             "- If the request mentions medication, call medication_info(drug=...).\n"
             "- If coverage/cost is asked and you have plan/service, call coverage_check(insurance_plan=..., service=...).\n"
-            "- If scheduling is requested and you have clinic/specialty/date_range, call appointment_slots(...).\n"
+            "- If scheduling is requested and you have clinic/specialty/date_range, call appointment_slots(...). "
+            "Use clinic='any' to find the earliest slots across all clinics.\n"
             "If required details are missing, ask a brief clarification question.\n"
             "If a Known date_range is provided, do not ask for date range or default to a different window; reuse the wording given."
         ))
         ai_msg = await self.llm.bind_tools(self.tools).ainvoke([sys] + state["messages"])
-        return {"messages": [ai_msg]}
+        return {"messages": [ai_msg], "tool_index": [ai_msg]}
 
     async def _care_coordinator_node(self, state: AgentState):
-        print("--- CARE COORDINATOR NODE ---")
+        graph_events.debug("node", node="care_coordinator", messages=len(state["messages"]))
         sys = SystemMessage(content=(
             "You are a care coordinator. Review the gathered facts from tool outputs.\n"
             "Write a clear 3-paragraph plan: Summary, Appointment Details, and Coverage/Instructions.\n"
@@ -382,32 +633,231 @@ class HealthcareAgent(BaseAgent):
         response = await self.llm.ainvoke([sys] + state["messages"])
         return {"messages": [response]}
 
-    async def process(self, message: str, history: List[BaseMessage]) -> dict:
-        messages = history + [HumanMessage(content=message)]
-        result = await self.graph.ainvoke({"messages": messages}, config={"recursion_limit": settings.HEALTHCARE_RECURSION_LIMIT})
+    def _get_graph(self, session_id: str | None):
+        """Return the graph to run and its config; sessions get a checkpointed thread when enabled."""
+        config: dict = {"recursion_limit": settings.HEALTHCARE_RECURSION_LIMIT}
+        callbacks = []
+        if settings.METRICS_ENABLED:
+            callbacks.append(self._metrics_handler)
+        if tracer.enabled:
+            callbacks.append(self._tracing_handler)
+        if callbacks:
+            config["callbacks"] = callbacks
+        if not (session_id and settings.HEALTHCARE_CHECKPOINT_ENABLED):
+            return self.graph, config
+        if self._checkpoint_graph is None:
+            self.checkpointer = create_checkpointer()
+            self._checkpoint_graph = self._build_graph(checkpointer=self.checkpointer)
+        config["configurable"] = {"thread_id": session_id}
+        return self._checkpoint_graph, config
+
+    def _compact_thread(self, messages: List[BaseMessage]) -> list[BaseMessage]:
+        """
+        Removals that shrink a stored thread back to the user/assistant transcript of earlier
+        turns (tool traffic dropped, capped and token-budgeted like the session history)
+        before a new turn starts.
+        """
+        transcript = [
+            msg for msg in messages
+            if isinstance(msg, HumanMessage)
+            or is_summary(msg)
+            or (isinstance(msg, AIMessage) and msg.content and not getattr(msg, "tool_calls", None))
+        ]
+        keep = {id(msg) for msg in fit_to_budget(transcript[-settings.SESSION_MAX_HISTORY_MESSAGES:])}
+        return [RemoveMessage(id=msg.id) for msg in messages if id(msg) not in keep and msg.id]
+
+    async def _prepare_run(
+        self,
+        message: str,
+        history: List[BaseMessage],
+        session_id: str | None,
+        task_type: str,
+        prefetched: List[BaseMessage] | None = None,
+    ) -> tuple[Any, dict | None, dict]:
+        """Build (graph, input, config) for a turn. A None input resumes an interrupted run."""
+        graph, config = self._get_graph(session_id)
+        turn_messages = [HumanMessage(content=message)] + (prefetched or [])
+        fresh_input = {
+            "messages": history + turn_messages,
+            "next": "",
+            "task_type": task_type,
+            "tool_index": build_tool_index(history + turn_messages),
+        }
+        if "configurable" not in config:
+            return graph, fresh_input, config
+
+        snapshot = await graph.aget_state(config)
+        stored = snapshot.values.get("messages", []) if snapshot.values else []
+        if not stored:
+            # First checkpointed turn; seed the thread from the session history
+            return graph, fresh_input, config
+        # Pin the run to the current checkpoint so a discarded speculative run can be forked over
+        config["configurable"]["checkpoint_id"] = snapshot.config["configurable"]["checkpoint_id"]
+        if snapshot.next and self._latest_user_text(stored) == message:
+            graph_events.info("resume", thread_id=session_id, next=list(snapshot.next))
+            return graph, None, config
+
+        # Follow-up turn: the thread already holds the conversation, so only the new message is sent
+        turn_input = {
+            "messages": self._compact_thread(stored) + turn_messages,
+            "next": "",
+            "task_type": task_type,
+            # Compaction drops all earlier tool traffic, so only the new turn is indexed
+            "tool_index": build_tool_index(turn_messages),
+        }
+        return graph, turn_input, config
+
+    async def _discard_run(self, config: dict) -> None:
+        """Forget checkpoints written by a cancelled run on a thread that had none before it."""
+        if "configurable" in config and "checkpoint_id" not in config["configurable"]:
+            await self.checkpointer.adelete_thread(config["configurable"]["thread_id"])
+
+    async def process(self, message: str, history: List[BaseMessage], session_id: str | None = None) -> dict:
+        attributes = {"session_id": session_id, "history.messages": len(history)}
+        with tracer.span("healthcare process", attributes=attributes), event_context(session_id):
+            # Cheap lookups run while the classifier decides, as on the streaming path
+            lookups = asyncio.create_task(self._run_prefetch(self._plan_prefetch(message)))
+            try:
+                task_type = await self._determine_task_type(message)
+                fetched = await lookups
+            finally:
+                lookups.cancel()
+            policy_calls = self._plan_policy_prefetch(message, task_type)
+            if policy_calls:
+                fetched += await self._run_prefetch(policy_calls)
+            prefetched = self._prefetch_messages(fetched)
+            graph, graph_input, config = await self._prepare_run(message, history, session_id, task_type, prefetched)
+            result = await graph.ainvoke(graph_input, config=config)
         return {"content": result["messages"][-1].content}
 
-    async def astream_events(self, message: str, history: List[BaseMessage]) -> AsyncGenerator[Any, None]:
-        # Pre-calculate intent to align UI Plan with Graph Execution
-        task_type = self._determine_task_type(message)
-        
-        # Initial Plan
-        yield PlanEvent(steps=self._build_plan_steps(message, task_type=task_type))
+    async def astream_events(
+        self,
+        message: str,
+        history: List[BaseMessage],
+        session_id: str | None = None,
+    ) -> AsyncGenerator[Any, None]:
+        attributes = {
+            "session_id": session_id,
+            "history.messages": len(history),
+            "routing.concurrent": settings.HEALTHCARE_ROUTING_CONCURRENT,
+        }
+        with tracer.span("healthcare astream_events", attributes=attributes), event_context(session_id):
+            async for event in self._astream_events(message, history, session_id):
+                yield event
+
+    async def _astream_events(
+        self,
+        message: str,
+        history: List[BaseMessage],
+        session_id: str | None,
+    ) -> AsyncGenerator[Any, None]:
+        speculative_type = settings.HEALTHCARE_ROUTING_FALLBACK
+        task_type = None
+        speculate = settings.HEALTHCARE_ROUTING_CONCURRENT
+        if speculate:
+            # Only an LLM decision is worth speculating past; a confident local one is instant
+            task_type = await self._local_task_type(message)
+            speculate = task_type is None and _speculation_guard.allow()
+
+        if not speculate:
+            # Cheap lookups run while the classifier decides; they reach the graph as tool results
+            lookups = asyncio.create_task(self._run_prefetch(self._plan_prefetch(message)))
+            try:
+                # Pre-calculate intent to align UI Plan with Graph Execution
+                if task_type is None and settings.HEALTHCARE_ROUTING_CONCURRENT:
+                    # Speculation is paused; keep measuring how often it would have been discarded
+                    task_type = await self._llm_task_type(message)
+                    _speculation_guard.record(task_type != speculative_type)
+                    ROUTING_SPECULATIONS.inc(outcome="suppressed")
+                elif task_type is None:
+                    task_type = await self._determine_task_type(message)
+                yield PlanEvent(steps=self._build_plan_steps(message, task_type=task_type))
+                fetched = await lookups
+            finally:
+                lookups.cancel()
+            policy_calls = self._plan_policy_prefetch(message, task_type)
+            if policy_calls:
+                yield StatusEvent(step_id="triage", status="running", details="Calling tool: policy_check...")
+                fetched += await self._run_prefetch(policy_calls)
+            prefetched = self._prefetch_messages(fetched)
+            graph, graph_input, config = await self._prepare_run(message, history, session_id, task_type, prefetched)
+            async for event in self._stream_graph(graph, graph_input, config, task_type):
+                yield event
+            return
+
+        # Concurrent routing: run the graph speculatively as the fallback task type while
+        # the LLM classifier runs, buffering its events until the decision is known.
+        routing = asyncio.create_task(self._llm_task_type(message))
+        calls = self._plan_prefetch(message) + self._plan_policy_prefetch(message, speculative_type)
+        prefetched = self._prefetch_messages(await self._run_prefetch(calls))
+        graph, graph_input, config = await self._prepare_run(message, history, session_id, speculative_type, prefetched)
+        buffer: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for event in self._stream_graph(graph, graph_input, config, speculative_type):
+                    await buffer.put(event)
+            finally:
+                await buffer.put(done)
 
-        messages = history + [HumanMessage(content=message)]
-        
+        speculative = asyncio.create_task(pump())
+        try:
+            task_type = await routing
+            yield PlanEvent(steps=self._build_plan_steps(message, task_type=task_type))
+            discarded = task_type != speculative_type
+            _speculation_guard.record(discarded)
+            ROUTING_SPECULATIONS.inc(outcome="discarded" if discarded else "kept")
+
+            if discarded:
+                routing_events.info("speculation_discarded", speculative=speculative_type, chosen=task_type)
+                speculative.cancel()
+                await asyncio.gather(speculative, return_exceptions=True)
+                await self._discard_run(config)
+                if graph_input is not None:
+                    graph_input = {**graph_input, "task_type": task_type}
+                async for event in self._stream_graph(graph, graph_input, config, task_type):
+                    yield event
+                return
+
+            while True:
+                event = await buffer.get()
+                if event is done:
+                    break
+                yield event
+            # Surface any exception raised inside the speculative run
+            await speculative
+        finally:
+            routing.cancel()
+            speculative.cancel()
+
+    def session_independent(self, history: List[BaseMessage]) -> bool:
+        # A checkpointed session continues from its own thread state, not just the history
+        return not (settings.HEALTHCARE_CHECKPOINT_ENABLED and history)
+
+    async def aclose(self) -> None:
+        if self.checkpointer is not None:
+            await close_checkpointer(self.checkpointer)
+
+    @staticmethod
+    def _is_node_event(event: dict, node: str) -> bool:
+        return event["name"] == node and event.get("metadata", {}).get("langgraph_node") == node
+
+    async def _stream_graph(self, graph, graph_input: dict | None, config: dict, task_type: str) -> AsyncGenerator[Any, None]:
         # We manually stream node-by-node for better status updates
-        # Inject task_type into state so Supervisor doesn't need to re-calc
-        state = {"messages": messages, "next": "", "task_type": task_type}
+        # task_type is injected into the input state so Supervisor doesn't need to re-calc
         triage_completed_sent = False
+        data_agent_completed_sent = False
         
         # 1. Triage Phase (only if coordination)
         if task_type == "coordination":
             yield StatusEvent(step_id="triage", status="running", details="Starting triage process...")
         else:
              yield StatusEvent(step_id="data_agent", status="running", details="Data Agent executing...")
-        
-        async for event in self.graph.astream_events(state, version="v1", config={"recursion_limit": settings.HEALTHCARE_RECURSION_LIMIT}):
+
+        # v2 cancels the running graph (and its in-flight model calls) when this stream is
+        # closed or cancelled; v1 waits for the run to finish first
+        async for event in graph.astream_events(graph_input, version="v2", config=config):
             kind = event["event"]
             
             # Catch token streams
@@ -415,9 +865,6 @@ class HealthcareAgent(BaseAgent):
                 metadata = event.get("metadata", {})
                 node = metadata.get("langgraph_node")
                 
-                # DEBUG: Print metadata to trace node names in the graph
-                # print(f"DEBUG: Node: {node}, Meta: {metadata}")
-                
                 if self._should_stream_node(node):
                     content = event["data"]["chunk"].content
                     if content:
@@ -430,27 +877,26 @@ class HealthcareAgent(BaseAgent):
                 else:
                      yield StatusEvent(step_id="data_agent", status="running", details=f"Calling tool: {tool_name}...")
             
-            elif kind == "on_node_start":
-                node = event["name"]
-                if node == "care_coordinator":
-                    # Mark triage as done once we reach coordination
-                    yield StatusEvent(step_id="triage", status="completed", details="Triage complete.")
-                    yield StatusEvent(step_id="coordination", status="running", details="Drafting care plan...")
-                    triage_completed_sent = True
+            # v2 reports graph nodes as chains; only the node's own run carries its name,
+            # not the model and tool runs nested inside it
+            elif kind == "on_chain_start" and self._is_node_event(event, "care_coordinator"):
+                # Mark triage as done once we reach coordination
+                yield StatusEvent(step_id="triage", status="completed", details="Triage complete.")
+                yield StatusEvent(step_id="coordination", status="running", details="Drafting care plan...")
+                triage_completed_sent = True
             
-            elif kind == "on_node_end":
-                node = event["name"]
-                if node == "triage_nurse":
-                    # Update status after triage node finishes
-                    yield StatusEvent(step_id="triage", status="running", details="Triage logic complete, checking supervisor...")
-                elif node == "data_agent":
-                     yield StatusEvent(step_id="data_agent", status="completed", details="Data retrieval complete.")
+            elif kind == "on_chain_end" and self._is_node_event(event, "triage_nurse"):
+                # Update status after triage node finishes
+                yield StatusEvent(step_id="triage", status="running", details="Triage logic complete, checking supervisor...")
+            elif kind == "on_chain_end" and self._is_node_event(event, "data_agent"):
+                yield StatusEvent(step_id="data_agent", status="completed", details="Data retrieval complete.")
+                data_agent_completed_sent = True
         
         if task_type == "coordination":
             if not triage_completed_sent:
                 yield StatusEvent(step_id="triage", status="completed", details="Triage complete.")
             yield StatusEvent(step_id="coordination", status="completed", details="Care plan complete.")
-        else:
+        elif not data_agent_completed_sent:
              yield StatusEvent(step_id="data_agent", status="completed", details="Data retrieval complete.")
         
         yield MessageEvent(content="", is_final=True)
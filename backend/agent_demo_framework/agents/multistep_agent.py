@@ -1,5 +1,5 @@
 import asyncio
-from typing import Dict, Any, List, AsyncGenerator
+from typing import Dict, Any, List, AsyncGenerator, Optional
 from langchain_core.messages import BaseMessage
 from agent_demo_framework.agents.base_agent import BaseAgent
 from agent_demo_framework.schemas.stream import PlanEvent, StatusEvent, MessageEvent, StepInfo
@@ -16,7 +16,7 @@ class MultiStepAgent(BaseAgent):
             StepInfo(id="step4", description="Final validation")
         ]
     
-    async def process(self, message: str, history: List[BaseMessage]) -> Dict[str, Any]:
+    async def process(self, message: str, history: List[BaseMessage], session_id: Optional[str] = None) -> Dict[str, Any]:
         """Legacy synchronous process method (fallback)."""
         # In a real implementation, this would accumulate the stream result
         return {
@@ -24,7 +24,7 @@ class MultiStepAgent(BaseAgent):
             "metadata": {"agent": self.name}
         }
     
-    async def astream_events(self, message: str, history: List[BaseMessage]) -> AsyncGenerator[Any, None]:
+    async def astream_events(self, message: str, history: List[BaseMessage], session_id: Optional[str] = None) -> AsyncGenerator[Any, None]:
         """Stream events for the multi-step process."""
         
         # 1. Emit Plan
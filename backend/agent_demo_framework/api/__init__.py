@@ -1,8 +1,10 @@
 """API router initialization."""
 from fastapi import APIRouter
-from agent_demo_framework.api import chat
+from agent_demo_framework.api import chat, debug, ws
 
 router = APIRouter()
 
 # Include sub-routers
 router.include_router(chat.router, prefix="/chat", tags=["chat"])
+router.include_router(ws.router, prefix="/chat", tags=["chat"])
+router.include_router(debug.router, prefix="/debug", tags=["debug"])
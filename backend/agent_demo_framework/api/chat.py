@@ -1,27 +1,26 @@
 """Chat API endpoints."""
 import uuid
-from fastapi import APIRouter, HTTPException
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from fastapi import APIRouter, HTTPException, Request
+from langchain_core.messages import BaseMessage
 from agent_demo_framework.schemas import ChatRequest, ChatResponse
 from agent_demo_framework.agents import AgentFactory
-from fastapi.responses import StreamingResponse
-import json
+from agent_demo_framework.core.admission import AdmissionRejected, admission
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.single_flight import flight_key, single_flight
+from agent_demo_framework.db.session_store import session_store
+from agent_demo_framework.core.metrics import ACTIVE_STREAMS
+from agent_demo_framework.core.tracing import SPAN_KIND_SERVER, tracer
+from agent_demo_framework.api.turns import get_history, save_turn
+from agent_demo_framework.api.sse import SSEResponse, cancel_on_disconnect, error_frame, message_frame, sse_frames
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-SESSION_HISTORY: dict[str, list[BaseMessage]] = {}
-MAX_HISTORY_MESSAGES = 20
 
-
-def _get_history(session_id: str) -> list[BaseMessage]:
-    return SESSION_HISTORY.get(session_id, []).copy()
-
-
-def _save_history(session_id: str, history: list[BaseMessage]) -> None:
-    SESSION_HISTORY[session_id] = history[-MAX_HISTORY_MESSAGES:]
+def _rejected(error: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=error.status_code, detail=str(error), headers={"Retry-After": str(error.retry_after)})
 
 
 @router.post("/chat", response_model=ChatResponse)
@@ -41,15 +40,24 @@ async def chat(request: ChatRequest):
         # Get the appropriate agent
         agent = AgentFactory.get_agent(request.agent_type or "default")
         
-        # For now, we're not persisting history - this would be added later
-        # In a production system, you'd fetch conversation history from the database
-        history = _get_history(session_id)
+        history = await get_history(session_id, is_new=not request.session_id)
         
         # Process the message
-        result = await agent.process(request.message, history)
-
-        updated_history = history + [HumanMessage(content=request.message), AIMessage(content=result["content"])]
-        _save_history(session_id, updated_history)
+        attributes = {"session_id": session_id, "agent_type": request.agent_type, "history.messages": len(history)}
+        agent_key = AgentFactory.resolve(request.agent_type or "default")
+        with tracer.span("POST /chat", kind=SPAN_KIND_SERVER, attributes=attributes):
+            if settings.SINGLE_FLIGHT_ENABLED and agent.session_independent(history):
+                # Identical concurrent turns share one run, made without a session id
+                result = await single_flight.call(
+                    flight_key("call", agent_key, request.message, history),
+                    lambda: agent.process(request.message, history),
+                    lambda: admission.acquire(agent_key),
+                )
+            else:
+                async with admission.admit(agent_key):
+                    result = await agent.process(request.message, history, session_id=session_id)
+
+        save_turn(session_id, request.message, result["content"], request.agent_type or "default")
         
         return ChatResponse(
             message=result["content"],
@@ -58,54 +66,117 @@ async def chat(request: ChatRequest):
             metadata=result.get("metadata", {})
         )
     
+    except AdmissionRejected as e:
+        raise _rejected(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/stream")
-async def stream_chat(request: ChatRequest):
-    """Process a chat message with streaming updates."""
+async def stream_chat(request: ChatRequest, http_request: Request):
+    """Process a chat message with streaming updates; the run is cancelled if the client disconnects."""
+    # Generate session ID if not provided
+    session_id = request.session_id or str(uuid.uuid4())
+    agent_key = AgentFactory.resolve(request.agent_type or "default")
+    # The agent and history are needed up front for the single-flight key; a failure here is
+    # reported in the stream, like one during the run
+    setup_error = None
+    agent = None
+    streaming = False
+    history: list[BaseMessage] = []
+    try:
+        agent = AgentFactory.get_agent(request.agent_type or "default")
+        streaming = hasattr(agent, "astream_events")
+        history = await get_history(session_id, is_new=not request.session_id) if streaming else []
+    except Exception as e:
+        setup_error = e
     
+    # Wait for an agent slot before the response starts, so a rejection is a plain 429/503.
+    # With single-flight on, a turn identical to a running one joins it and needs no slot.
+    slot = None
+    shared = None
+    try:
+        if setup_error is None and streaming and settings.SINGLE_FLIGHT_ENABLED and agent.session_independent(history):
+            shared = await single_flight.stream(
+                flight_key("stream", agent_key, request.message, history),
+                lambda: agent.astream_events(request.message, history),
+                lambda: admission.acquire(agent_key),
+            )
+        elif setup_error is None:
+            slot = await admission.acquire(agent_key)
+    except AdmissionRejected as e:
+        raise _rejected(e)
+    
+    def release() -> None:
+        if slot is not None:
+            slot.release()
+        if shared is not None:
+            shared.close()
+
     async def event_generator():
+        ACTIVE_STREAMS.inc()
         try:
-            # Generate session ID if not provided
-            session_id = request.session_id or str(uuid.uuid4())
-            agent = AgentFactory.get_agent(request.agent_type or "default")
-            
+            if setup_error is not None:
+                raise setup_error
+
             # Check if agent supports streaming
-            if not hasattr(agent, "astream_events"):
+            if not streaming:
                  # Fallback for non-streaming agents
-                 history = []
                  result = await agent.process(request.message, history)
-                 yield f"event: message\ndata: {json.dumps({'type': 'message', 'content': result['content'], 'is_final': True})}\n\n"
+                 yield message_frame(result["content"], is_final=True)
                  return
 
             # Use streaming interface
-            # TODO: Fetch real history from DB
-            history = _get_history(session_id)
-            assistant_content = ""
-            
-            async for event in agent.astream_events(request.message, history):
-                # Serialize event to JSON
-                # Provide explicit mapping or rely on pydantic .model_dump_json()
-                event_type = event.type
-                if event_type == "message":
-                    assistant_content += event.content
-                payload = event.model_dump_json()
-                yield f"event: {event_type}\ndata: {payload}\n\n"
+            assistant_parts: list[str] = []
+
+            async def agent_events():
+                events = shared if shared is not None else agent.astream_events(request.message, history, session_id=session_id)
+                async for event in events:
+                    if event.type == "message":
+                        assistant_parts.append(event.content)
+                    yield event
+
+            # Message deltas are merged into fewer frames; see api/sse.py
+            async for frame in sse_frames(agent_events()):
+                yield frame
 
+            assistant_content = "".join(assistant_parts)
             if assistant_content:
-                updated_history = history + [
-                    HumanMessage(content=request.message),
-                    AIMessage(content=assistant_content),
-                ]
-                _save_history(session_id, updated_history)
+                save_turn(session_id, request.message, assistant_content, request.agent_type or "default")
                 
         except Exception as e:
             logger.error(f"Streaming error: {e}")
-            yield f"event: error\ndata: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
-            
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+            yield error_frame(str(e))
+        finally:
+            release()
+            ACTIVE_STREAMS.dec()
+
+    async def traced_event_generator():
+        attributes = {"session_id": request.session_id, "agent_type": request.agent_type}
+        with tracer.span("POST /chat/stream", kind=SPAN_KIND_SERVER, attributes=attributes) as span:
+            events = 0
+            async for chunk in event_generator():
+                events += 1
+                yield chunk
+            span.set_attribute("sse.events", events)
+
+    events = traced_event_generator() if tracer.enabled else event_generator()
+    frames = cancel_on_disconnect(
+        events, http_request.is_disconnected, request.agent_type or "default", shared=shared is not None
+    )
+    # The slot (or flight subscription) is also released when the response ends without the
+    # body ever being iterated
+    return SSEResponse(frames, on_close=release)
+
+
+@router.get("/sessions/stats")
+async def session_stats():
+    """Session cache counters (hits, evictions, resident bytes) and agent slot usage for capacity sizing."""
+    return {
+        "cache": session_store.cache.snapshot(),
+        "pending_writes": session_store.pending_writes,
+        "admission": admission.snapshot(),
+    }
 
 
 @router.get("/agents")
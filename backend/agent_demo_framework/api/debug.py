@@ -0,0 +1,46 @@
+"""Debug endpoints for the in-memory event log (enabled with DEBUG_ENDPOINTS_ENABLED)."""
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.events import event_log
+
+router = APIRouter()
+
+
+def _require_enabled() -> None:
+    if not settings.DEBUG_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/events")
+async def recent_events(
+    session_id: Optional[str] = None,
+    component: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=5000),
+):
+    """Recent structured events, optionally for one session and/or component prefix."""
+    _require_enabled()
+    return {"events": event_log.events(session_id=session_id, component=component, limit=limit)}
+
+
+@router.post("/sessions/{session_id}/capture")
+async def start_capture(session_id: str, seconds: float = Query(600.0, gt=0, le=86400)):
+    """Record every event (DEBUG included) for a session for the next `seconds`."""
+    _require_enabled()
+    event_log.capture(session_id, seconds)
+    return {"session_id": session_id, "capturing_for_s": seconds}
+
+
+@router.delete("/sessions/{session_id}/capture")
+async def stop_capture(session_id: str, discard: bool = False):
+    """Stop capturing a session; captured events remain available unless `discard` is set."""
+    _require_enabled()
+    event_log.stop_capture(session_id, discard=discard)
+    return {"session_id": session_id, "capturing": False}
+
+
+@router.get("/captures")
+async def active_captures():
+    """Sessions currently being captured and the seconds left for each."""
+    _require_enabled()
+    return {"captures": event_log.captures()}
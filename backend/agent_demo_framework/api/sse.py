@@ -0,0 +1,246 @@
+"""Server-sent event framing for agent stream events, with message-delta coalescing and disconnect cancellation."""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.events import get_event_logger
+from agent_demo_framework.core.metrics import (
+    CANCELLED_TOKENS_AVOIDED,
+    STREAMS_CANCELLED,
+    TokenMeter,
+    current_token_meter,
+)
+
+stream_events = get_event_logger("api.stream")
+
+# Compact, non-ASCII-escaping JSON: the same bytes pydantic's model_dump_json produces
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+_MESSAGE = 'event: message\ndata: {"type":"message","content":%s,"is_final":%s}\n\n'
+_STATUS = {
+    status: 'event: status\ndata: {"type":"status","step_id":%s,"status":"' + status + '","details":%s}\n\n'
+    for status in ("pending", "running", "completed", "failed")
+}
+_PLAN = 'event: plan\ndata: {"type":"plan","steps":%s}\n\n'
+_ERROR = 'event: error\ndata: {"type":"error","error":%s}\n\n'
+
+
+def message_frame(content: str, is_final: bool = False) -> str:
+    return _MESSAGE % (_dumps(content), "true" if is_final else "false")
+
+
+def error_frame(error: str) -> str:
+    return _ERROR % _dumps(error)
+
+
+def encode_event(event: Any) -> str:
+    """One SSE frame for a stream event, filled into a precomputed template where possible."""
+    event_type = getattr(event, "type", None)
+    if event_type == "message":
+        return message_frame(event.content, event.is_final)
+    if event_type == "status" and event.status in _STATUS:
+        return _STATUS[event.status] % (_dumps(event.step_id), _dumps(event.details))
+    if event_type == "plan":
+        steps = [{"id": s.id, "description": s.description, "status": s.status} for s in event.steps]
+        return _PLAN % _dumps(steps)
+    if event_type == "error":
+        return error_frame(event.error)
+    return f"event: {event_type}\ndata: {event.model_dump_json()}\n\n"
+
+
+async def sse_frames(
+    events: AsyncIterator[Any],
+    window_ms: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """
+    Encode stream events as SSE frames, merging consecutive message deltas.
+
+    The first message delta is sent on its own so time-to-first-token is unchanged. Later
+    deltas are buffered and sent as one message frame once SSE_COALESCE_WINDOW_MS has passed
+    since the first buffered delta, once SSE_COALESCE_MAX_BYTES of content is buffered, on a
+    final delta, or before any other event (so ordering is preserved). A window <= 0 sends
+    every delta as its own frame.
+    """
+    window = (settings.SSE_COALESCE_WINDOW_MS if window_ms is None else window_ms) / 1000
+    limit = settings.SSE_COALESCE_MAX_BYTES if max_bytes is None else max_bytes
+    loop = asyncio.get_running_loop()
+    iterator = events.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    buffer: List[str] = []
+    size = 0
+    deadline = 0.0
+    sent_message = False
+
+    def flush(is_final: bool = False) -> str:
+        nonlocal size
+        frame = message_frame("".join(buffer), is_final)
+        buffer.clear()
+        size = 0
+        return frame
+
+    try:
+        while True:
+            if not buffer and pending is None:
+                try:
+                    event = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+            else:
+                # Wait for the next event, but no longer than the buffered deltas may wait
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                if buffer:
+                    done, _ = await asyncio.wait((pending,), timeout=max(deadline - loop.time(), 0))
+                    if not done:
+                        yield flush()
+                        continue
+                future, pending = pending, None
+                try:
+                    event = await future
+                except StopAsyncIteration:
+                    break
+
+            if getattr(event, "type", None) != "message":
+                if buffer:
+                    yield flush()
+                yield encode_event(event)
+                continue
+            if not sent_message or window <= 0:
+                sent_message = True
+                yield message_frame(event.content, event.is_final)
+                continue
+            if not buffer:
+                deadline = loop.time() + window
+            buffer.append(event.content)
+            size += len(event.content.encode("utf-8"))
+            if event.is_final or size >= limit:
+                yield flush(event.is_final)
+
+        if buffer:
+            yield flush()
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class _RunTokens:
+    """Moving average of model tokens per completed streaming run, per agent type."""
+
+    # Weight of the newest run in the average
+    ALPHA = 0.1
+
+    def __init__(self):
+        self._average: Dict[str, float] = {}
+
+    def observe(self, agent_type: str, tokens: int) -> None:
+        if tokens <= 0:
+            return
+        average = self._average.get(agent_type)
+        self._average[agent_type] = tokens if average is None else average + self.ALPHA * (tokens - average)
+
+    def remaining(self, agent_type: str, spent: int) -> int:
+        """Tokens a run that has spent `spent` would still have used; 0 until a run has completed."""
+        return max(int(self._average.get(agent_type, 0.0)) - spent, 0)
+
+
+_run_tokens = _RunTokens()
+_END = object()
+
+
+async def cancel_on_disconnect(
+    frames: AsyncIterator[str],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    agent_type: str,
+    poll_ms: Optional[float] = None,
+    shared: bool = False,
+) -> AsyncIterator[str]:
+    """
+    Yield `frames`, cancelling the run that produces them once the client has gone.
+
+    The frames are produced in their own task, and `is_disconnected` is checked every
+    SSE_DISCONNECT_POLL_MS, so a disconnect is noticed during long silent stretches (tool
+    calls, policy checks) and not only when the next write fails. When the client
+    has disconnected, or the server cancels or closes this generator first, the producer
+    task is cancelled. The CancelledError runs through the agent stream into LangGraph's
+    node tasks and aborts in-flight model HTTP requests. Model tokens used during the run
+    are metered, and a cancelled run records an estimate of the tokens it did not spend.
+    A `shared` run (single-flight) keeps going for its other clients, so it records none.
+    A poll interval <= 0 leaves disconnect detection to the server.
+    """
+    poll = (settings.SSE_DISCONNECT_POLL_MS if poll_ms is None else poll_ms) / 1000
+    loop = asyncio.get_running_loop()
+    meter = TokenMeter()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    async def produce() -> None:
+        current_token_meter.set(meter)
+        async for frame in frames:
+            await queue.put(frame)
+        await queue.put(_END)
+
+    producer = asyncio.create_task(produce())
+    getter: Optional[asyncio.Future] = None
+    next_check = loop.time() + poll
+    reason = "aborted"
+    try:
+        while True:
+            if poll > 0 and loop.time() >= next_check:
+                if await is_disconnected():
+                    reason = "disconnect"
+                    break
+                next_check = loop.time() + poll
+            if getter is None:
+                getter = asyncio.ensure_future(queue.get())
+            waiting = (getter,) if producer.done() else (getter, producer)
+            timeout = max(next_check - loop.time(), 0) if poll > 0 else None
+            await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                frame, getter = getter.result(), None
+                if frame is _END:
+                    break
+                yield frame
+            elif producer.done() and queue.empty():
+                # The stream failed before its end marker; surface the error
+                producer.result()
+                break
+    finally:
+        if getter is not None:
+            getter.cancel()
+        if producer.done():
+            _run_tokens.observe(agent_type, meter.tokens)
+        else:
+            producer.cancel()
+            avoided = 0 if shared else _run_tokens.remaining(agent_type, meter.tokens)
+            STREAMS_CANCELLED.inc(agent_type=agent_type, reason=reason)
+            CANCELLED_TOKENS_AVOIDED.inc(avoided, agent_type=agent_type)
+            stream_events.info(
+                "stream_cancelled", agent_type=agent_type, reason=reason,
+                tokens_spent=meter.tokens, tokens_avoided=avoided,
+            )
+            # Last: under a server-side cancel scope this await is itself cancelled at once
+            await asyncio.gather(producer, return_exceptions=True)
+
+
+class SSEResponse(StreamingResponse):
+    """
+    Event-stream response that calls `on_close` once the response is over. Cleanup in the
+    body generator's `finally` only runs if the server started iterating it, which it does
+    not when the client has gone before the body is sent; `on_close` runs either way.
+    """
+
+    def __init__(self, frames: AsyncIterator[str], on_close: Callable[[], None]):
+        super().__init__(frames, media_type="text/event-stream")
+        self._on_close = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._on_close()
@@ -0,0 +1,26 @@
+"""Loading and saving chat turns, shared by the HTTP and WebSocket chat endpoints."""
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from agent_demo_framework.agents import AgentFactory
+from agent_demo_framework.db.session_store import session_store
+from agent_demo_framework.core.history import fit_to_budget, history_summarizer
+
+
+async def get_history(session_id: str, is_new: bool) -> list[BaseMessage]:
+    """Prompt history for a turn of the session."""
+    # A freshly generated session id cannot have stored turns; skip the lookup
+    if is_new:
+        return []
+    # Stay within the prompt token budget even if a background summary is still pending
+    return fit_to_budget(await session_store.get_history(session_id))
+
+
+def save_turn(session_id: str, user_message: str, assistant_message: str, agent_type: str) -> None:
+    """Append a finished turn to the session history."""
+    session_store.append(
+        session_id,
+        [HumanMessage(content=user_message), AIMessage(content=assistant_message)],
+        metadata={"agent_type": agent_type},
+    )
+    # Fold older turns into a rolling summary off the request path
+    instructions = AgentFactory.get_agent(agent_type).summary_instructions
+    history_summarizer.schedule(session_store, session_id, instructions)
@@ -0,0 +1,263 @@
+"""WebSocket chat endpoint: many turns and sessions over one connection, with compact frames.
+
+Client -> server (one JSON text message, or one msgpack binary message, per request):
+    {"t": "turn", "id": "<request id>", "message": "...", "session_id": "...", "agent_type": "..."}
+    {"t": "cancel", "id": "<request id>"}
+    {"t": "ping"}
+
+Server -> client frames carry the request id they belong to and a one-letter type:
+    a  accepted      {"t": "a", "id", "sid": session id}
+    p  plan          {"t": "p", "id", "steps": [[step id, description, status], ...]}
+    s  status        {"t": "s", "id", "step", "st": status, "d": details (optional)}
+    m  message delta {"t": "m", "id", "c": content, "f": 1 on the final delta (optional)}
+    e  error         {"t": "e", "id", "err": message, "ra": retry after seconds (when rejected for capacity)}
+    d  done          {"t": "d", "id"}, exactly once per turn; a cancel for an id with no
+                     running turn gets an error frame instead
+    o  pong          {"t": "o"}
+
+With ?format=ndjson (default) a WebSocket text message holds one or more newline-terminated
+JSON frames; with ?format=msgpack a binary message holds a msgpack array of one or more
+frames.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Dict, List, Set, Tuple
+import ormsgpack
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from agent_demo_framework.agents import AgentFactory
+from agent_demo_framework.api.turns import get_history, save_turn
+from agent_demo_framework.core.admission import AdmissionRejected, admission
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.metrics import ACTIVE_WEBSOCKETS
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Queued frames written to the socket in one WebSocket message at most
+MAX_FRAMES_PER_SEND = 64
+# Replies to client requests (pongs, errors, cancel acknowledgements) that may wait for room
+# in a full send queue; past this the client is sending without reading and is disconnected
+MAX_WAITING_REPLIES = 64
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def compact_frame(event: Any, request_id: str) -> Dict[str, Any]:
+    """Short-keyed frame for a stream event."""
+    event_type = getattr(event, "type", None)
+    if event_type == "message":
+        frame = {"t": "m", "id": request_id, "c": event.content}
+        if event.is_final:
+            frame["f"] = 1
+        return frame
+    if event_type == "status":
+        frame = {"t": "s", "id": request_id, "step": event.step_id, "st": event.status}
+        if event.details is not None:
+            frame["d"] = event.details
+        return frame
+    if event_type == "plan":
+        return {"t": "p", "id": request_id, "steps": [[s.id, s.description, s.status] for s in event.steps]}
+    if event_type == "error":
+        return {"t": "e", "id": request_id, "err": event.error}
+    return {"t": event_type, "id": request_id, **event.model_dump(exclude={"type"})}
+
+
+class _Codec:
+    def __init__(self, fmt: str):
+        self.binary = fmt == "msgpack"
+
+    def encode(self, frames: List[Dict[str, Any]]) -> Any:
+        if self.binary:
+            return ormsgpack.packb(frames)
+        return "".join(_dumps(frame) + "\n" for frame in frames)
+
+    def decode(self, message: Dict[str, Any]) -> Any:
+        if message.get("bytes") is not None:
+            if not self.binary:
+                raise ValueError("binary frames need format=msgpack")
+            return ormsgpack.unpackb(message["bytes"])
+        return json.loads(message.get("text") or "")
+
+
+class _Connection:
+    """
+    One socket's turns. Turn tasks put frames on a bounded queue and a single writer drains
+    it, batching whatever is queued into one WebSocket message. When the client reads
+    slowly the writer blocks on the socket, the queue fills, and turn tasks wait on `put`,
+    which pauses their agent streams instead of buffering without limit.
+
+    The receive loop never waits on the queue, so a cancel is acted on even while the client
+    is slow: its replies go through `reply`, which parks a frame that does not fit in a task
+    of its own, up to MAX_WAITING_REPLIES.
+    """
+
+    def __init__(self, websocket: WebSocket, codec: _Codec):
+        self.websocket = websocket
+        self.codec = codec
+        self.queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.turns: Dict[str, asyncio.Task] = {}
+        # session id -> (lock, turns holding or waiting for it)
+        self.session_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+        self.replies: Set[asyncio.Task] = set()
+
+    async def send(self, frame: Dict[str, Any]) -> None:
+        await self.queue.put(frame)
+
+    def reply(self, frame: Dict[str, Any]) -> bool:
+        """Queue a frame without blocking; False if too many replies are already waiting."""
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if len(self.replies) >= MAX_WAITING_REPLIES:
+            return False
+        # Waiting putters are served in order, so parked replies keep their order
+        task = asyncio.create_task(self.queue.put(frame))
+        self.replies.add(task)
+        task.add_done_callback(self.replies.discard)
+        return True
+
+    async def writer(self) -> None:
+        while True:
+            frames = [await self.queue.get()]
+            while len(frames) < MAX_FRAMES_PER_SEND and not self.queue.empty():
+                frames.append(self.queue.get_nowait())
+            data = self.codec.encode(frames)
+            if self.codec.binary:
+                await self.websocket.send_bytes(data)
+            else:
+                await self.websocket.send_text(data)
+
+    def start_turn(self, request: Dict[str, Any]) -> bool:
+        """Start a turn task; False if its error reply could not be queued (see `reply`)."""
+        request_id = str(request.get("id") or uuid.uuid4())
+        if request_id in self.turns:
+            return self.reply({"t": "e", "id": request_id, "err": "duplicate request id"})
+        if len(self.turns) >= settings.WS_MAX_CONCURRENT_TURNS:
+            return self.reply({"t": "e", "id": request_id, "err": "too many concurrent turns"})
+        task = asyncio.create_task(self.run_turn(request_id, request))
+        self.turns[request_id] = task
+        task.add_done_callback(lambda _: self.turns.pop(request_id, None))
+        return True
+
+    async def run_turn(self, request_id: str, request: Dict[str, Any]) -> None:
+        message = request.get("message")
+        if not isinstance(message, str) or not message:
+            await self.send({"t": "e", "id": request_id, "err": "message is required"})
+            await self.send({"t": "d", "id": request_id})
+            return
+        session_id = request.get("session_id") or str(uuid.uuid4())
+        # Turns of one session run in order; different sessions run concurrently
+        lock, waiting = self.session_locks.get(session_id) or (asyncio.Lock(), 0)
+        self.session_locks[session_id] = (lock, waiting + 1)
+        try:
+            async with lock:
+                await self._stream_turn(request_id, session_id, request, message)
+        finally:
+            lock, waiting = self.session_locks[session_id]
+            if waiting == 1:
+                del self.session_locks[session_id]
+            else:
+                self.session_locks[session_id] = (lock, waiting - 1)
+
+    async def _stream_turn(self, request_id: str, session_id: str, request: Dict[str, Any], message: str) -> None:
+        agent_type = request.get("agent_type") or "default"
+        try:
+            slot = await admission.acquire(AgentFactory.resolve(agent_type))
+        except AdmissionRejected as e:
+            await self.send({"t": "e", "id": request_id, "err": str(e), "ra": e.retry_after})
+            await self.send({"t": "d", "id": request_id})
+            return
+        await self.send({"t": "a", "id": request_id, "sid": session_id})
+        try:
+            agent = AgentFactory.get_agent(agent_type)
+            if not hasattr(agent, "astream_events"):
+                result = await agent.process(message, [])
+                await self.send({"t": "m", "id": request_id, "c": result["content"], "f": 1})
+            else:
+                history = await get_history(session_id, is_new=not request.get("session_id"))
+                parts: List[str] = []
+                async for event in agent.astream_events(message, history, session_id=session_id):
+                    if event.type == "message":
+                        parts.append(event.content)
+                    await self.send(compact_frame(event, request_id))
+                content = "".join(parts)
+                if content:
+                    save_turn(session_id, message, content, agent_type)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"WebSocket turn error: {e}")
+            await self.send({"t": "e", "id": request_id, "err": str(e)})
+        finally:
+            slot.release()
+        await self.send({"t": "d", "id": request_id})
+
+    def cancel(self, request_id: str) -> bool:
+        """
+        Cancel one running turn; False if there is none with this id. A cancelled turn sends
+        nothing more, so its done frame can be queued at once.
+        """
+        task = self.turns.get(request_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def close(self) -> None:
+        """Cancel every turn and parked reply, and wait for them to finish."""
+        tasks = list(self.turns.values()) + list(self.replies)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, format: str = "ndjson"):
+    """Multiplexed chat over one WebSocket; see the module docstring for the protocol."""
+    if format not in ("ndjson", "msgpack"):
+        await websocket.close(code=1003, reason="format must be ndjson or msgpack")
+        return
+    codec = _Codec(format)
+
+    await websocket.accept()
+    connection = _Connection(websocket, codec)
+    writer = asyncio.create_task(connection.writer())
+    ACTIVE_WEBSOCKETS.inc()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                request = codec.decode(message)
+                kind = request.get("t")
+            except Exception as e:
+                queued = connection.reply({"t": "e", "id": None, "err": f"invalid frame: {e}"})
+            else:
+                if kind == "turn":
+                    queued = connection.start_turn(request)
+                elif kind == "cancel":
+                    if connection.cancel(str(request.get("id"))):
+                        queued = connection.reply({"t": "d", "id": request.get("id")})
+                    else:
+                        # Unknown, or already finished and sent its own done frame
+                        queued = connection.reply({"t": "e", "id": request.get("id"), "err": "no running turn with this id"})
+                elif kind == "ping":
+                    queued = connection.reply({"t": "o"})
+                else:
+                    queued = connection.reply({"t": "e", "id": request.get("id"), "err": f"unknown request type {kind!r}"})
+            if not queued:
+                await websocket.close(code=1008, reason="client is not reading its frames")
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        ACTIVE_WEBSOCKETS.dec()
+        await connection.close()
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
@@ -0,0 +1,296 @@
+"""Load generator for the chat API: concurrent multi-turn sessions against /chat/stream and /chat.
+
+Reports time-to-first-event, time-to-first-token, inter-token gap, total latency and throughput
+as JSON so runs can be diffed. Pair it with `openai-stub` for reproducible runs without network.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+DEFAULT_SCRIPTS: dict[str, list[str]] = {
+    "healthcare": [
+        "I am patient PT-1001. I have been having bad back pain and need an MRI.",
+        "Can you schedule the MRI for the next 7 days?",
+        "Is the MRI covered on my plan?",
+    ],
+    "conversational": [
+        "Hello! What can you help me with?",
+        "Can you explain that in more detail?",
+        "Thanks, please summarize what we discussed.",
+    ],
+    "multistep": [
+        "Plan a three-step approach to organizing a team offsite.",
+        "Expand on the second step.",
+    ],
+}
+
+
+@dataclass
+class RequestResult:
+    kind: str  # "stream" or "chat"
+    agent: str
+    turn: int
+    ok: bool
+    total_ms: float
+    ttfe_ms: float | None = None
+    ttft_ms: float | None = None
+    inter_token_ms: list[float] = field(default_factory=list)
+    events: int = 0
+    error: str | None = None
+
+
+@dataclass
+class LoadTestConfig:
+    base_url: str
+    sessions: int
+    concurrency: int
+    turns: int
+    agents: dict[str, float]
+    chat_ratio: float
+    think_time_ms: float
+    timeout: float
+    scripts: dict[str, list[str]]
+    seed: int | None
+
+
+def percentiles(values: list[float]) -> dict | None:
+    """count/mean/max plus p50/p95/p99 (linear interpolation), in the input's unit."""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pct(q: float) -> float:
+        pos = (len(ordered) - 1) * q
+        low = int(pos)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "p50": round(pct(0.50), 2),
+        "p95": round(pct(0.95), 2),
+        "p99": round(pct(0.99), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def parse_agents(spec: str) -> dict[str, float]:
+    """`healthcare:3,conversational:1` -> relative weights."""
+    weights: dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition(":")
+        if name:
+            weights[name] = float(weight or 1)
+    return weights
+
+
+async def _stream_turn(client: httpx.AsyncClient, url: str, payload: dict, agent: str, turn: int) -> RequestResult:
+    start = time.perf_counter()
+    ttfe = ttft = last_token = None
+    gaps: list[float] = []
+    events = 0
+    error = None
+    try:
+        async with client.stream("POST", f"{url}/stream", json=payload) as response:
+            if response.status_code != 200:
+                await response.aread()
+                error = f"HTTP {response.status_code}"
+            else:
+                event_type = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event_type = line[6:].strip()
+                        continue
+                    if not line.startswith("data:"):
+                        continue
+                    now = time.perf_counter()
+                    events += 1
+                    if ttfe is None:
+                        ttfe = now
+                    data = json.loads(line[5:])
+                    event_type = data.get("type", event_type)
+                    if event_type == "error":
+                        error = str(data.get("error"))[:200]
+                    elif event_type == "message" and data.get("content"):
+                        if ttft is None:
+                            ttft = now
+                        else:
+                            gaps.append((now - last_token) * 1000)
+                        last_token = now
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"[:200]
+    end = time.perf_counter()
+    return RequestResult(
+        kind="stream",
+        agent=agent,
+        turn=turn,
+        ok=error is None,
+        total_ms=(end - start) * 1000,
+        ttfe_ms=(ttfe - start) * 1000 if ttfe is not None else None,
+        ttft_ms=(ttft - start) * 1000 if ttft is not None else None,
+        inter_token_ms=gaps,
+        events=events,
+        error=error,
+    )
+
+
+async def _chat_turn(client: httpx.AsyncClient, url: str, payload: dict, agent: str, turn: int) -> RequestResult:
+    start = time.perf_counter()
+    error = None
+    try:
+        response = await client.post(f"{url}/chat", json=payload)
+        if response.status_code != 200:
+            error = f"HTTP {response.status_code}"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"[:200]
+    return RequestResult(
+        kind="chat", agent=agent, turn=turn, ok=error is None, total_ms=(time.perf_counter() - start) * 1000, error=error
+    )
+
+
+async def _run_session(client: httpx.AsyncClient, config: LoadTestConfig, rng: random.Random) -> list[RequestResult]:
+    agent = rng.choices(list(config.agents), weights=list(config.agents.values()))[0]
+    script = config.scripts.get(agent) or DEFAULT_SCRIPTS["conversational"]
+    # The stream endpoint does not return a session id, so the client picks one and reuses it
+    session_id = str(uuid.uuid4())
+    results = []
+    for turn in range(config.turns):
+        payload = {"message": script[turn % len(script)], "session_id": session_id, "agent_type": agent}
+        if rng.random() < config.chat_ratio:
+            results.append(await _chat_turn(client, config.base_url, payload, agent, turn))
+        else:
+            results.append(await _stream_turn(client, config.base_url, payload, agent, turn))
+        if config.think_time_ms and turn < config.turns - 1:
+            await asyncio.sleep(config.think_time_ms / 1000)
+    return results
+
+
+async def run_load_test(config: LoadTestConfig) -> dict:
+    """Run `sessions` sessions with at most `concurrency` in flight and return the report."""
+    rng = random.Random(config.seed)
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(config.sessions):
+        queue.put_nowait(i)
+    results: list[RequestResult] = []
+
+    limits = httpx.Limits(max_connections=config.concurrency, max_keepalive_connections=config.concurrency)
+    async with httpx.AsyncClient(timeout=config.timeout, limits=limits) as client:
+
+        async def worker() -> None:
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results.extend(await _run_session(client, config, rng))
+
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(config.concurrency, config.sessions))))
+        duration = time.perf_counter() - start
+
+    return build_report(config, results, duration, started_at)
+
+
+def _latency_summary(results: list[RequestResult]) -> dict:
+    summary = {"total_ms": percentiles([r.total_ms for r in results if r.ok])}
+    if any(r.kind == "stream" for r in results):
+        summary["ttfe_ms"] = percentiles([r.ttfe_ms for r in results if r.ok and r.ttfe_ms is not None])
+        summary["ttft_ms"] = percentiles([r.ttft_ms for r in results if r.ok and r.ttft_ms is not None])
+        summary["inter_token_ms"] = percentiles([gap for r in results if r.ok for gap in r.inter_token_ms])
+    return summary
+
+
+def build_report(config: LoadTestConfig, results: list[RequestResult], duration: float, started_at: datetime) -> dict:
+    ok = [r for r in results if r.ok]
+    return {
+        "started_at": started_at.isoformat(),
+        "duration_s": round(duration, 3),
+        "config": {
+            "base_url": config.base_url,
+            "sessions": config.sessions,
+            "concurrency": config.concurrency,
+            "turns": config.turns,
+            "agents": config.agents,
+            "chat_ratio": config.chat_ratio,
+            "think_time_ms": config.think_time_ms,
+            "seed": config.seed,
+        },
+        "requests": {
+            "total": len(results),
+            "ok": len(ok),
+            "errors": len(results) - len(ok),
+            "rps": round(len(ok) / duration, 3) if duration else 0.0,
+        },
+        "latency": _latency_summary(results),
+        "by_kind": {kind: _latency_summary([r for r in results if r.kind == kind]) for kind in sorted({r.kind for r in results})},
+        "by_agent": {agent: _latency_summary([r for r in results if r.agent == agent]) for agent in sorted({r.agent for r in results})},
+        "errors": dict(Counter(r.error for r in results if r.error).most_common(20)),
+    }
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the chat API and report latency percentiles as JSON.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/api/v1/chat", help="Prefix of the chat routes (/chat and /stream).")
+    parser.add_argument("--sessions", "-n", type=int, default=20, help="Total sessions to run.")
+    parser.add_argument("--concurrency", "-c", type=int, default=5, help="Sessions in flight at once.")
+    parser.add_argument("--turns", "-t", type=int, default=3, help="Turns per session (same session_id).")
+    parser.add_argument("--agents", default="healthcare:3,conversational:1", help="Weighted agent mix, e.g. healthcare:3,conversational:1.")
+    parser.add_argument("--chat-ratio", type=float, default=0.0, help="Fraction of turns sent to /chat instead of /chat/stream.")
+    parser.add_argument("--think-time-ms", type=float, default=0.0, help="Pause between turns of a session.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--scripts", type=Path, help='JSON object of per-agent turn messages, e.g. {"healthcare": ["...", "..."]}.')
+    parser.add_argument("--seed", type=int, help="Seed for agent and endpoint selection.")
+    parser.add_argument("--output", "-o", type=Path, help="Write the JSON report here instead of stdout.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = _parse_args()
+    scripts = dict(DEFAULT_SCRIPTS)
+    if args.scripts:
+        scripts.update(json.loads(args.scripts.read_text(encoding="utf-8")))
+    config = LoadTestConfig(
+        base_url=args.base_url.rstrip("/"),
+        sessions=args.sessions,
+        concurrency=max(args.concurrency, 1),
+        turns=max(args.turns, 1),
+        agents=parse_agents(args.agents),
+        chat_ratio=args.chat_ratio,
+        think_time_ms=args.think_time_ms,
+        timeout=args.timeout,
+        scripts=scripts,
+        seed=args.seed,
+    )
+    report = asyncio.run(run_load_test(config))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    requests = report["requests"]
+    ttft = (report["latency"].get("ttft_ms") or {}).get("p95")
+    print(
+        f"{requests['ok']}/{requests['total']} ok in {report['duration_s']}s "
+        f"({requests['rps']} req/s), p95 ttft={ttft} ms",
+        file=sys.stderr,
+    )
+    return 0 if requests["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
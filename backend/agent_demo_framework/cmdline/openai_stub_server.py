@@ -0,0 +1,421 @@
+"""Offline stand-in for the OpenAI chat-completions API, for load and latency testing.
+
+Point the backend at it with OPENAI_API_BASE=http://127.0.0.1:8900/v1 (any API key works).
+Responses are scripted so the healthcare graph runs its full path
+(routing -> triage -> tools -> coordinator). Latency is sampled from configurable
+time-to-first-token and tokens/sec distributions, so runs are reproducible with --seed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """A latency distribution parsed from `kind:a[:b]`.
+
+    - fixed:V            always V
+    - uniform:LOW:HIGH   uniform between LOW and HIGH
+    - normal:MEAN:STDDEV normal, clamped at 0
+    - lognormal:MEDIAN:SIGMA  lognormal with the given median (long right tail)
+    """
+
+    kind: str
+    a: float
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Distribution":
+        parts = spec.split(":")
+        kind = parts[0].strip().lower()
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown distribution '{kind}' in '{spec}'")
+        values = [float(p) for p in parts[1:]]
+        if not values or (kind != "fixed" and len(values) != 2):
+            raise ValueError(f"Bad distribution spec '{spec}'")
+        return cls(kind, *values)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            value = self.a
+        elif self.kind == "uniform":
+            value = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            value = rng.gauss(self.a, self.b)
+        else:
+            value = rng.lognormvariate(math.log(max(self.a, 1e-9)), self.b)
+        return max(value, 0.0)
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.a:g}" + ("" if self.kind == "fixed" else f":{self.b:g}")
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    ttft_ms: Distribution
+    tokens_per_second: Distribution
+
+
+PROFILES: dict[str, LatencyProfile] = {
+    "instant": LatencyProfile(Distribution("fixed", 0), Distribution("fixed", 0)),
+    "fast": LatencyProfile(Distribution("lognormal", 150, 0.3), Distribution("normal", 200, 30)),
+    "realistic": LatencyProfile(Distribution("lognormal", 450, 0.4), Distribution("normal", 80, 15)),
+    "slow": LatencyProfile(Distribution("lognormal", 1500, 0.5), Distribution("normal", 25, 5)),
+}
+
+
+@dataclass
+class Reply:
+    content: str | None = None
+    tool_calls: list[dict] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class ScriptRule:
+    """A scripted reply, used when `pattern` matches the chosen part of the prompt."""
+
+    pattern: re.Pattern
+    scope: str  # "user", "system" or "any"
+    content: str | None
+    tool_calls: list[dict]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScriptRule":
+        return cls(
+            pattern=re.compile(data["match"], re.IGNORECASE),
+            scope=data.get("on", "user"),
+            content=data.get("content"),
+            tool_calls=data.get("tool_calls", []),
+        )
+
+
+def load_script(path: Path) -> list[ScriptRule]:
+    """Load rules from a JSON list such as
+    `[{"match": "refill", "on": "user", "tool_calls": [{"name": "medication_info", "arguments": {"drug": "albuterol"}}]}]`.
+    """
+    return [ScriptRule.from_dict(item) for item in json.loads(path.read_text(encoding="utf-8"))]
+
+
+_PATIENT_ID = re.compile(r"\bPT-\d+\b", re.IGNORECASE)
+_PLAN_ID = re.compile(r"\b[A-Z]+-[A-Z]+-[A-Z]+\b")
+_IMAGING = re.compile(r"\b(mri|ct|scan|x-?ray|imaging|ultrasound)\b", re.IGNORECASE)
+_SCHEDULING = re.compile(r"\b(schedul\w*|appointment|book|slot|visit)\b", re.IGNORECASE)
+_COVERAGE = re.compile(r"\b(coverage|covered|copay|cost|insurance)\b", re.IGNORECASE)
+_COORDINATION = re.compile(r"\b(schedul\w*|appointment|book|plan|pre-?auth\w*|coordinat\w*|mri|referral)\b", re.IGNORECASE)
+_DRUGS = ("albuterol", "amoxicillin", "oxycodone", "gabapentin", "lisinopril", "metformin", "ibuprofen")
+_SPECIALTIES = {
+    "radiology": _IMAGING,
+    "cardiology": re.compile(r"\b(heart|cardio\w*|chest pain)\b", re.IGNORECASE),
+    "pulmonology": re.compile(r"\b(asthma|lung|breath\w*|pulmo\w*)\b", re.IGNORECASE),
+    "pediatrics": re.compile(r"\b(child|kid|pediatric\w*)\b", re.IGNORECASE),
+}
+
+_FILLER = (
+    "Based on the information gathered, here is what I found and the recommended next steps. "
+    "Please review the details below and let me know if anything needs to change. "
+)
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+class StubResponder:
+    """Turns a chat-completions request body into a scripted reply."""
+
+    def __init__(self, rules: list[ScriptRule] | None = None, completion_tokens: int = 120):
+        self.rules = rules or []
+        self.completion_tokens = completion_tokens
+
+    def respond(self, body: dict) -> Reply:
+        messages = body.get("messages", [])
+        system = " ".join(_text(m.get("content")) for m in messages if m.get("role") in ("system", "developer"))
+        last_user = next((i for i in range(len(messages) - 1, -1, -1) if messages[i].get("role") == "user"), -1)
+        user = _text(messages[last_user].get("content")) if last_user >= 0 else ""
+        tool_results = [m for m in messages[last_user + 1:] if m.get("role") == "tool"]
+        tools = {t["function"]["name"]: t["function"] for t in body.get("tools", []) if t.get("type") == "function"}
+
+        for rule in self.rules:
+            target = {"user": user, "system": system}.get(rule.scope, f"{system}\n{user}")
+            if rule.pattern.search(target):
+                return Reply(rule.content, [self._tool_call(c["name"], c.get("arguments", {})) for c in rule.tool_calls])
+
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format.get("json_schema", {}).get("schema", {})
+            return Reply(json.dumps(self._fill_schema(schema, user)))
+        forced = (body.get("tool_choice") or {}).get("function", {}).get("name") if isinstance(body.get("tool_choice"), dict) else None
+        if forced in tools:
+            return Reply(tool_calls=[self._tool_call(forced, self._fill_schema(tools[forced].get("parameters", {}), user))])
+
+        if "policy file basenames" in system:
+            return Reply(json.dumps(self._select_policies(system)))
+        if "Evaluate this healthcare request" in system:
+            return Reply(json.dumps(self._evaluate_policy(system)))
+
+        if tools and not tool_results:
+            calls = self._plan_tool_calls(user, tools)
+            if calls:
+                return Reply(tool_calls=calls)
+            return Reply("Could you share the patient ID (for example PT-1001) and what you need help with?")
+        # The coordinator always sees the tool results gathered by triage, so check for it first
+        if "care coordinator" in system.lower():
+            return Reply(self._care_plan(user))
+        if tool_results:
+            return Reply(self._summarize_tools(tool_results))
+        return Reply(self._prose(f"Here is a response to: {user[:120]}. "))
+
+    def _tool_call(self, name: str, arguments: dict) -> dict:
+        return {
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)},
+        }
+
+    def _fill_schema(self, schema: dict, user: str) -> Any:
+        """Produce a minimal value that validates against a JSON schema."""
+        if "enum" in schema:
+            options = schema["enum"]
+            # Routing classifiers: pick coordination for planning/scheduling requests
+            if "coordination" in options and "general" in options:
+                return "coordination" if _COORDINATION.search(user) else "general"
+            return options[0]
+        if "anyOf" in schema:
+            return self._fill_schema(schema["anyOf"][0], user)
+        kind = schema.get("type")
+        if kind == "object" or "properties" in schema:
+            return {name: self._fill_schema(prop, user) for name, prop in schema.get("properties", {}).items()}
+        if kind == "array":
+            return []
+        if kind in ("number", "integer"):
+            return 0
+        if kind == "boolean":
+            return False
+        return "stub"
+
+    def _plan_tool_calls(self, user: str, tools: dict) -> list[dict]:
+        candidates: list[tuple[str, dict]] = []
+        patient = _PATIENT_ID.search(user)
+        if patient:
+            candidates.append(("patient_record", {"patient_id": patient.group(0).upper()}))
+        if _IMAGING.search(user):
+            candidates.append(("policy_check", {"request_type": "imaging", "details": user[:200]}))
+        drug = next((d for d in _DRUGS if d in user.lower()), None)
+        if drug:
+            candidates.append(("medication_info", {"drug": drug}))
+        plan = _PLAN_ID.search(user)
+        if plan and _COVERAGE.search(user):
+            service = "mri" if _IMAGING.search(user) else "specialist_visit"
+            candidates.append(("coverage_check", {"insurance_plan": plan.group(0), "service": service}))
+        if _SCHEDULING.search(user):
+            specialty = next((name for name, rx in _SPECIALTIES.items() if rx.search(user)), "primary_care")
+            candidates.append(("appointment_slots", {"clinic": "any", "specialty": specialty, "date_range": "next_7_days"}))
+        return [self._tool_call(name, args) for name, args in candidates if name in tools]
+
+    def _select_policies(self, prompt: str) -> list[str]:
+        request = prompt.rsplit("## REQUEST:", 1)[-1]
+        if _IMAGING.search(request):
+            return ["imaging_services"]
+        if re.search(r"\b(opioid|controlled|oxycodone|refill|medication)\b", request, re.IGNORECASE):
+            return ["controlled_substances"]
+        return ["visit_type_restrictions"]
+
+    def _evaluate_policy(self, prompt: str) -> dict:
+        request = prompt.rsplit("## REQUEST:", 1)[-1]
+        if _IMAGING.search(request):
+            return {"status": "REQUIRES_REVIEW", "violations": [], "requirements": ["Prior authorization required for advanced imaging"]}
+        return {"status": "PASS", "violations": [], "requirements": []}
+
+    def _summarize_tools(self, tool_results: list[dict]) -> str:
+        lines = [f"- {' '.join(_text(m.get('content')).split())[:160]}" for m in tool_results]
+        return "Here is what I found:\n" + "\n".join(lines)
+
+    def _care_plan(self, user: str) -> str:
+        return (
+            f"Summary: {self._prose('The request was reviewed against the patient record and applicable policies. ')}\n\n"
+            "Appointment Details: The earliest matching slot has been identified; please confirm the time that works best.\n\n"
+            "Coverage/Instructions: Prior authorization may be required. Bring your insurance card and a list of current medications."
+        )
+
+    def _prose(self, lead: str) -> str:
+        """Pad a reply to roughly `completion_tokens` tokens (~4 characters each)."""
+        text = lead
+        while len(text) < self.completion_tokens * 4:
+            text += _FILLER
+        return text[: self.completion_tokens * 4].rstrip()
+
+
+def split_tokens(text: str) -> list[str]:
+    """Word-level pseudo tokens (each keeps its trailing whitespace)."""
+    return re.findall(r"\S+\s*|\s+", text) or [text]
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+@dataclass
+class StubStats:
+    requests: int = 0
+    streamed: int = 0
+    tool_call_replies: int = 0
+    completion_tokens: int = 0
+
+
+class StubServer:
+    """Serves StubResponder replies with sampled latency, streamed or as one response."""
+
+    def __init__(self, profile: LatencyProfile, responder: StubResponder, seed: int | None = None):
+        self.profile = profile
+        self.responder = responder
+        self.rng = random.Random(seed)
+        self.stats = StubStats()
+
+    def _timing(self) -> tuple[float, float]:
+        """Sampled (ttft seconds, seconds per token) for one response."""
+        ttft = self.profile.ttft_ms.sample(self.rng) / 1000
+        tps = self.profile.tokens_per_second.sample(self.rng)
+        return ttft, (1 / tps if tps > 0 else 0.0)
+
+    async def _paced(self, pieces: list[Any]) -> AsyncIterator[Any]:
+        """Yield pieces on schedule: the first after the TTFT, the rest at the sampled token rate."""
+        ttft, per_token = self._timing()
+        start = time.perf_counter()
+        for i, piece in enumerate(pieces):
+            delay = start + ttft + i * per_token - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield piece
+
+    def _reply(self, body: dict) -> Reply:
+        reply = self.responder.respond(body)
+        self.stats.requests += 1
+        self.stats.streamed += int(bool(body.get("stream")))
+        self.stats.tool_call_replies += int(bool(reply.tool_calls))
+        self.stats.completion_tokens += _estimate_tokens(reply.content or json.dumps(reply.tool_calls))
+        return reply
+
+    def _usage(self, body: dict, reply: Reply) -> dict:
+        prompt = _estimate_tokens(json.dumps(body.get("messages", [])))
+        completion = _estimate_tokens(reply.content or json.dumps(reply.tool_calls))
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+    async def complete(self, body: dict) -> dict:
+        reply = self._reply(body)
+        pieces = split_tokens(reply.content) if reply.content else [json.dumps(reply.tool_calls)]
+        async for _ in self._paced(pieces):
+            pass
+        message: dict = {"role": "assistant", "content": reply.content}
+        if reply.tool_calls:
+            message["tool_calls"] = reply.tool_calls
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if reply.tool_calls else "stop"}],
+            "usage": self._usage(body, reply),
+        }
+
+    async def stream(self, body: dict) -> AsyncIterator[str]:
+        reply = self._reply(body)
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+        }
+
+        def chunk(delta: dict, finish_reason: str | None = None) -> str:
+            payload = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        if reply.tool_calls:
+            deltas = []
+            for index, call in enumerate(reply.tool_calls):
+                header = {"index": index, "id": call["id"], "type": "function", "function": {"name": call["function"]["name"], "arguments": ""}}
+                deltas.append({"tool_calls": [header]})
+                deltas.extend(
+                    {"tool_calls": [{"index": index, "function": {"arguments": piece}}]}
+                    for piece in split_tokens(call["function"]["arguments"])
+                )
+            deltas[0] = {"role": "assistant", "content": None, **deltas[0]}
+        else:
+            deltas = [{"content": piece} for piece in split_tokens(reply.content or "")]
+            deltas[0] = {"role": "assistant", **deltas[0]}
+
+        async for delta in self._paced(deltas):
+            yield chunk(delta)
+        yield chunk({}, "tool_calls" if reply.tool_calls else "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield f"data: {json.dumps({**base, 'choices': [], 'usage': self._usage(body, reply)})}\n\n"
+        yield "data: [DONE]\n\n"
+
+
+def create_app(server: StubServer) -> FastAPI:
+    app = FastAPI(title="OpenAI stub", docs_url=None, redoc_url=None)
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            return StreamingResponse(server.stream(body), media_type="text/event-stream")
+        return JSONResponse(await server.complete(body))
+
+    @app.get("/stub/stats")
+    async def stats():
+        return {
+            **asdict(server.stats),
+            "profile": {"ttft_ms": str(server.profile.ttft_ms), "tokens_per_second": str(server.profile.tokens_per_second)},
+        }
+
+    return app
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible chat-completions stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic", help="Named latency profile.")
+    parser.add_argument("--ttft", type=Distribution.parse, help="Override TTFT in ms, e.g. lognormal:400:0.4 or fixed:200.")
+    parser.add_argument("--tps", type=Distribution.parse, help="Override tokens/sec, e.g. normal:80:15.")
+    parser.add_argument("--completion-tokens", type=int, default=120, help="Approximate length of free-text replies.")
+    parser.add_argument("--script", type=Path, help="JSON file of scripted replies checked before the built-in rules.")
+    parser.add_argument("--seed", type=int, help="Seed for latency sampling, for reproducible runs.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    import uvicorn
+
+    args = _parse_args()
+    base = PROFILES[args.profile]
+    profile = LatencyProfile(args.ttft or base.ttft_ms, args.tps or base.tokens_per_second)
+    responder = StubResponder(load_script(args.script) if args.script else None, args.completion_tokens)
+    server = StubServer(profile, responder, seed=args.seed)
+    print(f"OpenAI stub on http://{args.host}:{args.port}/v1 (ttft_ms={profile.ttft_ms}, tokens_per_second={profile.tokens_per_second})")
+    uvicorn.run(create_app(server), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
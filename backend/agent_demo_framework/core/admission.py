@@ -0,0 +1,155 @@
+"""Admission control: per-agent concurrency limits with a bounded, time-limited wait queue."""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.events import get_event_logger
+from agent_demo_framework.core.metrics import (
+    ADMISSION_ACTIVE,
+    ADMISSION_QUEUE_SECONDS,
+    ADMISSION_QUEUED,
+    ADMISSION_REJECTED,
+)
+
+admission_events = get_event_logger("api.admission")
+
+# Bounds for the Retry-After hint, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+
+class AdmissionRejected(Exception):
+    """A turn was not admitted: 429 when the wait queue is full, 503 when its wait timed out."""
+
+    def __init__(self, agent: str, reason: str, retry_after: int):
+        self.agent = agent
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status_code = 429 if reason == "queue_full" else 503
+        detail = "queue is full" if reason == "queue_full" else "no slot freed up in time"
+        super().__init__(f"The {agent} agent is at capacity ({detail}); retry in {retry_after}s")
+
+
+class Slot:
+    """A held concurrency slot. `release` is idempotent."""
+
+    def __init__(self, lane: Optional["_Lane"] = None):
+        self._lane = lane
+        self._start = time.perf_counter()
+
+    def release(self) -> None:
+        lane, self._lane = self._lane, None
+        if lane is not None:
+            lane.release(time.perf_counter() - self._start)
+
+
+class _Lane:
+    """One agent's slots: a semaphore plus a count of turns waiting for it."""
+
+    # Weight of the newest hold time in the moving average
+    ALPHA = 0.2
+
+    def __init__(self, agent: str, limit: int):
+        self.agent = agent
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.hold_seconds = 0.0
+
+    def retry_after(self) -> int:
+        """Seconds until the turns queued now are likely to have started, from the average hold time."""
+        estimate = self.hold_seconds * (self.waiting + 1) / self.limit
+        return min(max(math.ceil(estimate), MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        retry_after = self.retry_after()
+        ADMISSION_REJECTED.inc(agent=self.agent, reason=reason)
+        admission_events.info(
+            "rejected", agent=self.agent, reason=reason, active=self.active,
+            waiting=self.waiting, retry_after=retry_after,
+        )
+        return AdmissionRejected(self.agent, reason, retry_after)
+
+    async def acquire(self) -> Slot:
+        if not self.semaphore.locked():
+            # A slot is free and nobody is queued ahead: this does not block
+            await self.semaphore.acquire()
+            ADMISSION_QUEUE_SECONDS.observe(0.0, agent=self.agent, outcome="admitted")
+        else:
+            if self.waiting >= settings.ADMISSION_QUEUE_SIZE:
+                raise self._reject("queue_full")
+            self.waiting += 1
+            ADMISSION_QUEUED.inc(agent=self.agent)
+            start = time.perf_counter()
+            outcome = "cancelled"
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), settings.ADMISSION_QUEUE_TIMEOUT_SECONDS)
+                outcome = "admitted"
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+            finally:
+                self.waiting -= 1
+                ADMISSION_QUEUED.dec(agent=self.agent)
+                ADMISSION_QUEUE_SECONDS.observe(time.perf_counter() - start, agent=self.agent, outcome=outcome)
+            if outcome == "timeout":
+                raise self._reject("timeout")
+        self.active += 1
+        ADMISSION_ACTIVE.inc(agent=self.agent)
+        return Slot(self)
+
+    def release(self, held: float) -> None:
+        self.active -= 1
+        ADMISSION_ACTIVE.dec(agent=self.agent)
+        self.hold_seconds = held if not self.hold_seconds else self.hold_seconds + self.ALPHA * (held - self.hold_seconds)
+        self.semaphore.release()
+
+
+class AdmissionController:
+    """
+    Caps the chat turns running at once per agent. Each agent gets ADMISSION_LIMITS[agent]
+    slots (ADMISSION_MAX_CONCURRENT when not listed), read when the agent is first used.
+    A turn that finds every slot taken waits in FIFO order, behind at most
+    ADMISSION_QUEUE_SIZE others and for at most ADMISSION_QUEUE_TIMEOUT_SECONDS. Past either
+    bound it is rejected with AdmissionRejected, which carries a Retry-After hint.
+    """
+
+    def __init__(self):
+        self._lanes: Dict[str, _Lane] = {}
+
+    def _lane(self, agent: str) -> _Lane:
+        lane = self._lanes.get(agent)
+        if lane is None:
+            limit = settings.ADMISSION_LIMITS.get(agent, settings.ADMISSION_MAX_CONCURRENT)
+            lane = self._lanes[agent] = _Lane(agent, max(limit, 1))
+        return lane
+
+    async def acquire(self, agent: str) -> Slot:
+        """Wait for a slot for `agent`; release it with `Slot.release()` when the turn ends."""
+        if not settings.ADMISSION_ENABLED:
+            return Slot()
+        return await self._lane(agent).acquire()
+
+    @asynccontextmanager
+    async def admit(self, agent: str) -> AsyncIterator[None]:
+        slot = await self.acquire(agent)
+        try:
+            yield
+        finally:
+            slot.release()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            agent: {
+                "limit": lane.limit,
+                "active": lane.active,
+                "waiting": lane.waiting,
+                "avg_hold_seconds": round(lane.hold_seconds, 3),
+            }
+            for agent, lane in self._lanes.items()
+        }
+
+
+admission = AdmissionController()
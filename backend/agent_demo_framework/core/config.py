@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 import os
@@ -25,20 +25,147 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./langgraph_demo.db"
     
+    # Session history: turns are cached in memory and written behind to the
+    # conversations/messages tables in batches.
+    SESSION_PERSISTENCE_ENABLED: bool = True
+    SESSION_MAX_HISTORY_MESSAGES: int = 20
+    SESSION_WRITE_INTERVAL: float = 1.0
+    SESSION_WRITE_BATCH_SIZE: int = 100
+    SESSION_WRITE_QUEUE_MAX: int = 10000
+    # Bounds for the in-memory session cache (LRU size, idle TTL, approx bytes per session)
+    SESSION_CACHE_MAX_SESSIONS: int = 1000
+    SESSION_CACHE_TTL_SECONDS: float = 1800.0
+    SESSION_CACHE_MAX_BYTES_PER_SESSION: int = 256_000
+    # Seconds a cached session is trusted before a read starts a background check for rows
+    # written by other workers (negative never checks)
+    SESSION_CACHE_REVALIDATE_SECONDS: float = 2.0
+    # Prompt history budget: keep the last HISTORY_KEEP_TURNS turns verbatim and fold
+    # older ones into a rolling summary (generated in the background) once the history
+    # exceeds HISTORY_TOKEN_BUDGET. HISTORY_TOKENIZER is "estimate" or "tiktoken".
+    HISTORY_TOKEN_BUDGET: int = 3000
+    HISTORY_KEEP_TURNS: int = 3
+    HISTORY_SUMMARY_ENABLED: bool = True
+    HISTORY_SUMMARY_MAX_TOKENS: int = 300
+    HISTORY_TOKENIZER: str = "estimate"
+    
     # Data Directory (package-relative)
     DATA_DIR: str = os.path.join(
         os.path.dirname(os.path.abspath(agent_demo_framework.__file__)),
         "data",
     )
     
+    # Seconds between mtime checks of the mock_db JSON files (<= 0 disables hot reload)
+    MOCK_DB_RELOAD_INTERVAL: float = 2.0
+    # "Today" (YYYY-MM-DD) for relative appointment windows such as next_7_days;
+    # defaults to the appointments file's as_of date, then the real date.
+    SCHEDULING_REFERENCE_DATE: Optional[str] = None
+    # Cache for deterministic tool results (coverage_check, medication_info, appointment_slots):
+    # a per-process LRU in front of a SQLite table shared by all workers (empty path = memory
+    # only; the directory is created on first use). Entries expire after the TTL and are
+    # invalidated when their dataset file changes.
+    TOOL_CACHE_ENABLED: bool = True
+    TOOL_CACHE_TTL_SECONDS: float = 300.0
+    TOOL_CACHE_MAX_ENTRIES: int = 1024
+    TOOL_CACHE_SHARED_PATH: str = "./var/tool_cache.db"
+    # Reuse policy_check decisions stored in the policy_decisions table for the same
+    # request while the policy index and the selected policy files are unchanged.
+    POLICY_CACHE_ENABLED: bool = True
+    
+    # SSE framing for /chat/stream: after the first token, message deltas are merged into
+    # one frame per window (ms) or once this much content is buffered; window <= 0 sends
+    # every delta as its own frame.
+    SSE_COALESCE_WINDOW_MS: float = 30.0
+    SSE_COALESCE_MAX_BYTES: int = 2048
+    # How often an open stream checks for a disconnected client while no frame is ready;
+    # a disconnect cancels the graph run and its in-flight model calls (<= 0: only the server's own detection)
+    SSE_DISCONNECT_POLL_MS: float = 250.0
+    
+    # Admission control for chat turns (/chat, /chat/stream, /chat/ws), per agent
+    # (conversational, multistep, healthcare): turns running at once (ADMISSION_LIMITS
+    # overrides the default per agent), turns allowed to wait for a slot, and how long one
+    # may wait. A full queue is answered with 429 and a timed-out wait with 503, both with
+    # Retry-After.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENT: int = 32
+    ADMISSION_LIMITS: Dict[str, int] = {"healthcare": 16}
+    ADMISSION_QUEUE_SIZE: int = 64
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    
+    # Opt-in single-flight for /chat and /chat/stream: concurrent turns with the same agent,
+    # normalized message and history share one agent run (run without a session id)
+    SINGLE_FLIGHT_ENABLED: bool = False
+    
+    # WebSocket chat at /chat/ws: turns one connection may run at once, and frames queued
+    # per connection before turn streams wait for the client to read
+    WS_MAX_CONCURRENT_TURNS: int = 8
+    WS_SEND_QUEUE_SIZE: int = 256
+    
+    # Prometheus-format metrics at /metrics and graph/tool timing callbacks. The values are
+    # per process, so only one worker may use METRICS_LOCK_PATH (empty = not enforced).
+    METRICS_ENABLED: bool = True
+    METRICS_LOCK_PATH: str = "./var/metrics.lock"
+    # Trace spans (API -> graph nodes -> tools -> model calls) exported as OTLP/JSON,
+    # either appended to TRACING_FILE_PATH ("file") or sent to an OTLP/HTTP collector ("otlp")
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "file"
+    TRACING_FILE_PATH: str = "./traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318"
+    TRACING_SERVICE_NAME: str = "agent-demo-backend"
+    TRACING_FLUSH_INTERVAL: float = 2.0
+    TRACING_MAX_QUEUE: int = 10000
+    # Structured event log (core/events.py): default level, per-component overrides and
+    # sample rates (dotted prefixes, e.g. {"healthcare.supervisor": "DEBUG"}), and the
+    # in-memory ring buffers served by the /debug endpoints (DEBUG_ENDPOINTS_ENABLED).
+    EVENT_LOG_LEVEL: str = "INFO"
+    EVENT_LOG_LEVELS: Dict[str, str] = {}
+    EVENT_LOG_SAMPLE_RATES: Dict[str, float] = {}
+    EVENT_LOG_BUFFER_SIZE: int = 2000
+    EVENT_LOG_SESSION_BUFFER_SIZE: int = 1000
+    DEBUG_ENDPOINTS_ENABLED: bool = False
+
     # OpenAI Configuration
     OPENAI_API_KEY: str = ""
     OPENAI_API_BASE: str = "https://api.openai.com/v1"
     OPENAI_MODEL_NAME: str = "gpt-5-nano"
+    # Shared HTTP connection pool for all model clients (see core/llm.py) and the
+    # number of connections opened at startup (0 disables warm-up).
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    LLM_HTTP_TIMEOUT: float = 120.0
+    LLM_HTTP_CONNECT_TIMEOUT: float = 10.0
+    LLM_WARMUP_CONNECTIONS: int = 4
 
     # Healthcare Agent Configuration
     HEALTHCARE_RECURSION_LIMIT: int = 100
     HEALTHCARE_STREAM_NODES: Optional[List[str]] = None
+    # Routing classifier: per-request timeout (seconds) and the task type used
+    # when the classifier times out or fails.
+    HEALTHCARE_ROUTING_TIMEOUT: float = 10.0
+    HEALTHCARE_ROUTING_FALLBACK: Literal["general", "coordination"] = "coordination"
+    # Local routing classifier trained from data/routing/healthcare_intents.jsonl; the LLM
+    # only decides when its confidence is below the threshold. A fraction of local decisions
+    # (SHADOW_RATE) is also sent to the LLM in the background to measure agreement.
+    HEALTHCARE_ROUTING_LOCAL_ENABLED: bool = True
+    HEALTHCARE_ROUTING_LOCAL_THRESHOLD: float = 0.75
+    HEALTHCARE_ROUTING_SHADOW_RATE: float = 0.0
+    # Start the graph speculatively (as HEALTHCARE_ROUTING_FALLBACK) while the LLM
+    # classifier runs, instead of waiting for the decision first. A misroute discards the
+    # speculative run and pays for a second one, so speculation pauses while more than
+    # MAX_DISCARD_RATE of recent LLM-routed turns disagreed with the fallback.
+    HEALTHCARE_ROUTING_CONCURRENT: bool = False
+    HEALTHCARE_ROUTING_SPECULATION_MAX_DISCARD_RATE: float = 0.3
+    # Run regex-detectable lookups (patient_record for PT-#### ids, medication_info for known
+    # drugs) alongside routing and hand them to the graph as tool results; optionally also
+    # the imaging policy_check once routing has chosen coordination.
+    HEALTHCARE_PREFETCH_ENABLED: bool = True
+    HEALTHCARE_PREFETCH_POLICY: bool = True
+    # Answer a repeated (tool, arguments) call within one graph run from the earlier result
+    HEALTHCARE_TOOL_DEDUP_ENABLED: bool = True
+    # Persist graph state per session (thread_id = session_id) so follow-up turns
+    # resume the stored thread instead of replaying the history.
+    HEALTHCARE_CHECKPOINT_ENABLED: bool = False
+    HEALTHCARE_CHECKPOINT_PATH: str = "./var/langgraph_checkpoints.db"
     
     model_config = SettingsConfigDict(
         env_file=".env",
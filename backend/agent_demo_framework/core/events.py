@@ -0,0 +1,203 @@
+"""Structured event log with per-component levels, sampling and an in-memory ring buffer."""
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from agent_demo_framework.core.config import settings
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+_request_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("event_session", default=None)
+
+
+@dataclass
+class EventRecord:
+    ts: float
+    level: int
+    component: str
+    event: str
+    session_id: Optional[str]
+    fields: Dict[str, Any]
+
+    def to_dict(self) -> dict:
+        return {
+            "ts": self.ts,
+            "level": logging.getLevelName(self.level),
+            "component": self.component,
+            "event": self.event,
+            "session_id": self.session_id,
+            **self.fields,
+        }
+
+    def __str__(self) -> str:
+        # Only called by a logging handler that actually emits the record
+        details = " ".join(f"{key}={json.dumps(value, default=str)}" for key, value in self.fields.items())
+        return f"{self.event} {details}".rstrip()
+
+
+class EventLog:
+    """
+    Keeps recent events in a ring buffer and forwards those at or above the component's
+    level to the `agent_demo_framework.events.<component>` stdlib logger.
+
+    Sessions put under capture (see `capture`) record every event, DEBUG included, into
+    their own buffer regardless of component levels, so detailed traces for one session
+    can be pulled on demand while everything else stays at production levels.
+    """
+
+    def __init__(self):
+        self._recent: Deque[EventRecord] = deque(maxlen=settings.EVENT_LOG_BUFFER_SIZE)
+        self._captured: Dict[str, Deque[EventRecord]] = {}
+        self._capture_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def has_captures(self) -> bool:
+        return bool(self._capture_until)
+
+    def is_capturing(self, session_id: Optional[str]) -> bool:
+        if not session_id or not self._capture_until:
+            return False
+        until = self._capture_until.get(session_id)
+        if until is None:
+            return False
+        if until < time.monotonic():
+            self.stop_capture(session_id)
+            return False
+        return True
+
+    def capture(self, session_id: str, seconds: float) -> None:
+        with self._lock:
+            self._capture_until[session_id] = time.monotonic() + seconds
+            self._captured.setdefault(session_id, deque(maxlen=settings.EVENT_LOG_SESSION_BUFFER_SIZE))
+
+    def stop_capture(self, session_id: str, discard: bool = False) -> None:
+        """Stop recording for a session; its captured events stay fetchable unless discarded."""
+        with self._lock:
+            self._capture_until.pop(session_id, None)
+            if discard:
+                self._captured.pop(session_id, None)
+
+    def record(self, record: EventRecord, forward: bool, logger: logging.Logger) -> None:
+        if forward:
+            self._recent.append(record)
+            logger.log(record.level, "%s", record)
+        if record.session_id and self.is_capturing(record.session_id):
+            buffer = self._captured.get(record.session_id)
+            if buffer is not None:
+                buffer.append(record)
+
+    def events(
+        self,
+        session_id: Optional[str] = None,
+        component: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[dict]:
+        """Most recent events (oldest first), from the session's capture buffer if it has one."""
+        source = self._captured.get(session_id) if session_id else None
+        records = list(source if source is not None else self._recent)
+        if session_id and source is None:
+            records = [r for r in records if r.session_id == session_id]
+        if component:
+            records = [r for r in records if r.component == component or r.component.startswith(component + ".")]
+        return [r.to_dict() for r in records[-limit:]]
+
+    def captures(self) -> Dict[str, float]:
+        now = time.monotonic()
+        return {sid: round(until - now, 1) for sid, until in self._capture_until.items() if until > now}
+
+
+event_log = EventLog()
+
+
+def _resolve(component: str, mapping: Dict[str, Any], default: Any) -> Any:
+    """Most specific setting for a dotted component name ("a.b.c" -> "a.b.c", "a.b", "a")."""
+    parts = component.split(".")
+    for i in range(len(parts), 0, -1):
+        key = ".".join(parts[:i])
+        if key in mapping:
+            return mapping[key]
+    return default
+
+
+class EventLogger:
+    """
+    Logger for one component. Calls below the component's level return after one integer
+    comparison (unless a captured session is active), and fields are only formatted when
+    a handler emits the record.
+    """
+
+    def __init__(self, component: str):
+        self.component = component
+        self._logger = logging.getLogger(f"agent_demo_framework.events.{component}")
+        self.configure()
+
+    def configure(self) -> None:
+        level = _resolve(self.component, settings.EVENT_LOG_LEVELS, settings.EVENT_LOG_LEVEL)
+        self.level = level if isinstance(level, int) else logging.getLevelName(str(level).upper())
+        self.sample_rate = float(_resolve(self.component, settings.EVENT_LOG_SAMPLE_RATES, 1.0))
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any]) -> None:
+        forward = level >= self.level
+        session_id = _request_session.get()
+        if not forward and not event_log.is_capturing(session_id):
+            return
+        # Sampling thins high-volume DEBUG/INFO events; warnings and errors are always kept
+        if forward and level < WARNING and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            forward = False
+            if not event_log.is_capturing(session_id):
+                return
+        record = EventRecord(time.time(), level, self.component, event, session_id, fields)
+        event_log.record(record, forward, self._logger)
+
+    def debug(self, event: str, **fields: Any) -> None:
+        if DEBUG >= self.level or event_log.has_captures:
+            self._log(DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        if INFO >= self.level or event_log.has_captures:
+            self._log(INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self._log(ERROR, event, fields)
+
+
+_loggers: Dict[str, EventLogger] = {}
+
+
+def get_event_logger(component: str) -> EventLogger:
+    logger = _loggers.get(component)
+    if logger is None:
+        logger = _loggers[component] = EventLogger(component)
+    return logger
+
+
+def reconfigure() -> None:
+    """Re-read levels and sample rates for every component (after changing settings)."""
+    for logger in _loggers.values():
+        logger.configure()
+
+
+@contextmanager
+def event_context(session_id: Optional[str]) -> Iterator[None]:
+    """Attribute events emitted inside the block (including tool threads) to a session."""
+    token = _request_session.set(session_id)
+    try:
+        yield
+    finally:
+        try:
+            _request_session.reset(token)
+        except ValueError:
+            pass
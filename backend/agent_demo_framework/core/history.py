@@ -0,0 +1,160 @@
+"""Token-budgeted conversation history with rolling background summaries."""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.llm import llm_registry
+from agent_demo_framework.core.metrics import LLM_CALL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+# What a summary must preserve, unless the agent supplies its own instructions
+DEFAULT_SUMMARY_INSTRUCTIONS = (
+    "Keep names and identifiers, facts the user provided, decisions made, open questions and pending actions."
+)
+# Per-message framing tokens added by the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding: Any = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    """tiktoken encoding when HISTORY_TOKENIZER=tiktoken and the BPE file is available, else None."""
+    global _encoding, _encoding_failed
+    if settings.HISTORY_TOKENIZER != "tiktoken" or _encoding_failed:
+        return None
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, falling back to character estimate: {e}")
+            _encoding_failed = True
+            return None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # ~4 characters per token for English prose and JSON
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def is_summary(message: BaseMessage) -> bool:
+    return isinstance(message, SystemMessage) and str(message.content).startswith(SUMMARY_PREFIX)
+
+
+def make_summary(text: str) -> SystemMessage:
+    return SystemMessage(content=SUMMARY_PREFIX + text.strip())
+
+
+def split_recent(history: List[BaseMessage], keep_turns: int) -> int:
+    """Index where the last `keep_turns` user turns (and their replies) begin."""
+    turns = 0
+    for i in range(len(history) - 1, -1, -1):
+        if isinstance(history[i], HumanMessage):
+            turns += 1
+            if turns == keep_turns:
+                return i
+    return 0
+
+
+def fit_to_budget(history: List[BaseMessage], budget: Optional[int] = None) -> List[BaseMessage]:
+    """
+    Cheap, synchronous trim used on the request path: keep a leading summary if there is
+    one, then as many of the newest messages as fit in the token budget.
+    """
+    budget = budget if budget is not None else settings.HISTORY_TOKEN_BUDGET
+    summary = history[0] if history and is_summary(history[0]) else None
+    body = history[1:] if summary is not None else history
+    remaining = budget - (message_tokens(summary) if summary is not None else 0)
+
+    kept: List[BaseMessage] = []
+    for message in reversed(body):
+        cost = message_tokens(message)
+        if cost > remaining and kept:
+            break
+        kept.append(message)
+        remaining -= cost
+    kept.reverse()
+    # Never start the window on a dangling assistant reply
+    while len(kept) > 1 and isinstance(kept[0], AIMessage):
+        kept.pop(0)
+    return ([summary] if summary is not None else []) + kept
+
+
+class HistorySummarizer:
+    """
+    Folds older turns into a rolling summary once a session's history exceeds the token
+    budget. Runs as a background task after the response has been sent, one task per
+    session at a time, so summarization never sits on the request path.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def llm(self) -> Optional[ChatOpenAI]:
+        return llm_registry.get_chat_model(temperature=0) if llm_registry.enabled else None
+
+    def needs_summary(self, history: List[BaseMessage]) -> bool:
+        return sum(message_tokens(msg) for msg in history) > settings.HISTORY_TOKEN_BUDGET
+
+    def schedule(self, store: Any, session_id: str, instructions: Optional[str] = None) -> None:
+        """
+        Start a background summary for the session if it is over budget. `instructions`
+        say what the summary must keep (the agent's `summary_instructions`).
+        """
+        if not settings.HISTORY_SUMMARY_ENABLED or self.llm is None:
+            return
+        if session_id in self._tasks:
+            return
+        history = store.cache.peek(session_id)
+        if not history or not self.needs_summary(history):
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._summarize(store, session_id, list(history), instructions or DEFAULT_SUMMARY_INSTRUCTIONS)
+        )
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+
+    async def _summarize(self, store: Any, session_id: str, history: List[BaseMessage], instructions: str) -> None:
+        split = split_recent(history, settings.HISTORY_KEEP_TURNS)
+        older = history[:split]
+        if not older or (len(older) == 1 and is_summary(older[0])):
+            return
+
+        transcript = "\n".join(
+            f"{'Previous summary' if is_summary(msg) else msg.type}: {msg.content}" for msg in older
+        )
+        prompt = SystemMessage(content=(
+            "Condense this conversation into a brief summary the assistant can continue from. "
+            f"{instructions} Use at most {settings.HISTORY_SUMMARY_MAX_TOKENS} tokens.\n\n"
+            f"{transcript}"
+        ))
+        try:
+            with LLM_CALL_SECONDS.time(site="history_summary"):
+                response = await self.llm.ainvoke([prompt])
+        except Exception as e:
+            logger.error(f"History summarization failed for {session_id}: {e}")
+            return
+        store.replace_prefix(session_id, older, make_summary(str(response.content)))
+
+    async def aclose(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+
+history_summarizer = HistorySummarizer()
@@ -0,0 +1,143 @@
+"""Local intent classifier (TF-IDF features, logistic regression) trained from a labeled JSONL file."""
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+_PATIENT_ID = re.compile(r"\bpt-\d+\b")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased unigrams and bigrams; patient ids collapse to one placeholder token."""
+    words = _WORD.findall(_PATIENT_ID.sub(" patientid ", text.lower()))
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+@dataclass(frozen=True)
+class Prediction:
+    label: str
+    confidence: float
+
+
+class IntentClassifier:
+    """
+    Multinomial logistic regression over L2-normalised TF-IDF unigrams and bigrams.
+
+    Small enough to train at startup from a few hundred examples; a prediction is a
+    tokenize plus one sparse dot product per label.
+    """
+
+    def __init__(self, labels: Sequence[str], idf: Dict[str, float], weights: Dict[str, Dict[str, float]], bias: Dict[str, float]):
+        self.labels = list(labels)
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+
+    @staticmethod
+    def _vectorize(tokens: List[str], idf: Dict[str, float]) -> Dict[str, float]:
+        counts = Counter(t for t in tokens if t in idf)
+        vector = {t: (1.0 + math.log(c)) * idf[t] for t, c in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {t: v / norm for t, v in vector.items()}
+
+    @classmethod
+    def train(
+        cls,
+        examples: Sequence[Tuple[str, str]],
+        epochs: int = 150,
+        learning_rate: float = 2.0,
+        l2: float = 1e-3,
+    ) -> "IntentClassifier":
+        """Fit on (text, label) pairs with full-batch gradient descent."""
+        labels = sorted({label for _, label in examples})
+        if len(labels) < 2:
+            raise ValueError("Need examples for at least two labels")
+        docs = [(tokenize(text), label) for text, label in examples]
+        df = Counter(t for tokens, _ in docs for t in set(tokens))
+        n = len(docs)
+        idf = {t: math.log((1 + n) / (1 + d)) + 1.0 for t, d in df.items()}
+        vectors = [(cls._vectorize(tokens, idf), label) for tokens, label in docs]
+
+        weights: Dict[str, Dict[str, float]] = {label: {} for label in labels}
+        bias = {label: 0.0 for label in labels}
+        model = cls(labels, idf, weights, bias)
+        for _ in range(epochs):
+            grad_w: Dict[str, Dict[str, float]] = {label: {} for label in labels}
+            grad_b = {label: 0.0 for label in labels}
+            for vector, target in vectors:
+                for label, p in model._probabilities(vector).items():
+                    error = p - (1.0 if label == target else 0.0)
+                    grad_b[label] += error
+                    g = grad_w[label]
+                    for t, v in vector.items():
+                        g[t] = g.get(t, 0.0) + error * v
+            for label in labels:
+                w = weights[label]
+                for t, g in grad_w[label].items():
+                    w[t] = w.get(t, 0.0) - learning_rate * (g / n + l2 * w.get(t, 0.0))
+                bias[label] -= learning_rate * grad_b[label] / n
+        return model
+
+    @classmethod
+    def from_file(cls, path: str) -> "IntentClassifier":
+        """Train from a JSONL file of {"text": ..., "label": ...} objects."""
+        examples = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    row = json.loads(line)
+                    examples.append((row["text"], row["label"]))
+        return cls.train(examples)
+
+    def _probabilities(self, vector: Dict[str, float]) -> Dict[str, float]:
+        scores = {
+            label: self.bias[label] + sum(self.weights[label].get(t, 0.0) * v for t, v in vector.items())
+            for label in self.labels
+        }
+        top = max(scores.values())
+        exp = {label: math.exp(s - top) for label, s in scores.items()}
+        total = sum(exp.values())
+        return {label: e / total for label, e in exp.items()}
+
+    def predict(self, text: str) -> Prediction:
+        probabilities = self._probabilities(self._vectorize(tokenize(text), self.idf))
+        label = max(probabilities, key=probabilities.get)
+        return Prediction(label, probabilities[label])
+
+
+class LocalIntentRouter:
+    """Trains an IntentClassifier from `path` on first use; predicts None if the file is unusable."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._model: Optional[IntentClassifier] = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None or self._failed
+
+    def load(self) -> Optional[IntentClassifier]:
+        if self._model is not None or self._failed:
+            return self._model
+        with self._lock:
+            if self._model is None and not self._failed:
+                try:
+                    self._model = IntentClassifier.from_file(self.path)
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Local intent router disabled, cannot train from {self.path}: {e}")
+                    self._failed = True
+        return self._model
+
+    def predict(self, text: str) -> Optional[Prediction]:
+        model = self.load()
+        return model.predict(text) if model is not None else None
@@ -0,0 +1,110 @@
+"""Shared chat model clients backed by pooled HTTP connections."""
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from langchain_openai import ChatOpenAI
+from agent_demo_framework.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMRegistry:
+    """Hands out ChatOpenAI instances that share one sync and one async HTTP connection pool.
+
+    Models are cached per (model, temperature, extra kwargs), so every agent and tool asking
+    for the same configuration gets the same instance, and all of them reuse keep-alive
+    connections to OPENAI_API_BASE instead of opening their own.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._models: Dict[Tuple, ChatOpenAI] = {}
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(settings.LLM_HTTP_TIMEOUT, connect=settings.LLM_HTTP_CONNECT_TIMEOUT)
+
+    @property
+    def http_client(self) -> httpx.Client:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(limits=self._limits(), timeout=self._timeout())
+        return self._client
+
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(limits=self._limits(), timeout=self._timeout())
+        return self._async_client
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.OPENAI_API_KEY and settings.OPENAI_API_KEY.strip())
+
+    def get_chat_model(self, temperature: float = 0, **kwargs: Any) -> ChatOpenAI:
+        """Return the shared chat model for this configuration, creating it on first use."""
+        model = kwargs.pop("model", settings.OPENAI_MODEL_NAME)
+        # Ask for token usage on streamed responses too (used by tracing)
+        kwargs.setdefault("stream_usage", True)
+        key = (model, temperature, tuple(sorted(kwargs.items())))
+        llm = self._models.get(key)
+        if llm is None:
+            llm = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                openai_api_key=settings.OPENAI_API_KEY,
+                openai_api_base=settings.OPENAI_API_BASE,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client,
+                **kwargs,
+            )
+            self._models[key] = llm
+        return llm
+
+    async def warm_up(self, connections: Optional[int] = None) -> int:
+        """Open keep-alive connections to the model endpoint ahead of the first request.
+
+        Issues concurrent lightweight GET /models calls so TCP and TLS setup happen at
+        startup. Returns the number of requests that completed; failures are only logged.
+        """
+        connections = connections if connections is not None else settings.LLM_WARMUP_CONNECTIONS
+        if not self.enabled or connections <= 0:
+            return 0
+        url = settings.OPENAI_API_BASE.rstrip("/") + "/models"
+        headers = {"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
+
+        async def ping() -> bool:
+            try:
+                response = await self.http_async_client.get(url, headers=headers)
+                await response.aread()
+                return True
+            except Exception as e:
+                logger.warning(f"LLM connection warm-up failed: {e}")
+                return False
+
+        results = await asyncio.gather(*(ping() for _ in range(connections)))
+        warmed = sum(results)
+        logger.info(f"Warmed {warmed}/{connections} connections to {settings.OPENAI_API_BASE}")
+        return warmed
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+        if self._client is not None:
+            self._client.close()
+        self._models.clear()
+
+
+llm_registry = LLMRegistry()
+
+
+def get_chat_model(temperature: float = 0, **kwargs: Any) -> ChatOpenAI:
+    """Shortcut for `llm_registry.get_chat_model`."""
+    return llm_registry.get_chat_model(temperature=temperature, **kwargs)
@@ -0,0 +1,380 @@
+"""
+In-process metrics with Prometheus text exposition (served at /metrics).
+
+Values live in the memory of one process, so /metrics is only complete with a single worker
+per lock file: `claim_single_process` makes a second worker fail at startup instead of
+silently serving its own share of the counts.
+"""
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from agent_demo_framework.core.tracing import token_usage
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the (unlabelled) value at scrape time instead of tracking it."""
+        self._function = function
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines for the tracked values."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        if self._function is not None:
+            lines.append(f"{self.name} {_format_value(self._function())}")
+        else:
+            lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the block; an exception adds status="error" if the
+        histogram has a status label (and status="ok" otherwise)."""
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            if "status" in self.labelnames:
+                labels["status"] = status
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> float:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0.0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(count)}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+_process_lock: Any = None
+
+
+def claim_single_process(path: str) -> None:
+    """
+    Hold an exclusive lock on `path` for the life of the process; raises RuntimeError if
+    another process (e.g. a second uvicorn worker) already holds it. An empty path skips
+    the check, as do platforms without flock.
+    """
+    global _process_lock
+    if not path or _process_lock is not None:
+        return
+    try:
+        import fcntl
+    except ImportError:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handle = open(path, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        raise RuntimeError(
+            f"Another process holds the metrics lock {path}. Metrics are kept per process, so "
+            "run a single worker (uvicorn --workers 1), scale with more instances, or set METRICS_ENABLED=false."
+        ) from None
+    _process_lock = handle
+
+GRAPH_NODE_SECONDS = registry.histogram(
+    "agent_graph_node_duration_seconds", "Time spent in a LangGraph node.", ("agent", "node", "status")
+)
+TOOL_SECONDS = registry.histogram(
+    "agent_tool_duration_seconds", "Time spent in a tool invocation.", ("tool", "status")
+)
+LLM_CALL_SECONDS = registry.histogram(
+    "agent_llm_call_duration_seconds", "Latency of model calls by call site.", ("site", "status")
+)
+TOOL_CACHE_REQUESTS = registry.counter(
+    "agent_tool_cache_requests_total",
+    "Tool result cache lookups by outcome (memory_hit, shared_hit, db_hit, miss, error).",
+    ("tool", "result"),
+)
+TOOL_CALLS_DEDUPLICATED = registry.counter(
+    "agent_tool_calls_deduplicated_total",
+    "Tool calls answered from an identical earlier call in the same graph run.",
+    ("tool",),
+)
+SUPERVISOR_ITERATIONS = registry.counter(
+    "healthcare_supervisor_iterations_total", "Healthcare supervisor node executions.", ("task_type",)
+)
+PREFETCH_TOOL_CALLS = registry.counter(
+    "healthcare_prefetch_tool_calls_total", "Tool calls made speculatively before the graph runs.", ("tool", "status")
+)
+ROUTING_DECISIONS = registry.counter(
+    "healthcare_routing_decisions_total",
+    "Routing decisions by source (local classifier, LLM, or fallback after an LLM failure).",
+    ("source", "task_type"),
+)
+ROUTING_LOCAL_CONFIDENCE = registry.histogram(
+    "healthcare_routing_local_confidence",
+    "Confidence of the local routing classifier, accepted or not.",
+    buckets=(0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0),
+)
+ROUTING_SHADOW_CHECKS = registry.counter(
+    "healthcare_routing_shadow_checks_total", "Local routing decisions re-checked by the LLM.", ("agreed",)
+)
+ROUTING_SPECULATIONS = registry.counter(
+    "healthcare_routing_speculations_total",
+    "Turns routed by the LLM in concurrent mode: speculative run kept, discarded after a misroute, or not started.",
+    ("outcome",),
+)
+STREAMS_CANCELLED = registry.counter(
+    "chat_streams_cancelled_total",
+    "Streaming runs cancelled before finishing (disconnect: seen by polling; aborted: closed by the server).",
+    ("agent_type", "reason"),
+)
+CANCELLED_TOKENS_AVOIDED = registry.counter(
+    "chat_cancelled_tokens_avoided_total",
+    "Estimated model tokens not spent because a streaming run was cancelled.",
+    ("agent_type",),
+)
+ADMISSION_QUEUE_SECONDS = registry.histogram(
+    "chat_admission_queue_seconds",
+    "Time a chat turn waited for an agent slot, by outcome (admitted, timeout, cancelled).",
+    ("agent", "outcome"),
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+ADMISSION_REJECTED = registry.counter(
+    "chat_admission_rejected_total", "Chat turns turned away (queue_full: 429, timeout: 503).", ("agent", "reason")
+)
+ADMISSION_ACTIVE = registry.gauge("chat_admission_active", "Chat turns holding an agent slot.", ("agent",))
+ADMISSION_QUEUED = registry.gauge("chat_admission_queued", "Chat turns waiting for an agent slot.", ("agent",))
+SINGLE_FLIGHT_REQUESTS = registry.counter(
+    "chat_single_flight_requests_total",
+    "Chat turns under single-flight: leaders start a run, followers share an identical running one.",
+    ("agent", "kind", "role"),
+)
+ACTIVE_STREAMS = registry.gauge("chat_active_streams", "SSE chat streams currently open.")
+ACTIVE_WEBSOCKETS = registry.gauge("chat_active_websockets", "WebSocket chat connections currently open.")
+SESSION_CACHE_SESSIONS = registry.gauge("session_cache_sessions", "Sessions held in the in-memory history cache.")
+SESSION_CACHE_BYTES = registry.gauge("session_cache_resident_bytes", "Estimated bytes held by the session cache.")
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Times graph nodes and tool calls from LangChain callbacks. Pass it in the run config
+    (`callbacks=[...]`); it only keeps start times for runs that are still open.
+    """
+
+    run_inline = True
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self._open: Dict[UUID, Tuple[Histogram, Dict[str, str], float]] = {}
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node run itself; nested runnables inherit the same metadata
+        if node and kwargs.get("name") == node:
+            self._open[run_id] = (GRAPH_NODE_SECONDS, {"agent": self.agent, "node": node}, time.perf_counter())
+
+    def on_tool_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        self._open[run_id] = (TOOL_SECONDS, {"tool": name}, time.perf_counter())
+
+    def _finish(self, run_id: UUID, status: str) -> None:
+        entry = self._open.pop(run_id, None)
+        if entry is not None:
+            histogram, labels, start = entry
+            histogram.observe(time.perf_counter() - start, status=status, **labels)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "ok")
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "error")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "ok")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "error")
+
+
+class TokenMeter(BaseCallbackHandler):
+    """Sums input and output tokens of every model call made while it is the current meter."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.tokens = 0
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = token_usage(response)
+        self.tokens += (usage.get("input_tokens") or 0) + (usage.get("output_tokens") or 0)
+
+
+# LangChain attaches the current meter to every run configured in this context (and its children)
+current_token_meter: ContextVar[Optional[TokenMeter]] = ContextVar("current_token_meter", default=None)
+register_configure_hook(current_token_meter, inheritable=True)
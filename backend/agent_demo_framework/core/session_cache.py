@@ -0,0 +1,155 @@
+"""Bounded in-memory cache for per-session message history."""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from langchain_core.messages import BaseMessage
+
+# Rough per-message cost of the BaseMessage object itself, on top of its content
+MESSAGE_OVERHEAD_BYTES = 500
+
+
+def estimate_message_bytes(message: BaseMessage) -> int:
+    content = message.content
+    size = len(content) if isinstance(content, str) else len(str(content))
+    if getattr(message, "tool_calls", None):
+        size += len(str(message.tool_calls))
+    return size + MESSAGE_OVERHEAD_BYTES
+
+
+@dataclass
+class _Entry:
+    messages: List[BaseMessage]
+    size: int
+    last_access: float
+    # Backing-store version the messages reflect, and when that was last confirmed
+    version: Optional[int] = None
+    checked_at: float = 0.0
+
+
+@dataclass
+class SessionCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: Dict[str, int] = field(default_factory=lambda: {"lru": 0, "ttl": 0, "stale": 0})
+    trimmed_messages: int = 0
+
+
+class SessionCache:
+    """LRU cache of session histories with idle expiry and a per-session byte budget.
+
+    - At most `max_sessions` entries; the least recently used session is evicted first.
+    - Entries idle for longer than `ttl_seconds` are dropped (checked lazily on access and
+      from the LRU end on every write).
+    - A session's oldest messages are trimmed once its estimated size exceeds
+      `max_bytes_per_session`; the newest message is always kept.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_bytes_per_session: int):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes_per_session = max_bytes_per_session
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._resident_bytes = 0
+        self.stats = SessionCacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._resident_bytes
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.last_access > self.ttl_seconds
+
+    def _remove(self, session_id: str, reason: Optional[str] = None) -> None:
+        entry = self._entries.pop(session_id)
+        self._resident_bytes -= entry.size
+        if reason:
+            self.stats.evictions[reason] += 1
+
+    def get(self, session_id: str) -> Optional[List[BaseMessage]]:
+        """Return the cached history (not a copy) and mark the session as recently used."""
+        entry = self._entries.get(session_id)
+        now = time.monotonic()
+        if entry is not None and self._expired(entry, now):
+            self._remove(session_id, "ttl")
+            entry = None
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        entry.last_access = now
+        self._entries.move_to_end(session_id)
+        return entry.messages
+
+    def peek(self, session_id: str) -> Optional[List[BaseMessage]]:
+        """Like `get` for internal bookkeeping: no hit/miss counting and no LRU refresh."""
+        entry = self._entries.get(session_id)
+        if entry is None or self._expired(entry, time.monotonic()):
+            return None
+        return entry.messages
+
+    def put(self, session_id: str, messages: List[BaseMessage], version: Optional[int] = None) -> None:
+        """Store a session's history. Without `version` the entry keeps the one it had."""
+        sizes = [estimate_message_bytes(msg) for msg in messages]
+        total = sum(sizes)
+        start = 0
+        while total > self.max_bytes_per_session and start < len(messages) - 1:
+            total -= sizes[start]
+            start += 1
+        self.stats.trimmed_messages += start
+
+        now = time.monotonic()
+        checked_at = now
+        if session_id in self._entries:
+            if version is None:
+                version, checked_at = self._entries[session_id].version, self._entries[session_id].checked_at
+            self._remove(session_id)
+        self._entries[session_id] = _Entry(
+            messages=messages[start:], size=total, last_access=now, version=version, checked_at=checked_at,
+        )
+        self._resident_bytes += total
+        self._evict()
+
+    def pop(self, session_id: str, reason: Optional[str] = None) -> None:
+        if session_id in self._entries:
+            self._remove(session_id, reason)
+
+    def validation(self, session_id: str) -> Optional[Tuple[Optional[int], float]]:
+        """(version, monotonic time it was last confirmed) of a cached session, or None."""
+        entry = self._entries.get(session_id)
+        return None if entry is None else (entry.version, entry.checked_at)
+
+    def confirm(self, session_id: str, version: int) -> None:
+        """Record that a cached session matches `version` of the backing store as of now."""
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            entry.version = version
+            entry.checked_at = time.monotonic()
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        # Entries are in access order, so expired ones are all at the front
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if not self._expired(entry, now):
+                break
+            self._remove(session_id, "ttl")
+        while len(self._entries) > self.max_sessions:
+            self._remove(next(iter(self._entries)), "lru")
+
+    def snapshot(self) -> dict:
+        """Counters for monitoring and pod sizing."""
+        return {
+            "sessions": len(self._entries),
+            "resident_bytes": self._resident_bytes,
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "evictions": dict(self.stats.evictions),
+            "trimmed_messages": self.stats.trimmed_messages,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "max_bytes_per_session": self.max_bytes_per_session,
+        }
@@ -0,0 +1,203 @@
+"""Single-flight execution: identical concurrent chat turns share one agent run."""
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+from langchain_core.messages import BaseMessage
+from agent_demo_framework.core.admission import Slot
+from agent_demo_framework.core.events import get_event_logger
+from agent_demo_framework.core.metrics import SINGLE_FLIGHT_REQUESTS
+
+flight_events = get_event_logger("api.single_flight")
+
+
+def flight_key(kind: str, agent: str, message: str, history: Sequence[BaseMessage]) -> str:
+    """Key for a turn: agent, whitespace-collapsed casefolded message, and a fingerprint of the history."""
+    digest = hashlib.sha256(" ".join(message.split()).casefold().encode("utf-8"))
+    for item in history:
+        digest.update(json.dumps([item.type, item.content], sort_keys=True, default=str).encode("utf-8"))
+    return f"{kind}:{agent}:{digest.hexdigest()[:32]}"
+
+
+class FlightCancelled(Exception):
+    """The shared run was cancelled before it finished, so its attached turns are incomplete."""
+
+
+class _StreamFlight:
+    """One shared stream run. Events are kept so a subscriber that joins late replays them first."""
+
+    def __init__(self, key: str, slot: Slot):
+        self.key = key
+        self.slot = slot
+        self.events: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def _notify(self) -> None:
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    async def run(self, source: AsyncIterator[Any], on_finish: Callable[["_StreamFlight"], None]) -> None:
+        try:
+            async for event in source:
+                self.events.append(event)
+                self._notify()
+        except asyncio.CancelledError:
+            # Anyone still attached must not take the partial stream for a complete one
+            self.error = FlightCancelled(f"The shared run for {self.key} was cancelled")
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+            self._notify()
+            self.slot.release()
+            on_finish(self)
+
+
+class StreamSubscription:
+    """
+    One turn attached to a stream run, iterated like the run's event stream. It counts as a
+    subscriber from the moment it is created until it reaches the end of the run or `close()`
+    is called, whether or not it has been iterated yet; `close` is idempotent.
+    """
+
+    def __init__(self, flight: _StreamFlight, on_last_leave: Callable[[_StreamFlight], None]):
+        self._flight = flight
+        self._on_last_leave = on_last_leave
+        self._position = 0
+        self._closed = False
+        flight.subscribers += 1
+
+    def __aiter__(self) -> "StreamSubscription":
+        return self
+
+    async def __anext__(self) -> Any:
+        flight = self._flight
+        while not self._closed:
+            if self._position < len(flight.events):
+                self._position += 1
+                return flight.events[self._position - 1]
+            if flight.finished:
+                self.close()
+                if flight.error is not None:
+                    raise flight.error
+                break
+            await flight._wakeup.wait()
+        raise StopAsyncIteration
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._flight.subscribers -= 1
+        if self._flight.subscribers == 0 and not self._flight.finished:
+            self._on_last_leave(self._flight)
+
+
+class _CallFlight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs identical concurrent turns once. The first turn for a key (the leader) takes an
+    agent slot through `acquire` and starts the run in its own task. Turns that arrive while
+    it is running (followers) attach to it without a slot of their own: for streams they
+    replay the events so far and then receive new ones as they arrive; for plain calls they
+    await the same result. The run is cancelled once every attached turn has gone, and a
+    turn arriving after the run has finished starts a new one. A run cancelled any other way
+    (e.g. at shutdown) fails the turns still attached with FlightCancelled.
+    """
+
+    def __init__(self):
+        self._streams: Dict[str, _StreamFlight] = {}
+        self._calls: Dict[str, _CallFlight] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._streams or key in self._calls
+
+    def _record(self, key: str, role: str) -> None:
+        kind, agent, _ = key.split(":", 2)
+        SINGLE_FLIGHT_REQUESTS.inc(agent=agent, kind=kind, role=role)
+        if role == "follower":
+            flight_events.info("joined", key=key)
+
+    async def stream(
+        self,
+        key: str,
+        source: Callable[[], AsyncIterator[Any]],
+        acquire: Callable[[], Awaitable[Slot]],
+    ) -> StreamSubscription:
+        """
+        Subscribe to the run for `key`, starting `source()` if none is running. `acquire` may
+        raise. The caller must iterate the subscription to its end or `close()` it.
+        """
+        flight = self._streams.get(key)
+        if flight is None:
+            slot = await acquire()
+            # An identical turn may have started the run while this one waited for a slot
+            flight = self._streams.get(key)
+            if flight is None:
+                flight = self._streams[key] = _StreamFlight(key, slot)
+                flight.task = asyncio.create_task(flight.run(source(), self._stream_finished))
+                self._record(key, "leader")
+                return StreamSubscription(flight, self._stream_abandoned)
+            slot.release()
+        self._record(key, "follower")
+        return StreamSubscription(flight, self._stream_abandoned)
+
+    def _stream_finished(self, flight: _StreamFlight) -> None:
+        if self._streams.get(flight.key) is flight:
+            del self._streams[flight.key]
+
+    def _stream_abandoned(self, flight: _StreamFlight) -> None:
+        # Nobody is listening any more; later identical turns start a fresh run
+        self._stream_finished(flight)
+        flight.task.cancel()
+
+    async def call(self, key: str, fn: Callable[[], Awaitable[Any]], acquire: Callable[[], Awaitable[Slot]]) -> Any:
+        """Result of the run for `key`, starting `fn()` if none is running. `acquire` may raise."""
+        flight = self._calls.get(key)
+        if flight is None:
+            slot = await acquire()
+            flight = self._calls.get(key)
+            if flight is None:
+                flight = self._calls[key] = _CallFlight(asyncio.create_task(self._run_call(key, fn, slot)))
+                self._record(key, "leader")
+            else:
+                slot.release()
+                self._record(key, "follower")
+        else:
+            self._record(key, "follower")
+
+        flight.waiters += 1
+        try:
+            # Unlike awaiting the task, wait() never cancels it and raises CancelledError only
+            # when this turn itself is cancelled; a cancelled run is reported separately below
+            await asyncio.wait((flight.task,))
+            if flight.task.cancelled():
+                raise FlightCancelled(f"The shared run for {key} was cancelled")
+            return flight.task.result()
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                if self._calls.get(key) is flight:
+                    del self._calls[key]
+                flight.task.cancel()
+
+    async def _run_call(self, key: str, fn: Callable[[], Awaitable[Any]], slot: Slot) -> Any:
+        try:
+            return await fn()
+        finally:
+            slot.release()
+            if key in self._calls and self._calls[key].task is asyncio.current_task():
+                del self._calls[key]
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,341 @@
+"""Lightweight trace spans exported as OTLP/JSON to a collector or a local file."""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from agent_demo_framework.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: int = SPAN_KIND_INTERNAL
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: int = STATUS_OK
+    status_message: str = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"[:500]
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span], service_name: str) -> dict:
+    """An OTLP/JSON ExportTraceServiceRequest for the given spans."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "agent_demo_framework"},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                        "name": span.name,
+                        "kind": span.kind,
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+                        "status": {"code": span.status, **({"message": span.status_message} if span.status_message else {})},
+                    }
+                    for span in spans
+                ],
+            }],
+        }]
+    }
+
+
+class Tracer:
+    """Creates spans and exports finished ones in the background.
+
+    Disabled unless TRACING_ENABLED is set, in which case `span()` is a cheap no-op.
+    TRACING_EXPORTER picks the sink: "file" appends one OTLP/JSON request per line to
+    TRACING_FILE_PATH (readable by the collector's otlpjsonfile receiver); "otlp" POSTs
+    to TRACING_OTLP_ENDPOINT/v1/traces.
+    """
+
+    def __init__(self):
+        self._finished: List[Span] = []
+        self._exporter_task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.TRACING_ENABLED
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[Span] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Span:
+        parent = parent if parent is not None else _current_span.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            kind=kind,
+            attributes={k: v for k, v in (attributes or {}).items() if v is not None},
+        )
+
+    def end_span(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        self._finished.append(span)
+        overflow = len(self._finished) - settings.TRACING_MAX_QUEUE
+        if overflow > 0:
+            del self._finished[:overflow]
+        self._ensure_exporter()
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Optional[Span]]:
+        """Run the block inside a child of the current span (yields None when tracing is off)."""
+        if not self.enabled:
+            yield None
+            return
+        span = self.start_span(name, kind=kind, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Exited from a different context (e.g. an async generator closed elsewhere)
+                pass
+            self.end_span(span)
+
+    def _ensure_exporter(self) -> None:
+        if self._exporter_task is not None and not self._exporter_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._exporter_task = loop.create_task(self._run_exporter())
+
+    async def _run_exporter(self) -> None:
+        while self._finished:
+            await asyncio.sleep(settings.TRACING_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self) -> None:
+        batch, self._finished = self._finished, []
+        if not batch:
+            return
+        payload = to_otlp(batch, settings.TRACING_SERVICE_NAME)
+        try:
+            if settings.TRACING_EXPORTER == "otlp":
+                await self._post(payload)
+            else:
+                await asyncio.to_thread(self._append_file, json.dumps(payload))
+        except Exception as e:
+            logger.warning(f"Dropping {len(batch)} spans, export failed: {e}")
+
+    async def _post(self, payload: dict) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=5.0)
+        url = settings.TRACING_OTLP_ENDPOINT.rstrip("/") + "/v1/traces"
+        response = await self._client.post(url, json=payload)
+        response.raise_for_status()
+
+    def _append_file(self, line: str) -> None:
+        directory = os.path.dirname(settings.TRACING_FILE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(settings.TRACING_FILE_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def aclose(self) -> None:
+        if self._exporter_task is not None:
+            self._exporter_task.cancel()
+            await asyncio.gather(self._exporter_task, return_exceptions=True)
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+tracer = Tracer()
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Opens spans for graph nodes, tools and chat model calls from LangChain callbacks,
+    nested under the span that was current when the graph run started.
+    """
+
+    run_inline = True
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self._spans: Dict[UUID, Span] = {}
+        # Nearest traced ancestor for every run we have seen, so nested runnables nest correctly
+        self._parents: Dict[UUID, Optional[Span]] = {}
+
+    def _parent_for(self, parent_run_id: Optional[UUID]) -> Optional[Span]:
+        if parent_run_id is None:
+            return _current_span.get()
+        return self._spans.get(parent_run_id) or self._parents.get(parent_run_id)
+
+    def _open(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind: int, attributes: dict) -> None:
+        parent = self._parent_for(parent_run_id)
+        self._spans[run_id] = tracer.start_span(name, parent=parent, kind=kind, attributes=attributes)
+
+    def _close(self, run_id: UUID, error: Optional[BaseException] = None) -> Optional[Span]:
+        self._parents.pop(run_id, None)
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            if error is not None:
+                span.set_error(error)
+            tracer.end_span(span)
+        return span
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        name = kwargs.get("name")
+        if parent_run_id is None:
+            attributes = {"agent": self.agent, "thread_id": (metadata or {}).get("thread_id")}
+            if isinstance(inputs, dict) and isinstance(inputs.get("messages"), list):
+                attributes["input.messages"] = len(inputs["messages"])
+            self._open(run_id, None, f"graph {name or self.agent}", SPAN_KIND_INTERNAL, attributes)
+        elif node and name == node:
+            attributes = {"agent": self.agent, "langgraph.node": node, "langgraph.step": (metadata or {}).get("langgraph_step")}
+            if isinstance(inputs, dict) and isinstance(inputs.get("messages"), list):
+                attributes["input.messages"] = len(inputs["messages"])
+            self._open(run_id, parent_run_id, f"node {node}", SPAN_KIND_INTERNAL, attributes)
+        else:
+            self._parents[run_id] = self._parent_for(parent_run_id)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.get(run_id)
+        if span is not None and isinstance(outputs, dict) and isinstance(outputs.get("messages"), list):
+            span.set_attribute("output.messages", len(outputs["messages"]))
+        self._close(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._close(run_id, error)
+
+    def on_tool_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        self._open(run_id, parent_run_id, f"tool {name}", SPAN_KIND_INTERNAL, {"tool.name": name, "tool.input_chars": len(input_str or "")})
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.get(run_id)
+        if span is not None:
+            span.set_attribute("tool.output_chars", len(str(getattr(output, "content", output))))
+        self._close(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._close(run_id, error)
+
+    def on_chat_model_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        attributes = {
+            "gen_ai.request.model": (metadata or {}).get("ls_model_name"),
+            "gen_ai.prompt.messages": len(messages[0]) if messages else 0,
+            "langgraph.node": (metadata or {}).get("langgraph_node"),
+        }
+        self._open(run_id, parent_run_id, "llm chat", SPAN_KIND_CLIENT, attributes)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.get(run_id)
+        if span is not None:
+            usage = token_usage(response)
+            span.set_attribute("gen_ai.usage.input_tokens", usage.get("input_tokens"))
+            span.set_attribute("gen_ai.usage.output_tokens", usage.get("output_tokens"))
+        self._close(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._close(run_id, error)
+
+
+def token_usage(response: Any) -> Dict[str, int]:
+    """Input/output token counts from an LLMResult (usage metadata or provider token_usage)."""
+    try:
+        message = response.generations[0][0].message
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            return {"input_tokens": usage.get("input_tokens"), "output_tokens": usage.get("output_tokens")}
+    except (AttributeError, IndexError):
+        pass
+    token_usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    return {"input_tokens": token_usage.get("prompt_tokens"), "output_tokens": token_usage.get("completion_tokens")}
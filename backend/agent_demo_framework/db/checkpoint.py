@@ -0,0 +1,23 @@
+"""LangGraph checkpoint storage for resumable agent threads."""
+import os
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from agent_demo_framework.core.config import settings
+
+
+def create_checkpointer() -> AsyncSqliteSaver:
+    """Create a SQLite-backed checkpointer bound to the running event loop.
+
+    The connection is opened lazily by the saver on first use, so this only needs to be
+    called from inside a running loop; close it with `close_checkpointer` on shutdown.
+    """
+    path = settings.HEALTHCARE_CHECKPOINT_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return AsyncSqliteSaver(aiosqlite.connect(path))
+
+
+async def close_checkpointer(checkpointer: AsyncSqliteSaver) -> None:
+    # No-op if the connection was never opened
+    await checkpointer.conn.close()
@@ -0,0 +1,128 @@
+"""Policy decisions persisted to the policy_decisions table."""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from agent_demo_framework.core.metrics import TOOL_CACHE_REQUESTS
+from agent_demo_framework.db.database import AsyncSessionLocal
+from agent_demo_framework.models.models import PolicyDecision
+
+logger = logging.getLogger(__name__)
+
+# Decisions recorded for one request under different policy versions that are checked per lookup
+MAX_VERSIONS_CHECKED = 5
+# Hits are counted in memory and written once this many have accumulated (and at shutdown)
+HIT_FLUSH_BATCH = 50
+
+
+class PolicyDecisionStore:
+    """
+    policy_check decisions keyed by request fingerprint and a content hash of the policy
+    files they were evaluated against (the policy index plus the selected policies).
+
+    A lookup recomputes the hash of each stored decision's policies from the files on disk,
+    so editing any of them makes the old decision unreachable without an explicit purge.
+    Database errors are logged and treated as a miss; the cache never fails a check.
+
+    A hit only reads: hit counts and times are kept in memory and written in one batch
+    every HIT_FLUSH_BATCH hits and on `close()`, so a crash loses at most one batch of stats.
+    """
+
+    def __init__(self):
+        # decision id -> (hits not yet written, time of the latest one)
+        self._hits: Dict[int, Tuple[int, datetime]] = {}
+        self._pending_hits = 0
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def lookup(
+        self,
+        fingerprint: str,
+        content_hash: Callable[[List[str]], str],
+    ) -> Optional[Tuple[str, List[str]]]:
+        """Return (result, policies) of a decision still valid for the current files."""
+        try:
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(
+                    select(PolicyDecision)
+                    .where(PolicyDecision.fingerprint == fingerprint)
+                    .order_by(PolicyDecision.id.desc())
+                    .limit(MAX_VERSIONS_CHECKED)
+                )).scalars().all()
+                # Decisions under different versions often share a policy set; hash each once
+                hashes: Dict[Tuple[str, ...], str] = {}
+                for row in rows:
+                    policies = tuple(row.policies or [])
+                    if policies not in hashes:
+                        hashes[policies] = content_hash(list(policies))
+                    if row.corpus_hash != hashes[policies]:
+                        continue
+                    self._record_hit(row.id)
+                    TOOL_CACHE_REQUESTS.inc(tool="policy_check", result="db_hit")
+                    return row.result, list(policies)
+        except SQLAlchemyError as e:
+            logger.warning(f"Policy decision lookup failed: {e}")
+            TOOL_CACHE_REQUESTS.inc(tool="policy_check", result="error")
+            return None
+        TOOL_CACHE_REQUESTS.inc(tool="policy_check", result="miss")
+        return None
+
+    def _record_hit(self, decision_id: int) -> None:
+        count, _ = self._hits.get(decision_id, (0, None))
+        self._hits[decision_id] = (count + 1, datetime.now(timezone.utc))
+        self._pending_hits += 1
+        if self._pending_hits >= HIT_FLUSH_BATCH and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush_hits())
+
+    async def flush_hits(self) -> None:
+        """Write the hit counts recorded since the last flush in one transaction."""
+        hits, self._hits, self._pending_hits = self._hits, {}, 0
+        if not hits:
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                for decision_id, (count, last_hit_at) in hits.items():
+                    await session.execute(
+                        update(PolicyDecision)
+                        .where(PolicyDecision.id == decision_id)
+                        .values(hits=PolicyDecision.hits + count, last_hit_at=last_hit_at)
+                    )
+                await session.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Policy decision hit update failed: {e}")
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush_hits()
+
+    async def store(
+        self,
+        fingerprint: str,
+        corpus_hash: str,
+        request_type: str,
+        details: str,
+        policies: List[str],
+        result: str,
+    ) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                session.add(PolicyDecision(
+                    fingerprint=fingerprint,
+                    corpus_hash=corpus_hash,
+                    request_type=request_type[:255],
+                    details=details,
+                    policies=list(policies),
+                    result=result,
+                    hits=0,
+                ))
+                await session.commit()
+        except IntegrityError:
+            # A concurrent check stored the same decision first
+            pass
+        except SQLAlchemyError as e:
+            logger.warning(f"Policy decision store failed: {e}")
+
+
+policy_decisions = PolicyDecisionStore()
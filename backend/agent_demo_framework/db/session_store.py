@@ -0,0 +1,340 @@
+"""Conversation history persisted to the conversations/messages tables."""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from sqlalchemy import func, select, update
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.history import is_summary
+from agent_demo_framework.core.metrics import SESSION_CACHE_BYTES, SESSION_CACHE_SESSIONS
+from agent_demo_framework.core.session_cache import SessionCache
+from agent_demo_framework.db.database import AsyncSessionLocal
+from agent_demo_framework.models.models import Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+_ROLE_BY_TYPE = {"human": "user", "ai": "assistant", "system": "system"}
+_MESSAGE_BY_ROLE = {"user": HumanMessage, "assistant": AIMessage, "system": SystemMessage}
+
+PendingMessage = Tuple[str, BaseMessage, Optional[Dict[str, Any]]]
+
+
+def message_to_role(message: BaseMessage) -> str:
+    return _ROLE_BY_TYPE.get(message.type, "assistant")
+
+
+def role_to_message(role: str, content: str) -> BaseMessage:
+    return _MESSAGE_BY_ROLE.get(role, AIMessage)(content=content)
+
+
+class SessionStore:
+    """Write-behind session history store.
+
+    Reads are served from a bounded in-process cache (see SessionCache) and the database is
+    the source of truth. Appends update a cached session immediately and queue rows for a
+    background task that inserts them in batches, so the chat path never waits on SQLite for
+    a write.
+
+    Consistency: each cached session remembers the id of the newest message row it reflects.
+    A cache hit returns the cached copy at once; if that id was last confirmed more than
+    SESSION_CACHE_REVALIDATE_SECONDS ago, the hit also starts a background check against the
+    database (one indexed MAX query), which drops the entry when another worker has written
+    to the session so the next read reloads it. Turns appended by this worker are visible to
+    it at once; another worker's turns show up once they are flushed (up to
+    SESSION_WRITE_INTERVAL), the revalidation interval has passed, and one read has triggered
+    the check. With a negative interval a cached session is only refreshed after it is
+    evicted, which is only safe when one worker serves each session (e.g. sticky routing).
+    """
+
+    def __init__(self):
+        self.cache = SessionCache(
+            max_sessions=settings.SESSION_CACHE_MAX_SESSIONS,
+            ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+            max_bytes_per_session=settings.SESSION_CACHE_MAX_BYTES_PER_SESSION,
+        )
+        self._pending: List[PendingMessage] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._closing = False
+        # Batches started, and the one being written: a load must not straddle a write, or
+        # it could miss rows that have left the queue but are not committed yet
+        self._flushes = 0
+        self._writing: Optional[asyncio.Event] = None
+        self._revalidations: Dict[str, asyncio.Task] = {}
+
+    @property
+    def pending_writes(self) -> int:
+        return len(self._pending)
+
+    @property
+    def max_messages(self) -> int:
+        return settings.SESSION_MAX_HISTORY_MESSAGES
+
+    async def get_history(self, session_id: str) -> List[BaseMessage]:
+        """Return a copy of the recent history for a session."""
+        cached = self.cache.get(session_id)
+        if cached is not None:
+            self._schedule_revalidation(session_id)
+            return cached.copy()
+
+        while True:
+            flushes = self._flushes
+            history, version = await self._load(session_id)
+            if self._writing is None and self._flushes == flushes:
+                break
+            # A batch was written while we read; wait for it to commit and read again
+            if self._writing is not None:
+                await self._writing.wait()
+        # Rows still waiting in the write queue are not in the database yet
+        history.extend(msg for sid, msg, _ in self._pending if sid == session_id)
+        history = self._cap(history)
+        # A concurrent read may have populated the entry while we were loading
+        cached = self.cache.peek(session_id)
+        if cached is not None:
+            return cached.copy()
+        self.cache.put(session_id, history, version)
+        return history.copy()
+
+    def _schedule_revalidation(self, session_id: str) -> None:
+        """Check a cached session against the database off the request path, once it is due."""
+        interval = settings.SESSION_CACHE_REVALIDATE_SECONDS
+        validation = self.cache.validation(session_id)
+        if not settings.SESSION_PERSISTENCE_ENABLED or interval < 0 or validation is None:
+            return
+        version, checked_at = validation
+        if session_id in self._revalidations or (version is not None and time.monotonic() - checked_at < interval):
+            return
+        task = asyncio.get_running_loop().create_task(self._revalidate(session_id, version))
+        self._revalidations[session_id] = task
+        task.add_done_callback(lambda _: self._revalidations.pop(session_id, None))
+
+    async def _revalidate(self, session_id: str, version: Optional[int]) -> None:
+        try:
+            latest = await self._latest_version(session_id)
+        except Exception as e:
+            logger.error(f"Failed to revalidate session history for {session_id}: {e}")
+            return
+        validation = self.cache.validation(session_id)
+        if validation is None or validation[0] != version:
+            # Reloaded or confirmed by a flush while the query ran
+            return
+        if latest == version:
+            self.cache.confirm(session_id, latest)
+        else:
+            self.cache.pop(session_id, "stale")
+
+    def append(
+        self,
+        session_id: str,
+        messages: List[BaseMessage],
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Add messages to a session's history and schedule them for persistence.
+
+        A session that is not cached (e.g. evicted since its history was read) stays uncached:
+        the next `get_history` rebuilds it from the database plus the write queue, whereas
+        caching only these messages would hide the earlier turns.
+        """
+        current = self.cache.peek(session_id)
+        if current is not None:
+            self.cache.put(session_id, self._cap(current + list(messages)))
+        self._enqueue(session_id, messages, metadata)
+
+    def replace_prefix(
+        self,
+        session_id: str,
+        prefix: List[BaseMessage],
+        summary: BaseMessage,
+    ) -> bool:
+        """Swap the leading `prefix` of a session's history for a summary message.
+
+        Skipped (returns False) if the cached history no longer starts with `prefix`, e.g.
+        because it was evicted or trimmed while the summary was being generated.
+        """
+        current = self.cache.peek(session_id)
+        if current is None or len(current) < len(prefix) or any(a is not b for a, b in zip(current, prefix)):
+            return False
+        self.cache.put(session_id, [summary] + current[len(prefix):])
+        # The messages after the prefix were written before the summary row; record how many
+        # so a reload from the database can reassemble summary + kept messages
+        self._enqueue(session_id, [summary], {"kind": "summary", "kept": len(current) - len(prefix)})
+        return True
+
+    def _cap(self, history: List[BaseMessage]) -> List[BaseMessage]:
+        """Apply the message-count cap, never dropping a leading summary."""
+        if len(history) <= self.max_messages:
+            return history
+        if is_summary(history[0]):
+            return [history[0]] + history[-(self.max_messages - 1):]
+        return history[-self.max_messages:]
+
+    def _enqueue(
+        self,
+        session_id: str,
+        messages: List[BaseMessage],
+        metadata: Optional[Dict[str, Any]],
+    ) -> None:
+        if not settings.SESSION_PERSISTENCE_ENABLED:
+            return
+        self._pending.extend((session_id, msg, metadata) for msg in messages)
+        overflow = len(self._pending) - settings.SESSION_WRITE_QUEUE_MAX
+        if overflow > 0:
+            logger.warning("Session write queue full, dropping %d oldest messages", overflow)
+            del self._pending[:overflow]
+        self._ensure_writer()
+        if len(self._pending) >= settings.SESSION_WRITE_BATCH_SIZE:
+            self._wakeup.set()
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and not self._writer.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.get_running_loop().create_task(self._run_writer())
+
+    async def _run_writer(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.SESSION_WRITE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending:
+                await self.flush()
+
+    async def flush(self) -> None:
+        """Write all queued messages in one transaction."""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self._flushes += 1
+        self._writing = writing = asyncio.Event()
+        try:
+            await self._write(batch)
+        except Exception as e:
+            logger.error(f"Failed to persist {len(batch)} session messages: {e}")
+            # Put the batch back in front of anything queued meanwhile; retried on the next tick
+            self._pending = batch + self._pending
+        finally:
+            self._writing = None
+            writing.set()
+
+    async def close(self) -> None:
+        """Stop the background writer and flush whatever is still queued."""
+        self._closing = True
+        revalidations = list(self._revalidations.values())
+        for task in revalidations:
+            task.cancel()
+        await asyncio.gather(*revalidations, return_exceptions=True)
+        if self._writer is not None:
+            self._wakeup.set()
+            await self._writer
+            self._writer = None
+        await self.flush()
+        self._closing = False
+
+    async def _latest_version(self, session_id: str) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(func.max(Message.id))
+                .join(Conversation, Conversation.id == Message.conversation_id)
+                .where(Conversation.session_id == session_id)
+            )
+            return result.scalar() or 0
+
+    async def _load(self, session_id: str) -> Tuple[List[BaseMessage], Optional[int]]:
+        """Recent history and its version (newest row id, 0 for none; None if the load failed)."""
+        if not settings.SESSION_PERSISTENCE_ENABLED:
+            return [], None
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(Message.role, Message.content, Message.metadata_json, Message.id)
+                    .join(Conversation, Conversation.id == Message.conversation_id)
+                    .where(Conversation.session_id == session_id)
+                    .order_by(Message.id.desc())
+                    .limit(self.max_messages)
+                )
+                rows = result.all()
+        except Exception as e:
+            logger.error(f"Failed to load session history for {session_id}: {e}")
+            return [], None
+        version = rows[0][3] if rows else 0
+        rows.reverse()
+
+        # Resume from the latest rolling summary: the summary, the messages it kept (written
+        # before it, possibly interleaved with older summary rows) and everything after it
+        def is_summary_row(row) -> bool:
+            return (row[2] or {}).get("kind") == "summary"
+
+        for i in range(len(rows) - 1, -1, -1):
+            if not is_summary_row(rows[i]):
+                continue
+            kept = [row for row in rows[:i] if not is_summary_row(row)]
+            kept = kept[len(kept) - int(rows[i][2].get("kept", 0)):]
+            rows = [rows[i]] + kept + rows[i + 1:]
+            break
+        return [role_to_message(row[0], row[1]) for row in rows], version
+
+    async def _write(self, batch: List[PendingMessage]) -> None:
+        session_ids = {sid for sid, _, _ in batch}
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Conversation.session_id, Conversation.id).where(Conversation.session_id.in_(session_ids))
+            )
+            conversation_ids = dict(result.all())
+
+            new_conversations = {}
+            for sid, msg, _ in batch:
+                if sid in conversation_ids or sid in new_conversations:
+                    continue
+                title = str(msg.content)[:255] if isinstance(msg, HumanMessage) else None
+                new_conversations[sid] = Conversation(session_id=sid, title=title)
+            if new_conversations:
+                db.add_all(new_conversations.values())
+                await db.flush()
+                conversation_ids.update({sid: conv.id for sid, conv in new_conversations.items()})
+
+            rows = [
+                Message(
+                    conversation_id=conversation_ids[sid],
+                    role=message_to_role(msg),
+                    content=str(msg.content),
+                    metadata_json=metadata,
+                )
+                for sid, msg, metadata in batch
+            ]
+            db.add_all(rows)
+            await db.flush()
+            # Newest row per conversation before this batch, to tell whether another worker
+            # wrote to a session since this worker cached it
+            result = await db.execute(
+                select(Message.conversation_id, func.max(Message.id))
+                .where(Message.conversation_id.in_(conversation_ids.values()))
+                .where(Message.id.notin_([row.id for row in rows]))
+                .group_by(Message.conversation_id)
+            )
+            previous = dict(result.all())
+            await db.execute(
+                update(Conversation)
+                .where(Conversation.id.in_(conversation_ids.values()))
+                .values(updated_at=func.now())
+            )
+            await db.commit()
+
+        written: Dict[str, int] = {}
+        for (sid, _, _), row in zip(batch, rows):
+            written[sid] = max(written.get(sid, 0), row.id)
+        for sid, version in written.items():
+            validation = self.cache.validation(sid)
+            if validation is None:
+                continue
+            if validation[0] == previous.get(conversation_ids[sid], 0):
+                self.cache.confirm(sid, version)
+            else:
+                self.cache.pop(sid, "stale")
+
+
+session_store = SessionStore()
+SESSION_CACHE_SESSIONS.set_function(lambda: len(session_store.cache))
+SESSION_CACHE_BYTES.set_function(lambda: session_store.cache.resident_bytes)
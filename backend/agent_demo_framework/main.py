@@ -1,14 +1,43 @@
 """Main FastAPI application entry point."""
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from agent_demo_framework.core.config import settings
 from agent_demo_framework.api import router as api_router
+from agent_demo_framework.db.session_store import session_store
+from agent_demo_framework.db.policy_cache import policy_decisions
+from agent_demo_framework.core.history import history_summarizer
+from agent_demo_framework.core.llm import llm_registry
+from agent_demo_framework.core.metrics import claim_single_process, registry as metrics_registry
+from agent_demo_framework.core.tracing import tracer
+from agent_demo_framework.agents import AgentFactory
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks."""
+    if settings.METRICS_ENABLED:
+        # The metrics registry is per process; refuse to start a second worker
+        claim_single_process(settings.METRICS_LOCK_PATH)
+    # Open pooled connections to the model endpoint before the first request arrives
+    await llm_registry.warm_up()
+    yield
+    await history_summarizer.aclose()
+    # Persist any session turns still waiting in the write-behind queue
+    await session_store.close()
+    await policy_decisions.close()
+    await AgentFactory.aclose_all()
+    await llm_registry.aclose()
+    await tracer.aclose()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="FastAPI backend for LangGraph agents with async support",
     version="1.0.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -38,3 +67,11 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
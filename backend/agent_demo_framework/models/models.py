@@ -1,5 +1,5 @@
 """Database models."""
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, UniqueConstraint
 from sqlalchemy.sql import func
 from agent_demo_framework.db.database import Base
 
@@ -43,3 +43,21 @@ class AgentExecution(Base):
     error_message = Column(Text, nullable=True)
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class PolicyDecision(Base):
+    """Cached policy_check decision for a request against a specific version of the policy files."""
+    
+    __tablename__ = "policy_decisions"
+    __table_args__ = (UniqueConstraint("fingerprint", "corpus_hash", name="uq_policy_decisions_fingerprint_corpus"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(64), index=True, nullable=False)  # normalized request_type + details
+    corpus_hash = Column(String(64), nullable=False)  # policy index + selected policy files
+    request_type = Column(String(255), nullable=False)
+    details = Column(Text, nullable=False)
+    policies = Column(JSON, nullable=False)
+    result = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_hit_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,190 @@
+"""Two-tier cache for deterministic tool results: an in-process LRU over a shared SQLite table."""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from ...core.config import settings
+from ...core.metrics import TOOL_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Expired rows are purged from the shared table once every this many writes
+PURGE_EVERY_WRITES = 200
+
+
+def normalize_value(value: Any) -> Any:
+    """Strings trimmed, whitespace collapsed and casefolded, recursively; None dropped from dicts."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {k: normalize_value(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    return value
+
+
+def normalize_args(args: dict) -> str:
+    """Canonical JSON for tool arguments (see `normalize_value`)."""
+    return json.dumps(normalize_value(args), sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolResultCache:
+    """
+    Results keyed by tool name and normalized arguments, tagged with the version of the
+    dataset they were computed from.
+
+    The memory tier is a per-process LRU of TOOL_CACHE_MAX_ENTRIES entries. The shared tier
+    is a SQLite table at TOOL_CACHE_SHARED_PATH (WAL mode, one connection per thread) that
+    every worker process reads and writes, so a result computed by one worker is a hit in
+    the others. Entries expire after TOOL_CACHE_TTL_SECONDS, and an entry whose dataset
+    version differs from the current one is treated as a miss and overwritten.
+    """
+
+    def __init__(self):
+        self._memory: "OrderedDict[str, tuple[str, float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self._shared_failed = False
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        path = settings.TOOL_CACHE_SHARED_PATH
+        if not path or self._shared_failed:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache ("
+                "key TEXT PRIMARY KEY, tool TEXT NOT NULL, version TEXT NOT NULL, "
+                "value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared tool cache disabled, cannot open {path}: {e}")
+            self._shared_failed = True
+            return None
+        self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(tool: str, args: dict) -> str:
+        digest = hashlib.sha256(normalize_args(args).encode("utf-8")).hexdigest()[:32]
+        return f"{tool}:{digest}"
+
+    def get(self, tool: str, key: str, version: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at, entry_version = entry
+                if expires_at > now and entry_version == version:
+                    self._memory.move_to_end(key)
+                    TOOL_CACHE_REQUESTS.inc(tool=tool, result="memory_hit")
+                    return value
+                del self._memory[key]
+
+        conn = self._connection()
+        if conn is not None:
+            try:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM tool_cache WHERE key = ? AND version = ? AND expires_at > ?",
+                    (key, version, now),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Shared tool cache read failed: {e}")
+                row = None
+            if row is not None:
+                self._remember(key, row[0], row[1], version)
+                TOOL_CACHE_REQUESTS.inc(tool=tool, result="shared_hit")
+                return row[0]
+
+        TOOL_CACHE_REQUESTS.inc(tool=tool, result="miss")
+        return None
+
+    def put(self, tool: str, key: str, version: str, value: str) -> None:
+        expires_at = time.time() + settings.TOOL_CACHE_TTL_SECONDS
+        self._remember(key, value, expires_at, version)
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO tool_cache (key, tool, version, value, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, tool, version, value, expires_at),
+            )
+            self._writes += 1
+            if self._writes % PURGE_EVERY_WRITES == 0:
+                conn.execute("DELETE FROM tool_cache WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning(f"Shared tool cache write failed: {e}")
+
+    def _remember(self, key: str, value: str, expires_at: float, version: str) -> None:
+        with self._lock:
+            self._memory[key] = (value, expires_at, version)
+            self._memory.move_to_end(key)
+            while len(self._memory) > settings.TOOL_CACHE_MAX_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop both tiers (the shared tier for every worker)."""
+        with self._lock:
+            self._memory.clear()
+        conn = self._connection()
+        if conn is not None:
+            try:
+                conn.execute("DELETE FROM tool_cache")
+            except sqlite3.Error as e:
+                logger.warning(f"Shared tool cache clear failed: {e}")
+
+    def cached(self, tool: str, version: Callable[[], Any]) -> Callable:
+        """
+        Decorate a tool function (below `@tool`) so its results are cached. `version` returns
+        the current version of the data the tool reads; if it raises, the call is not cached.
+
+        Calls that differ only in case or spacing share an entry, so on a miss the tool runs on
+        the normalized arguments: the stored output then reads the same for every caller
+        instead of echoing the first caller's spelling. The tool's own lookups must ignore
+        case and spacing, as the healthcare tools' do.
+        """
+        def decorator(func: Callable[..., str]) -> Callable[..., str]:
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> str:
+                if not settings.TOOL_CACHE_ENABLED:
+                    return func(*args, **kwargs)
+                try:
+                    current = str(version())
+                except Exception:
+                    return func(*args, **kwargs)
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = self.key(tool, bound.arguments)
+                value = self.get(tool, key, current)
+                if value is None:
+                    for name, argument in bound.arguments.items():
+                        bound.arguments[name] = normalize_value(argument)
+                    value = func(*bound.args, **bound.kwargs)
+                    self.put(tool, key, current, value)
+                return value
+
+            return wrapper
+
+        return decorator
+
+
+tool_cache = ToolResultCache()
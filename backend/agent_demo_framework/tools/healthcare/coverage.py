@@ -1,26 +1,21 @@
 import json
-import os
 from langchain_core.tools import tool
-from ...core.config import settings
+from . import store
+from .cache import tool_cache
 
 @tool("coverage_check")
+@tool_cache.cached("coverage_check", version=lambda: store.coverage.version)
 def coverage_check(insurance_plan: str, service: str) -> str:
     """
     Return mock coverage details: copay, pre-auth, limitations for a given insurance plan and service.
     """
     plan = insurance_plan.strip().upper()
     svc = service.strip().lower()
-    db_path = os.path.join(settings.DATA_DIR, "mock_db", "coverage.json")
-    if not os.path.exists(db_path):
-        return json.dumps({"error": f"Coverage database not found at {db_path}"}, indent=2)
-
     try:
-        with open(db_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as e:
-        return json.dumps({"error": f"Error reading coverage database: {e}"}, indent=2)
+        matrix = store.coverage.get()
+    except store.MockDataError as e:
+        return json.dumps({"error": str(e)}, indent=2)
 
-    matrix = data.get("plans", {})
     if plan not in matrix:
         return json.dumps({"insurance_plan": plan, "service": service, "note": "Unknown plan in mock coverage DB."}, indent=2)
 
@@ -1,24 +1,20 @@
 import json
-import os
 from langchain_core.tools import tool
-from ...core.config import settings
+from . import store
+from .cache import tool_cache
 
 @tool("medication_info")
+@tool_cache.cached("medication_info", version=lambda: store.medications.version)
 def medication_info(drug: str) -> str:
     """
     Return high-level medication info (class, common use, notes).
     """
-    db_path = os.path.join(settings.DATA_DIR, "mock_db", "meds.json")
-    if not os.path.exists(db_path):
-        return json.dumps({"error": f"Medication database not found at {db_path}"}, indent=2)
-
     try:
-        with open(db_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as e:
-        return json.dumps({"error": f"Error reading medication database: {e}"}, indent=2)
+        data = store.medications.get()
+    except store.MockDataError as e:
+        return json.dumps({"error": str(e)}, indent=2)
 
-    k = drug.strip().lower()
-    if k in data:
-        return json.dumps({"item": drug, **data[k]}, indent=2)
+    info = data.get(drug.strip().lower())
+    if info is not None:
+        return json.dumps({"item": drug, **info}, indent=2)
     return json.dumps({"item": drug, "note": "Not found in mock medication database."}, indent=2)
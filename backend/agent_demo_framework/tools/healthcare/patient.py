@@ -1,7 +1,9 @@
 import json
-import os
 from langchain_core.tools import tool
-from ...core.config import settings
+from . import store
+from ...core.events import get_event_logger
+
+events = get_event_logger("tools.patient_record")
 
 @tool("patient_record")
 def patient_record(patient_id: str) -> str:
@@ -9,10 +11,6 @@ def patient_record(patient_id: str) -> str:
     Retrieve patient demographics, conditions, allergies, current meds, insurance plan,
     and preferred clinic details.
     """
-    db_path = os.path.join(settings.DATA_DIR, "mock_db", "patients.json")
-    if not os.path.exists(db_path):
-        return f"Error: Patient database not found at {db_path}"
-    
     # Normalization
     raw_id = str(patient_id).strip().upper()
     # Try to extract PT- if missing (common if user just types 1001)
@@ -22,16 +20,16 @@ def patient_record(patient_id: str) -> str:
         target_id = raw_id
 
     try:
-        print(f"DEBUG: patient_record tool called with ID: {target_id} (original: {patient_id})")
-        with open(db_path, "r", encoding="utf-8") as f:
-            records = json.load(f)
-    except Exception as e:
-        print(f"DEBUG: Error reading patient database: {e}")
-        return f"Error reading patient database: {e}"
+        events.debug("lookup", patient_id=target_id, original=patient_id)
+        records = store.patients.get()
+    except store.MockDataError as e:
+        events.warning("mock_data_error", error=str(e))
+        return f"Error: {e}"
         
-    if target_id in records:
-        print(f"DEBUG: Found record for {target_id}")
-        return json.dumps(records[target_id], indent=2)
+    record = records.by_id.get(target_id)
+    if record is not None:
+        events.debug("found", patient_id=target_id)
+        return json.dumps(record, indent=2)
     
-    print(f"DEBUG: Record NOT found for {patient_id}")
-    return f"Patient '{patient_id}' not found. Available IDs: {', '.join(records.keys())}"
+    events.info("not_found", patient_id=patient_id)
+    return f"Patient '{patient_id}' not found. Available IDs: {records.available_ids}"
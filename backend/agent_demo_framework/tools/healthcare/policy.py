@@ -1,61 +1,163 @@
+import hashlib
 import json
-import os
+import logging
 import re
+import threading
+import time
 from pathlib import Path
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage
 from langchain_core.tools import tool
 from ...core.config import settings
+from ...core.llm import llm_registry
+from ...core.metrics import LLM_CALL_SECONDS
+from ...db.policy_cache import policy_decisions
+from .cache import normalize_args
 
-def load_policy_readme(policies_dir: Path) -> str:
-    readme_path = policies_dir / "README.md"
-    if not readme_path.exists():
-        return "(No policy index found)"
-    try:
-        return readme_path.read_text(encoding="utf-8")
-    except Exception as e:
-        return f"(Error loading policy index: {e})"
+logger = logging.getLogger(__name__)
 
-def load_specific_policies(policies_dir: Path, policy_files: list[str]) -> str:
-    if not policies_dir.exists():
-        return "(Policies directory not found)"
 
-    policy_content = []
-    for policy_name in policy_files:
-        clean_name = policy_name.strip().lower().replace(" ", "_")
-        if clean_name.endswith(".md"):
-            clean_name = clean_name[:-3]
+class PolicyCorpus:
+    """
+    In-memory cache of the policy markdown files.
+
+    Each file is read once and kept until its mtime changes, so a policy check only
+    pays for a stat() per file instead of a full read.
+    """
+
+    def __init__(self, policies_dir: Path):
+        self.policies_dir = policies_dir
+        self._files: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def _read(self, path: Path) -> str | None:
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            with self._lock:
+                self._files.pop(path.name, None)
+            return None
+
+        cached = self._files.get(path.name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        content = path.read_text(encoding="utf-8")
+        with self._lock:
+            self._files[path.name] = (mtime, content)
+        return content
 
-        policy_file = policies_dir / f"{clean_name}.md"
-        if policy_file.exists():
+    def readme(self) -> str:
+        try:
+            content = self._read(self.policies_dir / "README.md")
+        except Exception as e:
+            return f"(Error loading policy index: {e})"
+        return content if content is not None else "(No policy index found)"
+
+    @staticmethod
+    def clean_name(policy_name: str) -> str:
+        clean_name = str(policy_name).strip().lower().replace(" ", "_")
+        return clean_name[:-3] if clean_name.endswith(".md") else clean_name
+
+    def content_hash(self, policy_files: list[str]) -> str:
+        """SHA-256 over the policy index and the given policy files, as currently on disk."""
+        digest = hashlib.sha256()
+        for name in ["README"] + sorted({self.clean_name(p) for p in policy_files}):
             try:
-                content = policy_file.read_text(encoding="utf-8")
-                policy_content.append(f"--- {clean_name.upper()} ---\n{content}")
+                content = self._read(self.policies_dir / f"{name}.md")
+            except Exception:
+                content = None
+            digest.update(f"{name}\0{content if content is not None else '(missing)'}\0".encode("utf-8"))
+        return digest.hexdigest()
+
+    def policies(self, policy_files: list[str]) -> str:
+        if not self.policies_dir.exists():
+            return "(Policies directory not found)"
+
+        policy_content = []
+        for policy_name in policy_files:
+            clean_name = self.clean_name(policy_name)
+
+            try:
+                content = self._read(self.policies_dir / f"{clean_name}.md")
             except Exception as e:
                 policy_content.append(f"--- {clean_name.upper()} ---\n(Error loading: {e})")
-        else:
-            policy_content.append(f"--- {clean_name.upper()} ---\n(Policy file not found: {clean_name})")
+                continue
+            if content is None:
+                policy_content.append(f"--- {clean_name.upper()} ---\n(Policy file not found: {clean_name})")
+            else:
+                policy_content.append(f"--- {clean_name.upper()} ---\n{content}")
+
+        return "\n\n".join(policy_content) if policy_content else "(No policies loaded)"
+
+
+_corpora: dict[Path, PolicyCorpus] = {}
 
-    return "\n\n".join(policy_content) if policy_content else "(No policies loaded)"
 
-@tool("policy_check")
-def policy_check(request_type: str, details: str) -> str:
+def get_policy_corpus(policies_dir: Path | None = None) -> PolicyCorpus:
+    policies_dir = policies_dir or Path(settings.DATA_DIR) / "policies"
+    corpus = _corpora.get(policies_dir)
+    if corpus is None:
+        corpus = _corpora.setdefault(policies_dir, PolicyCorpus(policies_dir))
+    return corpus
+
+
+def load_policy_readme(policies_dir: Path) -> str:
+    return get_policy_corpus(policies_dir).readme()
+
+
+def load_specific_policies(policies_dir: Path, policy_files: list[str]) -> str:
+    return get_policy_corpus(policies_dir).policies(policy_files)
+
+
+def get_policy_llm() -> ChatOpenAI:
+    """Policy LLM from the shared registry, so checks reuse the pooled HTTP connections."""
+    return llm_registry.get_chat_model(temperature=0)
+
+
+def _strip_json_fence(content: str | None) -> str:
+    return re.sub(r"```json\s*", "", content or "").replace("```", "").strip()
+
+
+def policy_fingerprint(request_type: str, details: str) -> str:
+    """Identity of a request, ignoring case and whitespace differences."""
+    normalized = normalize_args({"request_type": request_type, "details": details})
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _is_decision(result: str) -> bool:
+    """Only well-formed decisions are cached, never fallbacks or unparseable replies."""
+    try:
+        payload = json.loads(result)
+    except ValueError:
+        return False
+    return isinstance(payload, dict) and payload.get("status") in ("PASS", "REQUIRES_REVIEW", "BLOCKED")
+
+
+@tool("policy_check", response_format="content_and_artifact")
+async def policy_check(request_type: str, details: str) -> tuple[str, dict]:
     """
     Check proposed appointments/medications/services against healthcare policy criteria.
     Returns structured JSON with status (PASS/REQUIRES_REVIEW/BLOCKED), violations, and requirements.
     """
-    policies_dir = Path(settings.DATA_DIR) / "policies"
-    
-    # Initialize a clean LLM for policy checks
-    policy_llm = ChatOpenAI(
-        model=settings.OPENAI_MODEL_NAME,
-        temperature=0,
-        openai_api_key=settings.OPENAI_API_KEY,
-        openai_api_base=settings.OPENAI_API_BASE,
-    )
+    corpus = get_policy_corpus()
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+
+    # Phase 0: A decision for the same request against unchanged policy files is reused
+    fingerprint = policy_fingerprint(request_type, details)
+    if settings.POLICY_CACHE_ENABLED:
+        cached = await policy_decisions.lookup(fingerprint, corpus.content_hash)
+        if cached is not None:
+            result, selected_policies = cached
+            timings["total_ms"] = (time.perf_counter() - started) * 1000
+            logger.info("policy_check %s: cached decision in %.1fms policies=%s", request_type, timings["total_ms"], selected_policies)
+            return result, {"policies": selected_policies, "timings": timings, "cached": True}
+
+    policy_llm = get_policy_llm()
 
     # Phase 1: Identify relevant policies from README
-    readme_content = load_policy_readme(policies_dir)
+    readme_content = corpus.readme()
     selection_prompt = f"""Identify which policy file basenames are relevant to this request.
 ## POLICY INDEX:
 {readme_content}
@@ -65,17 +167,19 @@ def policy_check(request_type: str, details: str) -> str:
 
 Return ONLY a JSON array of filenames (no extension). Example: ["controlled_substances"]"""
 
+    phase_start = time.perf_counter()
     try:
-        selection_resp = policy_llm.invoke([SystemMessage(content=selection_prompt)])
-        selection_content = re.sub(r"```json\s*", "", selection_resp.content or "").replace("```", "").strip()
-        selected_policies = json.loads(selection_content)
+        with LLM_CALL_SECONDS.time(site="policy_selection"):
+            selection_resp = await policy_llm.ainvoke([SystemMessage(content=selection_prompt)])
+        selected_policies = json.loads(_strip_json_fence(selection_resp.content))
         if not isinstance(selected_policies, list):
              selected_policies = ["visit_type_restrictions"]
     except Exception:
         selected_policies = ["visit_type_restrictions"]
+    timings["selection_ms"] = (time.perf_counter() - phase_start) * 1000
 
     # Phase 2: Evaluate against selected policies
-    policy_text = load_specific_policies(policies_dir, selected_policies)
+    policy_text = corpus.policies(selected_policies)
     evaluation_prompt = f"""Evaluate this healthcare request against the policies provided.
 ## POLICIES:
 {policy_text}
@@ -90,9 +194,25 @@ Return ONLY JSON:
     "requirements": []
 }}"""
 
+    phase_start = time.perf_counter()
+    cacheable = False
     try:
-        eval_resp = policy_llm.invoke([SystemMessage(content=evaluation_prompt)])
-        eval_content = re.sub(r"```json\s*", "", eval_resp.content or "").replace("```", "").strip()
-        return eval_content
+        with LLM_CALL_SECONDS.time(site="policy_evaluation"):
+            eval_resp = await policy_llm.ainvoke([SystemMessage(content=evaluation_prompt)])
+        result = _strip_json_fence(eval_resp.content)
+        cacheable = _is_decision(result)
     except Exception as e:
-        return json.dumps({"status": "REQUIRES_REVIEW", "error": str(e)})
+        result = json.dumps({"status": "REQUIRES_REVIEW", "error": str(e)})
+    timings["evaluation_ms"] = (time.perf_counter() - phase_start) * 1000
+    timings["total_ms"] = (time.perf_counter() - started) * 1000
+
+    logger.info(
+        "policy_check %s: selection=%.1fms evaluation=%.1fms total=%.1fms policies=%s",
+        request_type, timings["selection_ms"], timings["evaluation_ms"], timings["total_ms"], selected_policies,
+    )
+    if settings.POLICY_CACHE_ENABLED and cacheable:
+        await policy_decisions.store(
+            fingerprint, corpus.content_hash(selected_policies), request_type, details, selected_policies, result
+        )
+    # Timings ride along as the ToolMessage artifact so they never reach the model prompt.
+    return result, {"policies": selected_policies, "timings": timings}
@@ -1,49 +1,65 @@
 import json
-import os
+from datetime import date
+from typing import Optional
 from langchain_core.tools import tool
-from ...core.config import settings
+from . import store
+from .cache import tool_cache
+from .slots import SLOT_TIME_FORMAT
+
+MAX_SLOTS = 20
+
+
+def _slots_version() -> str:
+    # Relative windows move with the reference date, which falls back to today
+    index = store.appointments.get()
+    return f"{store.appointments.version}:{index.reference_date or date.today()}"
+
 
 @tool("appointment_slots")
-def appointment_slots(clinic: str, specialty: str, date_range: str = "next_7_days") -> str:
+@tool_cache.cached("appointment_slots", version=_slots_version)
+def appointment_slots(
+    clinic: str,
+    specialty: str,
+    date_range: str = "next_7_days",
+    slot_type: Optional[str] = None,
+    provider: Optional[str] = None,
+    limit: int = 5,
+) -> str:
     """
     Return available appointment slots for a clinic and specialty within a date range.
-    date_range examples: 'next_7_days', 'next_14_days'.
+    date_range examples: 'next_7_days', 'next two weeks', '2026-01-20', '2026-01-20..2026-01-27'.
+    Use clinic='any' to get the earliest slots for the specialty across all clinics.
+    Optionally filter by slot_type ('in_person' or 'telehealth') and provider name.
     """
-    db_path = os.path.join(settings.DATA_DIR, "mock_db", "appointments.json")
-    if not os.path.exists(db_path):
-        return json.dumps({"error": f"Appointments database not found at {db_path}"}, indent=2)
-
     try:
-        with open(db_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as e:
-        return json.dumps({"error": f"Error reading appointments database: {e}"}, indent=2)
-
-    entries = data.get("appointments", [])
-    matches = [
-        entry for entry in entries
-        if entry.get("clinic") == clinic
-        and entry.get("specialty") == specialty
-        and entry.get("date_range") == date_range
-    ]
-
-    if matches:
-        entry = matches[0]
+        index = store.appointments.get()
+    except store.MockDataError as e:
+        return json.dumps({"error": str(e)}, indent=2)
+
+    result = {"clinic": clinic, "specialty": specialty, "date_range": date_range}
+    window = index.resolve_window(date_range)
+    if window is None:
         return json.dumps(
-            {
-                "clinic": clinic,
-                "specialty": specialty,
-                "date_range": date_range,
-                "slots": entry.get("slots", []),
-            },
+            {**result, "slots": [], "note": "Unrecognized date_range. Use e.g. 'next_7_days' or 'YYYY-MM-DD..YYYY-MM-DD'."},
             indent=2,
         )
+    start, end = window
+    result["window"] = {"start": start.strftime(SLOT_TIME_FORMAT), "end": end.strftime(SLOT_TIME_FORMAT)}
+    limit = max(1, min(limit, MAX_SLOTS))
+
+    cross_clinic = clinic.strip().lower() in ("", "any", "all")
+    if cross_clinic:
+        slots = index.earliest(specialty, limit, start, end, slot_type=slot_type, provider=provider)
+    else:
+        slots = index.window(clinic, specialty, start, end, slot_type=slot_type, provider=provider)[:limit]
+
+    if slots:
+        result["slots"] = [slot.to_dict(include_clinic=cross_clinic) for slot in slots]
+        return json.dumps(result, indent=2)
 
     return json.dumps(
         {
-            "clinic": clinic,
-            "specialty": specialty,
-            "date_range": date_range,
+            **result,
             "slots": [],
             "note": "No slots found for that combination.",
         },
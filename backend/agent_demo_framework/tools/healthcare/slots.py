@@ -0,0 +1,184 @@
+"""Time-ordered index over appointment slots with window and cross-clinic queries."""
+import heapq
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from typing import Iterator, Optional
+
+SLOT_TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+_WORD_NUMBERS = {
+    "one": 1, "a": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "ten": 10, "fourteen": 14, "thirty": 30,
+}
+_RELATIVE_RE = re.compile(r"^(?:next|within(?: the)? next)[\s_]+(\w+)[\s_]+(day|week|month)s?$")
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def normalize_key(value: Optional[str]) -> str:
+    """Case/spacing-insensitive form used for clinic, specialty, type and provider lookups."""
+    return re.sub(r"[\s_-]+", "_", (value or "").strip().lower())
+
+
+@dataclass(frozen=True, order=True)
+class Slot:
+    start: datetime
+    clinic: str = field(compare=False)
+    specialty: str = field(compare=False)
+    type: str = field(compare=False)
+    provider: str = field(compare=False)
+
+    def to_dict(self, include_clinic: bool = False) -> dict:
+        slot = {"type": self.type, "start": self.start.strftime(SLOT_TIME_FORMAT), "provider": self.provider}
+        if include_clinic:
+            slot["clinic"] = self.clinic
+        return slot
+
+
+def _slot_start(slot: Slot) -> datetime:
+    return slot.start
+
+
+class _Series:
+    """Slots already sorted by start time, with a parallel list of starts for bisection."""
+
+    __slots__ = ("starts", "slots")
+
+    def __init__(self, slots: list[Slot]):
+        self.slots = slots
+        self.starts = [slot.start for slot in self.slots]
+
+    def window(self, start: datetime, end: datetime) -> Iterator[Slot]:
+        i = bisect_left(self.starts, start)
+        while i < len(self.slots) and self.slots[i].start < end:
+            yield self.slots[i]
+            i += 1
+
+
+class SlotIndex:
+    """
+    Appointment slots indexed by (clinic, specialty) and by the optional type/provider filters.
+
+    Every slot is filed under four series keyed by (clinic, specialty, type, provider), with
+    None standing for "any", so a filtered query is a bisect into one pre-sorted list instead
+    of a scan. Cross-clinic queries k-way merge the per-clinic series of a specialty.
+    """
+
+    def __init__(self, slots: list[Slot], reference_date: Optional[date] = None):
+        self.reference_date = reference_date
+        self.size = len(slots)
+        grouped: dict[tuple, list[Slot]] = {}
+        self._clinics: dict[str, set[str]] = {}
+        # Sort once; grouping preserves the order so every series comes out sorted
+        for slot in sorted(slots, key=_slot_start):
+            clinic, specialty = normalize_key(slot.clinic), normalize_key(slot.specialty)
+            slot_type, provider = normalize_key(slot.type), normalize_key(slot.provider)
+            self._clinics.setdefault(specialty, set()).add(clinic)
+            for key in (
+                (clinic, specialty, None, None),
+                (clinic, specialty, slot_type, None),
+                (clinic, specialty, None, provider),
+                (clinic, specialty, slot_type, provider),
+            ):
+                grouped.setdefault(key, []).append(slot)
+        self._series = {key: _Series(group) for key, group in grouped.items()}
+
+    @classmethod
+    def from_appointments(cls, data: dict, reference_date: Optional[date] = None) -> "SlotIndex":
+        slots = []
+        for entry in data.get("appointments", []):
+            for raw in entry.get("slots", []):
+                try:
+                    start = datetime.fromisoformat(raw["start"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                slots.append(Slot(
+                    start=start,
+                    clinic=entry.get("clinic", ""),
+                    specialty=entry.get("specialty", ""),
+                    type=raw.get("type", ""),
+                    provider=raw.get("provider", ""),
+                ))
+        if reference_date is None and data.get("as_of"):
+            reference_date = date.fromisoformat(data["as_of"])
+        return cls(slots, reference_date=reference_date)
+
+    def _key(self, clinic: str, specialty: str, slot_type: Optional[str], provider: Optional[str]) -> tuple:
+        return (
+            normalize_key(clinic),
+            normalize_key(specialty),
+            normalize_key(slot_type) or None,
+            normalize_key(provider) or None,
+        )
+
+    def window(
+        self,
+        clinic: str,
+        specialty: str,
+        start: datetime,
+        end: datetime,
+        slot_type: Optional[str] = None,
+        provider: Optional[str] = None,
+    ) -> list[Slot]:
+        """Slots at one clinic starting in [start, end), in start order."""
+        series = self._series.get(self._key(clinic, specialty, slot_type, provider))
+        return list(series.window(start, end)) if series else []
+
+    def earliest(
+        self,
+        specialty: str,
+        limit: int,
+        start: datetime,
+        end: datetime,
+        slot_type: Optional[str] = None,
+        provider: Optional[str] = None,
+    ) -> list[Slot]:
+        """The first `limit` slots for a specialty across all clinics, via a heap merge."""
+        specialty_key = normalize_key(specialty)
+        streams = []
+        for clinic in self._clinics.get(specialty_key, ()):
+            series = self._series.get(self._key(clinic, specialty_key, slot_type, provider))
+            if series:
+                streams.append(series.window(start, end))
+        return list(islice(heapq.merge(*streams, key=_slot_start), max(limit, 0)))
+
+    def resolve_window(self, date_range: Optional[str], today: Optional[date] = None) -> Optional[tuple[datetime, datetime]]:
+        """
+        Turn a date_range into a half-open [start, end) window.
+
+        Accepts relative forms ('next_7_days', 'next two weeks', 'within the next 14 days',
+        'today', 'tomorrow', 'this week') and absolute ones ('2026-01-20',
+        '2026-01-20..2026-01-27', '2026-01-20 to 2026-01-27'). Returns None if unparseable.
+        """
+        today = today or self.reference_date or date.today()
+        text = (date_range or "next_7_days").strip().lower()
+
+        dates = _DATE_RE.findall(text)
+        if dates:
+            try:
+                first = date.fromisoformat(dates[0])
+                last = date.fromisoformat(dates[-1])
+            except ValueError:
+                return None
+            return datetime.combine(first, time.min), datetime.combine(last + timedelta(days=1), time.min)
+
+        start = datetime.combine(today, time.min)
+        if text == "today":
+            return start, start + timedelta(days=1)
+        if text == "tomorrow":
+            return start + timedelta(days=1), start + timedelta(days=2)
+        if text in ("this week", "this_week"):
+            return start, start + timedelta(days=7 - today.weekday())
+
+        match = _RELATIVE_RE.match(re.sub(r"\s+", " ", text))
+        if not match:
+            return None
+        amount, unit = match.groups()
+        count = int(amount) if amount.isdigit() else _WORD_NUMBERS.get(amount)
+        if count is None:
+            return None
+        days = count * {"day": 1, "week": 7, "month": 30}[unit]
+        # Include the remainder of today plus the requested number of days
+        return start, start + timedelta(days=days + 1)
@@ -0,0 +1,113 @@
+"""Shared in-memory access layer for the JSON mock databases under DATA_DIR/mock_db."""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Generic, TypeVar
+from ...core.config import settings
+from .slots import SlotIndex
+
+T = TypeVar("T")
+
+
+class MockDataError(Exception):
+    """Raised when a mock dataset is missing or cannot be parsed."""
+
+
+@dataclass(frozen=True)
+class Snapshot(Generic[T]):
+    """An immutable, fully indexed view of one dataset file."""
+    index: T
+    mtime: float
+
+
+class MockDataset(Generic[T]):
+    """
+    A JSON file loaded once into an indexed structure.
+
+    Readers always get a complete snapshot: a reload builds the new index off to the side and
+    swaps it in with a single assignment. The file mtime is checked at most once every
+    MOCK_DB_RELOAD_INTERVAL seconds, so lookups between checks do no disk I/O at all.
+    """
+
+    def __init__(self, filename: str, label: str, build: Callable[[Any], T]):
+        self.filename = filename
+        self.label = label
+        self._build = build
+        self._snapshot: Snapshot[T] | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(settings.DATA_DIR, "mock_db", self.filename)
+
+    def snapshot(self) -> Snapshot[T]:
+        snapshot = self._snapshot
+        interval = settings.MOCK_DB_RELOAD_INTERVAL
+        if snapshot is not None and (interval <= 0 or time.monotonic() - self._checked_at < interval):
+            return snapshot
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._snapshot is not snapshot:
+                return self._snapshot
+            self._checked_at = time.monotonic()
+            path = self.path
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                self._snapshot = None
+                raise MockDataError(f"{self.label} not found at {path}")
+
+            if snapshot is None or snapshot.mtime != mtime:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        index = self._build(json.load(f))
+                except Exception as e:
+                    if snapshot is not None:
+                        # Keep serving the last good copy if a reload catches a half-written file
+                        return snapshot
+                    raise MockDataError(f"Error reading {self.label.lower()}: {e}")
+                self._snapshot = Snapshot(index=index, mtime=mtime)
+            return self._snapshot
+
+    def get(self) -> T:
+        return self.snapshot().index
+
+    @property
+    def version(self) -> float:
+        """Modification time of the currently loaded file; changes on every reload."""
+        return self.snapshot().mtime
+
+
+@dataclass(frozen=True)
+class PatientIndex:
+    by_id: dict[str, dict]
+    available_ids: str
+
+
+def _index_patients(data: dict) -> PatientIndex:
+    by_id = {str(pid).strip().upper(): record for pid, record in data.items()}
+    return PatientIndex(by_id=by_id, available_ids=", ".join(data.keys()))
+
+
+def _index_coverage(data: dict) -> dict[str, dict]:
+    return {str(plan).strip().upper(): services for plan, services in data.get("plans", {}).items()}
+
+
+def _index_meds(data: dict) -> dict[str, dict]:
+    return {str(drug).strip().lower(): info for drug, info in data.items()}
+
+
+def _index_appointments(data: dict) -> SlotIndex:
+    reference = settings.SCHEDULING_REFERENCE_DATE
+    return SlotIndex.from_appointments(data, reference_date=date.fromisoformat(reference) if reference else None)
+
+
+patients: MockDataset[PatientIndex] = MockDataset("patients.json", "Patient database", _index_patients)
+coverage: MockDataset[dict[str, dict]] = MockDataset("coverage.json", "Coverage database", _index_coverage)
+medications: MockDataset[dict[str, dict]] = MockDataset("meds.json", "Medication database", _index_meds)
+appointments: MockDataset[SlotIndex] = MockDataset("appointments.json", "Appointments database", _index_appointments)
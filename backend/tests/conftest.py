@@ -0,0 +1,64 @@
+"""Point the app at a throwaway SQLite database before anything imports the engine."""
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+_db_dir = tempfile.mkdtemp(prefix="agent_demo_tests_")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_db_dir, 'test.db')}"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from agent_demo_framework.db.database import Base, engine
+    from agent_demo_framework import models  # noqa: F401  (registers the tables)
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await engine.dispose()
+
+    asyncio.run(create())
+    yield
+
+
+@pytest.fixture(scope="session")
+def stub_server():
+    """The OpenAI stub (instant latency) served on a free local port for the whole run."""
+    import socket
+    import threading
+    import time
+
+    import uvicorn
+    from agent_demo_framework.cmdline.openai_stub_server import PROFILES, StubResponder, StubServer, create_app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = StubServer(PROFILES["instant"], StubResponder(), seed=0)
+    uvicorn_server = uvicorn.Server(uvicorn.Config(create_app(server), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=uvicorn_server.run, daemon=True)
+    thread.start()
+    while not uvicorn_server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}/v1", server
+    uvicorn_server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def stub_llm(stub_server, monkeypatch):
+    """Point the shared model clients at the stub; returns the StubServer for its stats."""
+    from agent_demo_framework.core.config import settings
+    from agent_demo_framework.core.llm import llm_registry
+
+    base_url, server = stub_server
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "stub")
+    monkeypatch.setattr(settings, "OPENAI_API_BASE", base_url)
+    # Clients are bound to the event loop they were first used on; each test runs its own
+    llm_registry._models.clear()
+    llm_registry._client = llm_registry._async_client = None
+    yield server
+    llm_registry._models.clear()
+    llm_registry._client = llm_registry._async_client = None
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+from agent_demo_framework.agents import AgentFactory
+from agent_demo_framework.api import chat
+from agent_demo_framework.core.admission import AdmissionController
+from agent_demo_framework.schemas import ChatRequest
+
+
+class FakeAgent:
+    def __init__(self):
+        self.streams_started = 0
+
+    def session_independent(self, history):
+        return False
+
+    async def astream_events(self, message, history, session_id=None):
+        self.streams_started += 1
+        yield  # pragma: no cover
+
+
+class FakeRequest:
+    async def is_disconnected(self):
+        return False
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    controller = AdmissionController()
+    monkeypatch.setattr(chat, "admission", controller)
+    return controller
+
+
+def test_slot_is_released_when_the_body_never_runs(monkeypatch, admission):
+    agent = FakeAgent()
+    monkeypatch.setattr(AgentFactory, "get_agent", classmethod(lambda cls, agent_type="default": agent))
+
+    async def scenario():
+        request = ChatRequest(message="hello", agent_type="default")
+        response = await chat.stream_chat(request, FakeRequest())
+        assert admission.snapshot()["conversational"]["active"] == 1
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            # The client is gone before the response starts
+            raise OSError("connection reset")
+
+        scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}}
+        with pytest.raises(ClientDisconnect):
+            await response(scope, receive, send)
+
+    asyncio.run(scenario())
+    assert agent.streams_started == 0
+    assert admission.snapshot()["conversational"]["active"] == 0
+
+
+def test_agent_setup_failure_is_an_error_frame(monkeypatch, admission):
+    def broken(cls, agent_type="default"):
+        raise RuntimeError("agent unavailable")
+
+    monkeypatch.setattr(AgentFactory, "get_agent", classmethod(broken))
+
+    async def scenario():
+        response = await chat.stream_chat(ChatRequest(message="hello"), FakeRequest())
+        return [frame async for frame in response.body_iterator]
+
+    frames = asyncio.run(scenario())
+    assert len(frames) == 1 and frames[0].startswith("event: error")
+    assert "agent unavailable" in frames[0]
+    assert admission.snapshot() == {}
@@ -0,0 +1,89 @@
+"""Checkpointed healthcare threads: resuming an interrupted turn and discarding cancelled runs."""
+import asyncio
+import uuid
+
+import pytest
+
+from agent_demo_framework.agents.healthcare_agent import HealthcareAgent
+from agent_demo_framework.core.config import settings
+
+COORDINATION = "Schedule an MRI for PT-1001 with radiology and check coverage"
+
+
+@pytest.fixture
+def checkpointing(stub_llm, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTHCARE_CHECKPOINT_ENABLED", True)
+    monkeypatch.setattr(settings, "HEALTHCARE_CHECKPOINT_PATH", str(tmp_path / "checkpoints.db"))
+    monkeypatch.setattr(settings, "HEALTHCARE_PREFETCH_ENABLED", False)
+
+
+def run(scenario):
+    async def wrapper():
+        agent = HealthcareAgent()
+        try:
+            return await scenario(agent)
+        finally:
+            await agent.aclose()
+
+    return asyncio.run(wrapper())
+
+
+async def _interrupt(agent, session_id):
+    """Start a turn and stop it after the first graph step."""
+    graph, graph_input, config = await agent._prepare_run(COORDINATION, [], session_id, "coordination", [])
+    await _first_step(graph, graph_input, config)
+    return graph, config
+
+
+async def _first_step(graph, graph_input, config):
+    stream = graph.astream(graph_input, config=config)
+    await stream.__anext__()
+    # Closing explicitly waits for the run's checkpoint writes, which a bare `break` does not
+    await stream.aclose()
+
+
+def test_interrupted_turn_resumes_from_its_checkpoint(checkpointing):
+    session_id = str(uuid.uuid4())
+
+    async def scenario(agent):
+        graph, config = await _interrupt(agent, session_id)
+        assert (await graph.aget_state(config)).next
+
+        # Retrying the same message continues the stored run instead of starting over
+        _, graph_input, _ = await agent._prepare_run(COORDINATION, [], session_id, "coordination", [])
+        assert graph_input is None
+        result = await agent.process(COORDINATION, [], session_id)
+        state = await graph.aget_state({"configurable": {"thread_id": session_id}})
+        return result, state
+
+    result, state = run(scenario)
+    assert result["content"].startswith("Summary:")
+    assert not state.next
+    assert [msg.content for msg in state.values["messages"] if msg.type == "human"] == [COORDINATION]
+
+
+def test_discarding_a_first_run_forgets_the_thread(checkpointing):
+    session_id = str(uuid.uuid4())
+
+    async def scenario(agent):
+        graph, config = await _interrupt(agent, session_id)
+        await agent._discard_run(config)
+        return await graph.aget_state({"configurable": {"thread_id": session_id}})
+
+    assert not run(scenario).values
+
+
+def test_discarding_a_follow_up_run_keeps_earlier_turns(checkpointing):
+    session_id = str(uuid.uuid4())
+
+    async def scenario(agent):
+        await agent.process(COORDINATION, [], session_id)
+        graph, graph_input, config = await agent._prepare_run("What allergies does PT-1001 have?", [], session_id, "general", [])
+        # The follow-up is pinned to the checkpoint it started from
+        assert config["configurable"]["checkpoint_id"]
+        await _first_step(graph, graph_input, config)
+        await agent._discard_run(config)
+        return await graph.aget_state({"configurable": {"thread_id": session_id}})
+
+    state = run(scenario)
+    assert COORDINATION in [msg.content for msg in state.values["messages"] if msg.type == "human"]
@@ -0,0 +1,61 @@
+"""The healthcare graph end to end against the OpenAI stub."""
+import asyncio
+
+from agent_demo_framework.agents.healthcare_agent import HealthcareAgent
+from agent_demo_framework.cmdline.openai_stub_server import StubResponder
+
+COORDINATION = "Schedule an MRI for PT-1001 with radiology and check coverage"
+
+
+def test_stub_answers_the_coordinator_with_a_care_plan_despite_tool_results():
+    reply = StubResponder().respond({
+        "messages": [
+            {"role": "system", "content": "You are a care coordinator. Review the gathered facts from tool outputs."},
+            {"role": "user", "content": COORDINATION},
+            {"role": "assistant", "content": "", "tool_calls": [{"id": "c1", "type": "function", "function": {"name": "patient_record", "arguments": "{}"}}]},
+            {"role": "tool", "tool_call_id": "c1", "content": "{\"name\": \"Jane\"}"},
+        ]
+    })
+    assert reply.content.startswith("Summary:")
+
+
+def test_coordination_turn_runs_triage_tools_and_coordinator(stub_llm):
+    async def scenario():
+        agent = HealthcareAgent()
+        return await agent.process(COORDINATION, [])
+
+    result = asyncio.run(scenario())
+    assert result["content"].startswith("Summary:")
+    assert "Coverage/Instructions" in result["content"]
+
+
+
+def test_streamed_coordination_turn_reports_each_phase(stub_llm):
+    async def scenario():
+        agent = HealthcareAgent()
+        return [event async for event in agent.astream_events(COORDINATION, [])]
+
+    events = asyncio.run(scenario())
+    kinds = [event.type for event in events]
+    assert kinds[0] == "plan"
+    content = "".join(event.content for event in events if event.type == "message")
+    assert content.startswith("Summary:")
+    statuses = [(event.step_id, event.status) for event in events if event.type == "status"]
+    # Triage completes and coordination starts before the answer streams
+    first_message = kinds.index("message")
+    before_answer = [(e.step_id, e.status) for e in events[:first_message] if e.type == "status"]
+    assert ("triage", "completed") in before_answer
+    assert ("coordination", "running") in before_answer
+    assert statuses[-1] == ("coordination", "completed")
+
+
+def test_streamed_general_turn_completes_the_data_agent_step(stub_llm):
+    async def scenario():
+        agent = HealthcareAgent()
+        return [event async for event in agent.astream_events("What allergies does PT-1001 have?", [])]
+
+    events = asyncio.run(scenario())
+    statuses = [(event.step_id, event.status) for event in events if event.type == "status"]
+    assert statuses[0] == ("data_agent", "running")
+    assert statuses[-1] == ("data_agent", "completed")
+    assert "".join(event.content for event in events if event.type == "message")
@@ -0,0 +1,109 @@
+"""Prompt history: the token-budget trim and background summaries replacing the oldest turns."""
+import asyncio
+import uuid
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent_demo_framework.agents.healthcare_agent import HealthcareAgent
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.history import DEFAULT_SUMMARY_INSTRUCTIONS, HistorySummarizer, fit_to_budget, is_summary, make_summary, message_tokens
+from agent_demo_framework.db.session_store import SessionStore
+
+
+def turn(n, words=20):
+    return [HumanMessage(content=f"question {n} " + "word " * words), AIMessage(content=f"answer {n} " + "word " * words)]
+
+
+def contents(history):
+    return [msg.content.split(" ", 2)[:2] for msg in history]
+
+
+def test_fit_to_budget_keeps_the_newest_messages_that_fit():
+    history = turn(1) + turn(2) + turn(3)
+    budget = sum(message_tokens(msg) for msg in turn(3)) + message_tokens(history[3])
+    kept = fit_to_budget(history, budget)
+    # The window would start on answer 2, so that dangling reply is dropped too
+    assert contents(kept) == [["question", "3"], ["answer", "3"]]
+
+
+def test_fit_to_budget_keeps_a_leading_summary_and_the_latest_message():
+    summary = make_summary("Earlier: patient PT-1001 asked about an MRI.")
+    history = [summary] + turn(1) + turn(2, words=500)
+    kept = fit_to_budget(history, budget=10)
+    assert kept[0] is summary
+    # Even over budget, the newest message is always kept
+    assert contents(kept[1:]) == [["answer", "2"]]
+    assert fit_to_budget([], budget=10) == []
+
+
+def test_summary_replaces_the_older_turns(stub_llm, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_PERSISTENCE_ENABLED", False)
+    monkeypatch.setattr(settings, "HISTORY_TOKEN_BUDGET", 50)
+    monkeypatch.setattr(settings, "HISTORY_KEEP_TURNS", 1)
+    session_id = str(uuid.uuid4())
+    store = SessionStore()
+    summarizer = HistorySummarizer()
+
+    async def scenario():
+        store.cache.put(session_id, [])
+        for n in range(1, 4):
+            store.append(session_id, turn(n))
+        summarizer.schedule(store, session_id)
+        await asyncio.gather(*summarizer._tasks.values())
+        return await store.get_history(session_id)
+
+    history = asyncio.run(scenario())
+    assert is_summary(history[0])
+    assert contents(history[1:]) == [["question", "3"], ["answer", "3"]]
+
+
+def test_summary_is_dropped_if_the_history_changed_meanwhile(monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_PERSISTENCE_ENABLED", False)
+    session_id = str(uuid.uuid4())
+    store = SessionStore()
+    store.cache.put(session_id, turn(1) + turn(2))
+    older = store.cache.peek(session_id)[:2]
+    # The entry is evicted and reloaded while the summary is being generated
+    store.cache.put(session_id, turn(1) + turn(2))
+    assert not store.replace_prefix(session_id, older, make_summary("stale"))
+    assert not any(is_summary(msg) for msg in store.cache.peek(session_id))
+
+
+class _Summarizer(HistorySummarizer):
+    """Records the summary prompts instead of calling a model."""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    @property
+    def llm(self):
+        return self
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages[0].content)
+        return AIMessage(content="summary")
+
+
+@pytest.mark.parametrize("instructions, expected", [
+    (None, DEFAULT_SUMMARY_INSTRUCTIONS),
+    (HealthcareAgent.summary_instructions, "patient identifiers"),
+])
+def test_summary_prompt_uses_the_agent_instructions(monkeypatch, instructions, expected):
+    monkeypatch.setattr(settings, "SESSION_PERSISTENCE_ENABLED", False)
+    monkeypatch.setattr(settings, "HISTORY_TOKEN_BUDGET", 50)
+    monkeypatch.setattr(settings, "HISTORY_KEEP_TURNS", 1)
+    session_id = str(uuid.uuid4())
+    store = SessionStore()
+    summarizer = _Summarizer()
+
+    async def scenario():
+        store.cache.put(session_id, turn(1) + turn(2))
+        summarizer.schedule(store, session_id, instructions)
+        await asyncio.gather(*summarizer._tasks.values())
+
+    asyncio.run(scenario())
+    assert expected in summarizer.prompts[0]
+    if instructions is None:
+        assert "healthcare" not in summarizer.prompts[0]
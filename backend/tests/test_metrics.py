@@ -0,0 +1,39 @@
+"""The in-process metrics registry and its single-process guard."""
+import pytest
+
+from agent_demo_framework.core import metrics
+from agent_demo_framework.core.metrics import MetricsRegistry, _Metric, claim_single_process
+
+
+def test_metric_kinds_must_implement_samples():
+    class Incomplete(_Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", "No samples.")
+
+
+def test_registry_renders_the_exposition_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    requests.inc(route="/chat")
+    requests.inc(2, route="/chat")
+    registry.gauge("up", "Whether the app is up.").set_function(lambda: 1)
+    assert registry.render() == (
+        "# HELP requests_total Requests.\n# TYPE requests_total counter\nrequests_total{route=\"/chat\"} 3\n"
+        "# HELP up Whether the app is up.\n# TYPE up gauge\nup 1\n"
+    )
+
+
+def test_a_second_process_cannot_claim_the_metrics_lock(tmp_path, monkeypatch):
+    path = str(tmp_path / "var" / "metrics.lock")
+    monkeypatch.setattr(metrics, "_process_lock", None)
+    claim_single_process(path)
+    first = metrics._process_lock
+    try:
+        # A new open file description behaves like another worker's
+        monkeypatch.setattr(metrics, "_process_lock", None)
+        with pytest.raises(RuntimeError, match="single worker"):
+            claim_single_process(path)
+    finally:
+        first.close()
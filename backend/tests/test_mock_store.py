@@ -0,0 +1,66 @@
+"""MockDataset snapshots: reload on mtime change, throttled checks, last good copy on bad writes."""
+import json
+import os
+
+import pytest
+
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.tools.healthcare.store import MockDataError, MockDataset
+
+
+@pytest.fixture
+def mock_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MOCK_DB_RELOAD_INTERVAL", 0.0001)
+    (tmp_path / "mock_db").mkdir()
+    return tmp_path / "mock_db"
+
+
+def _write(path, data, mtime: float) -> None:
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def _dataset() -> MockDataset:
+    return MockDataset("things.json", "Thing database", lambda data: {k.upper(): v for k, v in data.items()})
+
+
+def test_reloads_when_the_file_mtime_changes(mock_db):
+    path = mock_db / "things.json"
+    _write(path, {"a": 1}, mtime=1_000)
+    dataset = _dataset()
+    first = dataset.snapshot()
+    assert first.index == {"A": 1}
+    assert dataset.snapshot() is first  # unchanged file, same snapshot
+
+    _write(path, {"b": 2}, mtime=2_000)
+    assert dataset.get() == {"B": 2}
+    assert dataset.version == 2_000
+
+
+def test_mtime_is_not_checked_within_the_interval(mock_db, monkeypatch):
+    monkeypatch.setattr(settings, "MOCK_DB_RELOAD_INTERVAL", 3600)
+    path = mock_db / "things.json"
+    _write(path, {"a": 1}, mtime=1_000)
+    dataset = _dataset()
+    assert dataset.get() == {"A": 1}
+    _write(path, {"b": 2}, mtime=2_000)
+    assert dataset.get() == {"A": 1}
+
+
+def test_keeps_the_last_good_snapshot_when_a_reload_fails(mock_db):
+    path = mock_db / "things.json"
+    _write(path, {"a": 1}, mtime=1_000)
+    dataset = _dataset()
+    dataset.get()
+    path.write_text("{\"half\": ", encoding="utf-8")
+    os.utime(path, (2_000, 2_000))
+    assert dataset.get() == {"A": 1}
+
+
+def test_missing_and_unreadable_files_raise(mock_db):
+    with pytest.raises(MockDataError, match="Thing database not found"):
+        _dataset().get()
+    (mock_db / "things.json").write_text("not json", encoding="utf-8")
+    with pytest.raises(MockDataError, match="Error reading thing database"):
+        _dataset().get()
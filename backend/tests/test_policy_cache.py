@@ -0,0 +1,133 @@
+"""Persisted policy_check decisions: invalidation by policy content and batched hit counts."""
+import asyncio
+import os
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from agent_demo_framework.db import policy_cache
+from agent_demo_framework.db.database import AsyncSessionLocal, engine
+from agent_demo_framework.db.policy_cache import PolicyDecisionStore
+from agent_demo_framework.models.models import PolicyDecision
+from agent_demo_framework.tools.healthcare.policy import PolicyCorpus
+
+
+def run(coro):
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            # Connections are bound to the loop that opened them
+            await engine.dispose()
+
+    return asyncio.run(wrapper())
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    (tmp_path / "README.md").write_text("Imaging requests: see imaging_preauth.", encoding="utf-8")
+    (tmp_path / "imaging_preauth.md").write_text("MRI requires prior authorization.", encoding="utf-8")
+    (tmp_path / "telehealth.md").write_text("Video visits are covered.", encoding="utf-8")
+    return PolicyCorpus(tmp_path)
+
+
+def _edit(path, text, mtime):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def _store(store, corpus, fingerprint, policies, result):
+    return store.store(fingerprint, corpus.content_hash(policies), "imaging", "MRI", policies, result)
+
+
+def test_decision_is_reused_until_a_policy_it_used_changes(corpus):
+    store = PolicyDecisionStore()
+    fingerprint = uuid.uuid4().hex
+
+    async def scenario():
+        await _store(store, corpus, fingerprint, ["imaging_preauth"], "requires_review")
+        before = await store.lookup(fingerprint, corpus.content_hash)
+        # Editing an unrelated policy leaves the decision valid
+        _edit(corpus.policies_dir / "telehealth.md", "Video visits need a referral.", mtime=2_000)
+        unrelated = await store.lookup(fingerprint, corpus.content_hash)
+        _edit(corpus.policies_dir / "imaging_preauth.md", "MRI no longer requires authorization.", mtime=3_000)
+        after = await store.lookup(fingerprint, corpus.content_hash)
+        return before, unrelated, after
+
+    before, unrelated, after = run(scenario())
+    assert before == ("requires_review", ["imaging_preauth"])
+    assert unrelated == before
+    assert after is None
+
+
+def test_editing_the_policy_index_invalidates_every_decision(corpus):
+    store = PolicyDecisionStore()
+    fingerprint = uuid.uuid4().hex
+
+    async def scenario():
+        await _store(store, corpus, fingerprint, ["telehealth"], "pass")
+        _edit(corpus.policies_dir / "README.md", "Imaging requests: see imaging_preauth and radiology.", mtime=4_000)
+        return await store.lookup(fingerprint, corpus.content_hash)
+
+    assert run(scenario()) is None
+
+
+def test_newest_decision_for_the_current_files_wins(corpus):
+    store = PolicyDecisionStore()
+    fingerprint = uuid.uuid4().hex
+
+    async def scenario():
+        await _store(store, corpus, fingerprint, ["imaging_preauth"], "requires_review")
+        _edit(corpus.policies_dir / "imaging_preauth.md", "MRI is covered without review.", mtime=5_000)
+        assert await store.lookup(fingerprint, corpus.content_hash) is None
+        await _store(store, corpus, fingerprint, ["imaging_preauth"], "pass")
+        return await store.lookup(fingerprint, corpus.content_hash)
+
+    assert run(scenario()) == ("pass", ["imaging_preauth"])
+
+
+def test_hits_are_written_in_batches(corpus, monkeypatch):
+    monkeypatch.setattr(policy_cache, "HIT_FLUSH_BATCH", 3)
+    store = PolicyDecisionStore()
+    fingerprint = uuid.uuid4().hex
+
+    async def hits():
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(
+                select(PolicyDecision.hits).where(PolicyDecision.fingerprint == fingerprint)
+            )).scalar_one()
+
+    async def scenario():
+        await _store(store, corpus, fingerprint, ["imaging_preauth"], "pass")
+        for _ in range(2):
+            await store.lookup(fingerprint, corpus.content_hash)
+        before_batch = await hits()
+        await store.lookup(fingerprint, corpus.content_hash)
+        await store._flush_task
+        after_batch = await hits()
+        await store.lookup(fingerprint, corpus.content_hash)
+        await store.close()
+        return before_batch, after_batch, await hits()
+
+    assert run(scenario()) == (0, 3, 4)
+
+
+def test_each_policy_set_is_hashed_once_per_lookup(corpus):
+    store = PolicyDecisionStore()
+    fingerprint = uuid.uuid4().hex
+    hashed = []
+
+    def content_hash(policies):
+        hashed.append(policies)
+        return corpus.content_hash(policies)
+
+    async def scenario():
+        for version in range(3):
+            _edit(corpus.policies_dir / "imaging_preauth.md", f"Version {version}.", mtime=6_000 + version)
+            await _store(store, corpus, fingerprint, ["imaging_preauth"], "pass")
+        _edit(corpus.policies_dir / "imaging_preauth.md", "Version 3.", mtime=7_000)
+        return await store.lookup(fingerprint, content_hash)
+
+    assert run(scenario()) is None
+    assert hashed == [["imaging_preauth"]]
@@ -0,0 +1,44 @@
+"""The async policy_check tool and its in-memory policy corpus."""
+import asyncio
+import json
+import os
+
+import pytest
+
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.tools.healthcare.policy import PolicyCorpus, policy_check
+
+
+def test_corpus_rereads_a_file_only_when_its_mtime_changes(tmp_path):
+    path = tmp_path / "imaging_preauth.md"
+    path.write_text("MRI requires prior authorization.", encoding="utf-8")
+    os.utime(path, (1_000, 1_000))
+    corpus = PolicyCorpus(tmp_path)
+    assert "prior authorization" in corpus.policies(["Imaging Preauth.md"])
+
+    # Same mtime: the cached text is served without reading the file again
+    path.write_text("Edited in place.", encoding="utf-8")
+    os.utime(path, (1_000, 1_000))
+    assert "prior authorization" in corpus.policies(["imaging_preauth"])
+
+    os.utime(path, (2_000, 2_000))
+    assert "Edited in place." in corpus.policies(["imaging_preauth"])
+
+    path.unlink()
+    assert "Policy file not found: imaging_preauth" in corpus.policies(["imaging_preauth"])
+    assert corpus.readme() == "(No policy index found)"
+
+
+def test_policy_check_returns_a_decision_with_timings_as_artifact(stub_llm, monkeypatch):
+    monkeypatch.setattr(settings, "POLICY_CACHE_ENABLED", False)
+    call = {
+        "name": "policy_check",
+        "args": {"request_type": "imaging", "details": "MRI lumbar spine for PT-1001"},
+        "id": "call_1",
+        "type": "tool_call",
+    }
+    message = asyncio.run(policy_check.ainvoke(call))
+    assert json.loads(message.content)["status"] in ("PASS", "REQUIRES_REVIEW", "BLOCKED")
+    assert set(message.artifact["timings"]) == {"selection_ms", "evaluation_ms", "total_ms"}
+    # Timings stay out of the content the model sees
+    assert "timings" not in message.content
@@ -0,0 +1,68 @@
+"""Deterministic lookups run before the healthcare graph and reach it as tool results."""
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agent_demo_framework.agents.healthcare_agent import HealthcareAgent
+from agent_demo_framework.core.config import settings
+
+COORDINATION = "Schedule an MRI for PT-1001 with radiology and check coverage"
+
+
+@pytest.fixture
+def prefetching(stub_llm, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTHCARE_PREFETCH_ENABLED", True)
+    monkeypatch.setattr(settings, "HEALTHCARE_PREFETCH_POLICY", True)
+
+
+def _graph_input(message, task_type):
+    """The input `process` hands to the graph, routed as `task_type`."""
+    captured = {}
+
+    async def scenario():
+        agent = HealthcareAgent()
+
+        async def determine(text):
+            return task_type
+
+        prepare_run = agent._prepare_run
+
+        async def capturing(*args):
+            graph, graph_input, config = await prepare_run(*args)
+            captured["input"] = graph_input
+            return graph, graph_input, config
+
+        agent._determine_task_type = determine
+        agent._prepare_run = capturing
+        await agent.process(message, [])
+
+    asyncio.run(scenario())
+    return captured["input"]
+
+
+def test_lookups_are_injected_as_a_tool_call_turn(prefetching):
+    graph_input = _graph_input(COORDINATION, "coordination")
+    human, request, *results = graph_input["messages"]
+    assert isinstance(human, HumanMessage) and human.content == COORDINATION
+    assert isinstance(request, AIMessage)
+    assert [call["name"] for call in request.tool_calls] == ["patient_record", "policy_check"]
+    assert all(isinstance(msg, ToolMessage) for msg in results)
+    assert [msg.tool_call_id for msg in results] == [call["id"] for call in request.tool_calls]
+    # The supervisor sees the facts without a triage round-trip
+    index = graph_input["tool_index"]
+    assert index["has_patient"] and index["has_policy"]
+    assert index["pending"] == []
+
+
+def test_policy_check_is_only_prefetched_for_coordination(prefetching):
+    graph_input = _graph_input("Is amoxicillin okay for PT-1001 before her MRI?", "general")
+    request = graph_input["messages"][1]
+    assert [call["name"] for call in request.tool_calls] == ["patient_record", "medication_info"]
+    assert request.tool_calls[1]["args"] == {"drug": "amoxicillin"}
+
+
+def test_nothing_is_injected_when_prefetch_is_off(prefetching, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTHCARE_PREFETCH_ENABLED", False)
+    graph_input = _graph_input(COORDINATION, "coordination")
+    assert [msg.type for msg in graph_input["messages"]] == ["human"]
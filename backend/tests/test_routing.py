@@ -0,0 +1,178 @@
+"""Healthcare routing: the local classifier threshold, the LLM fallback and concurrent speculation."""
+import asyncio
+
+import pytest
+
+from agent_demo_framework.agents import healthcare_agent
+from agent_demo_framework.agents.healthcare_agent import HealthcareAgent, SpeculationGuard
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.intent_router import LocalIntentRouter, Prediction
+from agent_demo_framework.agents.healthcare_agent import RoutingDecision
+from agent_demo_framework.core.metrics import ROUTING_DECISIONS, ROUTING_SPECULATIONS
+
+LOOKUP = "What allergies does PT-1001 have?"
+
+
+class _Classifier:
+    """Stands in for the chat model's structured-output runnable."""
+
+    def __init__(self, delay: float = 0.0, error: Exception | None = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def with_structured_output(self, schema):
+        return self
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return RoutingDecision(task_type="general", reasoning="lookup")
+
+
+def _classify(classifier: _Classifier, message: str = LOOKUP) -> str:
+    async def scenario():
+        agent = HealthcareAgent()
+        agent.llm = classifier
+        return await agent._determine_task_type(message)
+
+    return asyncio.run(scenario())
+
+
+@pytest.fixture
+def llm_only(stub_llm, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTHCARE_ROUTING_LOCAL_ENABLED", False)
+    monkeypatch.setattr(settings, "HEALTHCARE_ROUTING_FALLBACK", "coordination")
+
+
+def test_slow_classifier_falls_back_after_the_timeout(llm_only, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTHCARE_ROUTING_TIMEOUT", 0.05)
+    fallbacks = ROUTING_DECISIONS.value(source="fallback", task_type="coordination")
+    assert _classify(_Classifier(delay=1.0)) == "coordination"
+    assert ROUTING_DECISIONS.value(source="fallback", task_type="coordination") == fallbacks + 1
+
+
+def test_failing_classifier_falls_back(llm_only):
+    assert _classify(_Classifier(error=RuntimeError("bad schema"))) == "coordination"
+
+
+def test_classifier_decision_is_used_within_the_timeout(llm_only):
+    decisions = ROUTING_DECISIONS.value(source="llm", task_type="general")
+    assert _classify(_Classifier()) == "general"
+    assert ROUTING_DECISIONS.value(source="llm", task_type="general") == decisions + 1
+
+
+class _LocalRouter:
+    loaded = True
+
+    def __init__(self, confidence: float):
+        self.confidence = confidence
+
+    def predict(self, message):
+        return Prediction("coordination", self.confidence)
+
+
+@pytest.fixture
+def local_router(stub_llm, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTHCARE_ROUTING_LOCAL_ENABLED", True)
+    monkeypatch.setattr(settings, "HEALTHCARE_ROUTING_LOCAL_THRESHOLD", 0.75)
+    monkeypatch.setattr(settings, "HEALTHCARE_ROUTING_SHADOW_RATE", 0.0)
+
+    def install(confidence: float) -> None:
+        monkeypatch.setattr(healthcare_agent, "_local_router", _LocalRouter(confidence))
+
+    return install
+
+
+def test_confident_local_decision_skips_the_llm(local_router):
+    local_router(0.9)
+    classifier = _Classifier()
+    assert _classify(classifier) == "coordination"
+    assert classifier.calls == 0
+
+
+def test_low_confidence_local_decision_defers_to_the_llm(local_router):
+    local_router(0.6)
+    classifier = _Classifier()
+    assert _classify(classifier) == "general"
+    assert classifier.calls == 1
+
+
+def test_shipped_training_data_routes_clear_requests_locally():
+    router = LocalIntentRouter(healthcare_agent._local_router.path)
+    assert router.load() is not None
+    assert router.predict("Schedule an MRI for PT-1001 and check coverage").label == "coordination"
+    assert router.predict("List the allergies for PT-1001").label == "general"
+
+
+@pytest.fixture
+def speculating(monkeypatch):
+    monkeypatch.setattr(settings, "HEALTHCARE_ROUTING_CONCURRENT", True)
+    monkeypatch.setattr(settings, "HEALTHCARE_ROUTING_LOCAL_ENABLED", False)
+    monkeypatch.setattr(settings, "HEALTHCARE_ROUTING_FALLBACK", "coordination")
+    monkeypatch.setattr(settings, "HEALTHCARE_ROUTING_SPECULATION_MAX_DISCARD_RATE", 0.5)
+    guard = SpeculationGuard(window=4, min_samples=2)
+    monkeypatch.setattr(healthcare_agent, "_speculation_guard", guard)
+    return guard
+
+
+def _routed_as(agent: HealthcareAgent, task_type: str, runs: list) -> None:
+    async def llm_task_type(message, record=True):
+        # Slow enough for the speculative run to start
+        await asyncio.sleep(0.05)
+        return task_type
+
+    stream_graph = agent._stream_graph
+
+    def counting_stream_graph(graph, graph_input, config, run_type):
+        runs.append(run_type)
+        return stream_graph(graph, graph_input, config, run_type)
+
+    agent._llm_task_type = llm_task_type
+    agent._stream_graph = counting_stream_graph
+
+
+def test_misrouted_speculation_is_discarded_and_counted(stub_llm, speculating):
+    runs = []
+
+    async def scenario():
+        agent = HealthcareAgent()
+        _routed_as(agent, "general", runs)
+        return [event async for event in agent.astream_events(LOOKUP, [])]
+
+    discarded = ROUTING_SPECULATIONS.value(outcome="discarded")
+    events = asyncio.run(scenario())
+    assert runs == ["coordination", "general"]
+    assert ROUTING_SPECULATIONS.value(outcome="discarded") == discarded + 1
+    # Only the rerun's events reach the client
+    statuses = [(event.step_id, event.status) for event in events if event.type == "status"]
+    assert statuses[0] == ("data_agent", "running")
+    assert statuses[-1] == ("data_agent", "completed")
+    assert speculating.discard_rate == 1.0
+
+
+def test_speculation_pauses_after_repeated_misroutes(stub_llm, speculating):
+    runs = []
+
+    async def scenario():
+        agent = HealthcareAgent()
+        _routed_as(agent, "general", runs)
+        for _ in range(3):
+            async for _event in agent.astream_events(LOOKUP, []):
+                pass
+
+    suppressed = ROUTING_SPECULATIONS.value(outcome="suppressed")
+    asyncio.run(scenario())
+    # Two discarded speculations, then the third turn waits for the decision and runs once
+    assert runs == ["coordination", "general", "coordination", "general", "general"]
+    assert ROUTING_SPECULATIONS.value(outcome="suppressed") == suppressed + 1
+    assert not speculating.allow()
+
+
+def test_guard_resumes_speculation_once_the_fallback_is_right_again(speculating):
+    for discarded in (True, True, False, False):
+        speculating.record(discarded)
+    assert speculating.discard_rate == 0.5
+    assert speculating.allow()
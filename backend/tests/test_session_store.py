@@ -0,0 +1,115 @@
+import asyncio
+import uuid
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.db.database import engine
+from agent_demo_framework.db.session_store import SessionStore
+
+
+def run(coro):
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            # Connections are bound to the loop that opened them
+            await engine.dispose()
+
+    return asyncio.run(wrapper())
+
+
+def turn(n):
+    return [HumanMessage(content=f"question {n}"), AIMessage(content=f"answer {n}")]
+
+
+def contents(history):
+    return [msg.content for msg in history]
+
+
+def test_append_after_eviction_keeps_earlier_turns():
+    session_id = str(uuid.uuid4())
+    store = SessionStore()
+
+    async def scenario():
+        store.append(session_id, turn(1))
+        await store.flush()
+        assert contents(await store.get_history(session_id)) == contents(turn(1))
+
+        # The entry is evicted while turn 2 runs
+        store.cache.pop(session_id)
+        store.append(session_id, turn(2))
+        assert store.cache.peek(session_id) is None
+
+        history = await store.get_history(session_id)
+        await store.close()
+        return history
+
+    assert contents(run(scenario())) == contents(turn(1) + turn(2))
+
+
+def test_internal_lookups_do_not_count_as_hits_or_misses():
+    session_id = str(uuid.uuid4())
+    store = SessionStore()
+
+    async def scenario():
+        store.append(session_id, turn(1))
+        await store.get_history(session_id)
+        store.append(session_id, turn(2))
+        store.replace_prefix(session_id, [HumanMessage(content="not in history")], AIMessage(content="summary"))
+        await store.close()
+
+    run(scenario())
+    assert (store.cache.stats.hits, store.cache.stats.misses) == (0, 1)
+
+
+def test_second_worker_sees_turns_written_by_the_first(monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_CACHE_REVALIDATE_SECONDS", 0.0)
+    session_id = str(uuid.uuid4())
+    first, second = SessionStore(), SessionStore()
+
+    async def scenario():
+        first.append(session_id, turn(1))
+        await first.flush()
+        assert contents(await second.get_history(session_id)) == contents(turn(1))
+        await asyncio.gather(*second._revalidations.values())
+
+        first.append(session_id, turn(2))
+        await first.flush()
+        # The hit is served from the cache without waiting on the database...
+        assert contents(await second.get_history(session_id)) == contents(turn(1))
+        # ...and the check it started in the background drops the stale entry
+        await asyncio.gather(*second._revalidations.values())
+        seen_by_second = await second.get_history(session_id)
+
+        second.append(session_id, turn(3))
+        await second.flush()
+        seen_by_first = await first.get_history(session_id)
+        return seen_by_second, seen_by_first
+
+    seen_by_second, seen_by_first = run(scenario())
+    assert contents(seen_by_second) == contents(turn(1) + turn(2))
+    assert contents(seen_by_first) == contents(turn(1) + turn(2) + turn(3))
+    assert second.cache.stats.evictions["stale"] == 1
+
+
+def test_own_write_drops_entry_that_missed_another_workers_rows(monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_CACHE_REVALIDATE_SECONDS", 3600.0)
+    session_id = str(uuid.uuid4())
+    first, second = SessionStore(), SessionStore()
+
+    async def scenario():
+        first.append(session_id, turn(1))
+        await first.flush()
+        await second.get_history(session_id)
+
+        # Within the revalidation interval the second worker does not look, but its own
+        # write notices the row it never saw
+        first.append(session_id, turn(2))
+        await first.flush()
+        second.append(session_id, turn(3))
+        await second.flush()
+        assert second.cache.peek(session_id) is None
+        return await second.get_history(session_id)
+
+    assert contents(run(scenario())) == contents(turn(1) + turn(2) + turn(3))
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from agent_demo_framework.core.admission import AdmissionController
+from agent_demo_framework.core.single_flight import FlightCancelled, SingleFlight
+
+KEY = "stream:healthcare:abc"
+
+
+class Source:
+    """Yields its events once `gate` is set; records whether the run was cancelled."""
+
+    def __init__(self, events):
+        self.events = events
+        self.gate = asyncio.Event()
+        self.started = 0
+        self.cancelled = False
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.gate.wait()
+            for event in self.events:
+                yield event
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def collect(subscription):
+    return [event async for event in subscription]
+
+
+def test_follower_keeps_the_run_when_the_leader_leaves_before_it_starts():
+    async def scenario():
+        flights, admission, source = SingleFlight(), AdmissionController(), Source(["a", "b"])
+        acquire = lambda: admission.acquire("healthcare")
+        leader = await flights.stream(KEY, source, acquire)
+        follower = await flights.stream(KEY, source, acquire)
+
+        # The leader's client goes away before the follower has read anything
+        leader.close()
+        await asyncio.sleep(0)
+        source.gate.set()
+        events = await collect(follower)
+        return events, source, admission.snapshot()["healthcare"]["active"]
+
+    events, source, active = asyncio.run(scenario())
+    assert events == ["a", "b"]
+    assert source.started == 1 and not source.cancelled
+    assert active == 0
+
+
+def test_run_is_cancelled_and_slot_released_when_every_subscriber_closes_unread():
+    async def scenario():
+        flights, admission, source = SingleFlight(), AdmissionController(), Source(["a"])
+        acquire = lambda: admission.acquire("healthcare")
+        subscriptions = [await flights.stream(KEY, source, acquire) for _ in range(2)]
+        await asyncio.sleep(0)
+        for subscription in subscriptions:
+            subscription.close()
+        await asyncio.sleep(0)
+        return source, flights.in_flight(KEY), admission.snapshot()["healthcare"]["active"]
+
+    source, in_flight, active = asyncio.run(scenario())
+    assert source.cancelled and not in_flight and active == 0
+
+
+def test_cancelled_run_fails_attached_subscribers():
+    async def scenario():
+        flights, admission, source = SingleFlight(), AdmissionController(), Source(["a", "b", "c"])
+        follower = await flights.stream(KEY, source, lambda: admission.acquire("healthcare"))
+        source.gate.set()
+        received = [await follower.__anext__()]
+        # e.g. server shutdown cancels the shared run mid-stream
+        flights._streams[KEY].task.cancel()
+        with pytest.raises(FlightCancelled):
+            async for event in follower:
+                received.append(event)
+        return received
+
+    received = asyncio.run(scenario())
+    assert received[0] == "a" and len(received) < 3
+
+
+def test_cancelled_call_fails_waiters():
+    async def scenario():
+        flights, admission = SingleFlight(), AdmissionController()
+        started = asyncio.Event()
+
+        async def run():
+            started.set()
+            await asyncio.sleep(10)
+
+        waiter = asyncio.create_task(flights.call("call:healthcare:abc", run, lambda: admission.acquire("healthcare")))
+        await started.wait()
+        flights._calls["call:healthcare:abc"].task.cancel()
+        with pytest.raises(FlightCancelled):
+            await waiter
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_one_waiter_leaves_the_call_to_the_others():
+    async def scenario():
+        flights, admission = SingleFlight(), AdmissionController()
+        release = asyncio.Event()
+        acquire = lambda: admission.acquire("healthcare")
+
+        async def run():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flights.call("call:healthcare:abc", run, acquire))
+        second = asyncio.create_task(flights.call("call:healthcare:abc", run, acquire))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        release.set()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
@@ -0,0 +1,82 @@
+"""SlotIndex window queries, the cross-clinic merge and date_range parsing."""
+from datetime import date, datetime
+
+import pytest
+
+from agent_demo_framework.tools.healthcare.slots import Slot, SlotIndex
+
+TODAY = date(2026, 1, 20)  # a Tuesday
+
+
+def _slot(start: str, clinic: str = "Downtown", specialty: str = "Radiology", type: str = "MRI", provider: str = "Dr. Lee") -> Slot:
+    return Slot(datetime.fromisoformat(start), clinic, specialty, type, provider)
+
+
+@pytest.fixture
+def index():
+    return SlotIndex([
+        _slot("2026-01-22T09:00"),
+        _slot("2026-01-20T15:00", type="CT"),
+        _slot("2026-01-21T10:00", provider="Dr. Park"),
+        _slot("2026-01-20T08:00", clinic="Northside"),
+        _slot("2026-01-23T08:00", clinic="Northside"),
+        _slot("2026-01-20T11:00", specialty="Cardiology"),
+    ], reference_date=TODAY)
+
+
+def _starts(slots):
+    return [slot.start.strftime("%m-%d %H:%M") for slot in slots]
+
+
+def test_window_is_half_open_and_in_start_order(index):
+    slots = index.window("downtown", "radiology", datetime(2026, 1, 20), datetime(2026, 1, 22, 9))
+    assert _starts(slots) == ["01-20 15:00", "01-21 10:00"]
+
+
+def test_window_filters_by_type_and_provider_with_loose_keys(index):
+    start, end = datetime(2026, 1, 1), datetime(2026, 2, 1)
+    assert _starts(index.window("Downtown", "Radiology", start, end, slot_type="mri")) == ["01-21 10:00", "01-22 09:00"]
+    assert _starts(index.window(" downtown ", "RADIOLOGY", start, end, provider="dr.  park")) == ["01-21 10:00"]
+    assert index.window("Uptown", "Radiology", start, end) == []
+
+
+def test_earliest_merges_clinics_and_respects_the_limit(index):
+    slots = index.earliest("radiology", 3, datetime(2026, 1, 20), datetime(2026, 2, 1))
+    assert _starts(slots) == ["01-20 08:00", "01-20 15:00", "01-21 10:00"]
+    assert [slot.clinic for slot in slots] == ["Northside", "Downtown", "Downtown"]
+    assert index.earliest("radiology", 0, datetime(2026, 1, 20), datetime(2026, 2, 1)) == []
+
+
+@pytest.mark.parametrize("date_range, expected", [
+    ("next_7_days", ("2026-01-20", "2026-01-28")),
+    (None, ("2026-01-20", "2026-01-28")),
+    ("next two weeks", ("2026-01-20", "2026-02-04")),
+    ("within the next 14 days", ("2026-01-20", "2026-02-04")),
+    ("today", ("2026-01-20", "2026-01-21")),
+    ("tomorrow", ("2026-01-21", "2026-01-22")),
+    ("this week", ("2026-01-20", "2026-01-26")),
+    ("2026-02-03", ("2026-02-03", "2026-02-04")),
+    ("2026-02-03..2026-02-05", ("2026-02-03", "2026-02-06")),
+    ("2026-02-03 to 2026-02-05", ("2026-02-03", "2026-02-06")),
+])
+def test_resolve_window(index, date_range, expected):
+    start, end = index.resolve_window(date_range)
+    assert (start.date().isoformat(), end.date().isoformat()) == expected
+
+
+@pytest.mark.parametrize("date_range", ["whenever", "next several days", "2026-13-01"])
+def test_resolve_window_rejects_unparseable_ranges(index, date_range):
+    assert index.resolve_window(date_range) is None
+
+
+def test_from_appointments_skips_bad_slots_and_reads_as_of():
+    index = SlotIndex.from_appointments({
+        "as_of": "2026-01-20",
+        "appointments": [{
+            "clinic": "Downtown",
+            "specialty": "Radiology",
+            "slots": [{"start": "2026-01-21T10:00", "type": "MRI", "provider": "Dr. Lee"}, {"start": "soon"}, {}],
+        }],
+    })
+    assert index.size == 1
+    assert index.reference_date == TODAY
@@ -0,0 +1,64 @@
+"""Message-delta coalescing in sse_frames."""
+import asyncio
+import json
+
+from agent_demo_framework.api.sse import sse_frames
+from agent_demo_framework.schemas.stream import MessageEvent, StatusEvent
+
+
+async def _source(items):
+    """Yields events; a float in the list is a pause in seconds."""
+    for item in items:
+        if isinstance(item, float):
+            await asyncio.sleep(item)
+        else:
+            yield item
+
+
+def _frames(items, window_ms=50.0, max_bytes=1024):
+    async def collect():
+        return [frame async for frame in sse_frames(_source(items), window_ms=window_ms, max_bytes=max_bytes)]
+
+    return [_parse(frame) for frame in asyncio.run(collect())]
+
+
+def _parse(frame: str):
+    data = json.loads(frame.split("data: ", 1)[1])
+    if data["type"] == "message":
+        return ("message", data["content"], data["is_final"])
+    return (data["type"], data["step_id"], data["status"])
+
+
+def delta(text):
+    return MessageEvent(content=text, is_final=False)
+
+
+def test_first_delta_is_sent_alone_and_later_ones_merge():
+    frames = _frames([delta("a"), delta("b"), delta("c"), MessageEvent(content="", is_final=True)])
+    assert frames == [("message", "a", False), ("message", "bc", True)]
+
+
+def test_buffer_is_flushed_when_the_window_passes():
+    frames = _frames([delta("a"), delta("b"), 0.1, delta("c"), delta("d")], window_ms=30)
+    assert frames == [("message", "a", False), ("message", "b", False), ("message", "cd", False)]
+
+
+def test_buffer_is_flushed_at_the_byte_cap():
+    frames = _frames([delta("a"), delta("bb"), delta("cc"), delta("d")], max_bytes=4)
+    assert frames == [("message", "a", False), ("message", "bbcc", False), ("message", "d", False)]
+
+
+def test_other_events_flush_buffered_deltas_first():
+    status = StatusEvent(step_id="triage", status="completed", details="done")
+    frames = _frames([delta("a"), delta("b"), status, delta("c")])
+    assert frames == [
+        ("message", "a", False),
+        ("message", "b", False),
+        ("status", "triage", "completed"),
+        ("message", "c", False),
+    ]
+
+
+def test_zero_window_sends_every_delta():
+    frames = _frames([delta("a"), delta("b"), delta("c")], window_ms=0)
+    assert [content for _, content, _ in frames] == ["a", "b", "c"]
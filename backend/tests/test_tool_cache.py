@@ -0,0 +1,18 @@
+import json
+
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.tools.healthcare.cache import ToolResultCache
+
+
+def test_cached_output_does_not_depend_on_the_first_callers_spelling(monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_CACHE_SHARED_PATH", "")
+    cache = ToolResultCache()
+
+    @cache.cached("echo", version=lambda: "v1")
+    def echo(service: str, clinic: str = "Any") -> str:
+        return json.dumps({"service": service, "clinic": clinic})
+
+    first = echo("  MRI ", clinic="North  Clinic")
+    second = echo("mri", clinic="north clinic")
+    assert first == second
+    assert json.loads(second) == {"service": "mri", "clinic": "north clinic"}
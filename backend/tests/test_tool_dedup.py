@@ -0,0 +1,81 @@
+"""Repeated tool calls within one healthcare graph run are answered from earlier results."""
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agent_demo_framework.agents.healthcare_agent import HealthcareAgent, build_tool_index, tool_call_key
+from agent_demo_framework.core.config import settings
+from agent_demo_framework.core.metrics import TOOL_CALLS_DEDUPLICATED
+
+RECORD = {"patient_id": "PT-1001"}
+
+
+class _ToolNode:
+    """Records which calls actually execute."""
+
+    def __init__(self):
+        self.executed = []
+
+    async def ainvoke(self, state, config=None):
+        request = state["messages"][-1]
+        self.executed.extend(call["id"] for call in request.tool_calls)
+        return {"messages": [
+            ToolMessage(content=f"{call['name']} result", name=call["name"], tool_call_id=call["id"])
+            for call in request.tool_calls
+        ]}
+
+
+@pytest.fixture
+def agent(stub_llm, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTHCARE_TOOL_DEDUP_ENABLED", True)
+    agent = HealthcareAgent()
+    agent.tool_node = _ToolNode()
+    return agent
+
+
+def _run_tools(agent, messages):
+    state = {"messages": messages, "next": "", "task_type": "coordination", "tool_index": build_tool_index(messages)}
+    return asyncio.run(agent._tools_node(state, {}))
+
+
+def _calls(*specs):
+    return AIMessage(content="", tool_calls=[{"id": call_id, "name": name, "args": args} for call_id, name, args in specs])
+
+
+def test_identical_calls_in_one_batch_execute_once(agent):
+    deduplicated = TOOL_CALLS_DEDUPLICATED.value(tool="patient_record")
+    request = _calls(("c1", "patient_record", RECORD), ("c2", "patient_record", {"patient_id": "PT-1001 "}), ("c3", "policy_check", {"request_type": "imaging"}))
+    update = _run_tools(agent, [HumanMessage(content="MRI for PT-1001"), request])
+    assert agent.tool_node.executed == ["c1", "c3"]
+    # Every call still gets its own result, in request order
+    assert [msg.tool_call_id for msg in update["messages"]] == ["c1", "c2", "c3"]
+    assert update["messages"][1].content == "patient_record result"
+    assert update["tool_index"] == update["messages"]
+    assert TOOL_CALLS_DEDUPLICATED.value(tool="patient_record") == deduplicated + 1
+
+
+def test_a_call_answered_earlier_in_the_run_is_not_repeated(agent):
+    earlier = [
+        HumanMessage(content="MRI for PT-1001"),
+        _calls(("c1", "patient_record", RECORD)),
+        ToolMessage(content="{\"name\": \"Jane\"}", name="patient_record", tool_call_id="c1"),
+    ]
+    update = _run_tools(agent, earlier + [_calls(("c2", "patient_record", RECORD))])
+    assert agent.tool_node.executed == []
+    assert [(msg.tool_call_id, msg.content) for msg in update["messages"]] == [("c2", "{\"name\": \"Jane\"}")]
+
+
+def test_failed_results_are_retried(agent):
+    earlier = [
+        HumanMessage(content="MRI for PT-1001"),
+        _calls(("c1", "patient_record", RECORD)),
+        ToolMessage(content="Error: timeout", name="patient_record", tool_call_id="c1", status="error"),
+    ]
+    assert build_tool_index(earlier)["memo"] == {}
+    _run_tools(agent, earlier + [_calls(("c2", "patient_record", RECORD))])
+    assert agent.tool_node.executed == ["c2"]
+
+
+def test_memo_keys_ignore_argument_formatting():
+    assert tool_call_key("patient_record", {"patient_id": "pt-1001"}) == tool_call_key("patient_record", {"patient_id": " PT-1001"})
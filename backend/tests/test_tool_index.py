@@ -0,0 +1,47 @@
+"""The incremental tool_index reducer of the healthcare graph state."""
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agent_demo_framework.agents.healthcare_agent import build_tool_index, update_tool_index
+
+
+def calls(*specs):
+    return AIMessage(content="", tool_calls=[{"id": call_id, "name": name, "args": args} for call_id, name, args in specs])
+
+
+def result(call_id, name, payload):
+    return ToolMessage(content=json.dumps(payload), name=name, tool_call_id=call_id)
+
+
+def test_reducer_folds_new_messages_into_the_index():
+    index = update_tool_index(None, [HumanMessage(content="MRI for PT-1001")])
+    assert index["results"] == 0 and index["pending"] == []
+
+    index = update_tool_index(index, [calls(("c1", "patient_record", {"patient_id": "PT-1001"}), ("c2", "policy_check", {"request_type": "imaging"}))])
+    assert index["pending"] == ["c1", "c2"]
+
+    index = update_tool_index(index, [result("c1", "patient_record", {"patient_id": "PT-1001", "name": "Jane"})])
+    assert index["pending"] == ["c2"]
+    assert index["has_patient"] and not index["has_policy"]
+
+    index = update_tool_index(index, [result("c2", "policy_check", {"status": "requires_review"})])
+    assert index["pending"] == []
+    assert index["has_policy"]
+    assert index["results"] == 2
+    assert index["by_tool"] == {"patient_record": 1, "policy_check": 1}
+
+
+def test_reducer_does_not_mutate_the_previous_index():
+    before = update_tool_index(None, [calls(("c1", "patient_record", {"patient_id": "PT-1001"}))])
+    after = update_tool_index(before, [result("c1", "patient_record", {"name": "Jane"})])
+    assert before["pending"] == ["c1"] and before["results"] == 0
+    assert after["pending"] == [] and after["results"] == 1
+
+
+def test_a_built_index_replaces_the_current_one():
+    messages = [calls(("c1", "patient_record", {"patient_id": "PT-1001"})), result("c1", "patient_record", {"name": "Jane"})]
+    current = update_tool_index(None, messages)
+    fresh = build_tool_index([])
+    assert update_tool_index(current, fresh) is fresh
+
@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agent_demo_framework.api import ws
+from agent_demo_framework.core.config import settings
+
+
+class StalledSocket:
+    """A client that never reads: nothing drains the send queue."""
+
+
+def test_receive_side_never_waits_on_a_full_send_queue(monkeypatch):
+    monkeypatch.setattr(settings, "WS_SEND_QUEUE_SIZE", 2)
+
+    async def scenario():
+        connection = ws._Connection(StalledSocket(), ws._Codec("ndjson"))
+        for _ in range(settings.WS_SEND_QUEUE_SIZE):
+            connection.queue.put_nowait({"t": "o"})
+        turn = asyncio.create_task(connection.send({"t": "m", "id": "t1", "c": "x"}))
+        connection.turns["t1"] = turn
+        await asyncio.sleep(0)
+        assert not turn.done()
+
+        # A cancel is acted on and acknowledged while the queue is still full
+        assert connection.cancel("t1")
+        assert connection.reply({"t": "d", "id": "t1"})
+        await asyncio.sleep(0)
+        assert turn.cancelled()
+        assert len(connection.replies) == 1
+        # The turn is over, so a repeated cancel has nothing to cancel
+        assert not connection.cancel("t1")
+        assert not connection.cancel("unknown")
+
+        # A client that keeps sending without reading runs out of parked replies
+        for _ in range(ws.MAX_WAITING_REPLIES - 1):
+            assert connection.reply({"t": "o"})
+        assert not connection.reply({"t": "o"})
+
+        await connection.close()
+        return connection
+
+    connection = asyncio.run(scenario())
+    assert not connection.replies
+
+
+def test_cancel_for_a_turn_that_is_not_running_gets_an_error_not_a_done_frame():
+    app = FastAPI()
+    app.include_router(ws.router, prefix="/chat")
+    with TestClient(app).websocket_connect("/chat/ws") as socket:
+        socket.send_text(json.dumps({"t": "cancel", "id": "nope"}))
+        frame = json.loads(socket.receive_text())
+    assert frame["t"] == "e" and frame["id"] == "nope"